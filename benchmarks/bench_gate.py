@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# =============================================================================
+# Created By  : Arthur Thuy
+# Created Date: Sat October 17 2026
+# =============================================================================
+"""Benchmark per-observation latency of `RejectionGate` on a stream of uncertainties."""
+# =============================================================================
+# Imports
+# =============================================================================
+# standard library imports
+import argparse
+import time
+# related third party imports
+import numpy as np
+# local application/library specific imports
+from uncertainty_rejection.analysis import RejectionGate
+
+# run with: `python benchmarks/bench_gate.py` from within the repository root
+
+
+def latencies(gate, stream, batch_size):
+    """Return the latency in microseconds of each call of `gate` on the stream."""
+    batches = stream.reshape(-1, batch_size) if batch_size > 1 else stream.tolist()
+    times = np.empty(len(batches))
+    for i, batch in enumerate(batches):
+        start = time.perf_counter()
+        gate(batch)
+        times[i] = time.perf_counter() - start
+    return times * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--observations", type=int, default=200_000)
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--windows", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64])
+    args = parser.parse_args()
+
+    stream = np.random.default_rng(0).beta(2, 5, size=args.observations)
+    gates = {"absolute": lambda: RejectionGate(0.5, relative=False),
+             "relative (P2 sketch)": lambda: RejectionGate(args.threshold)}
+    for window in args.windows:
+        gates[f"relative (window={window})"] = lambda window=window: RejectionGate(
+            args.threshold, window=window)
+    for batch_size in args.batch_sizes:
+        n_obs = args.observations // batch_size * batch_size
+        for name, make_gate in gates.items():
+            times = latencies(make_gate(), stream[:n_obs], batch_size) / batch_size
+            p50, p99 = np.percentile(times, [50, 99])
+            print(f"{name:<28} batch={batch_size:<4} per observation: "
+                  f"p50 {p50:7.2f} us  p99 {p99:7.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# =============================================================================
+# Created By  : Arthur Thuy
+# Created Date: Sat October 17 2026
+# =============================================================================
+"""Benchmark scaling of `n_jobs` for uncertainty computation and rejection curves."""
+# =============================================================================
+# Imports
+# =============================================================================
+# standard library imports
+import argparse
+import os
+import time
+# related third party imports
+import numpy as np
+# local application/library specific imports
+from uncertainty_rejection.analysis import (
+    compute_all_uncertainties,
+    compute_uncertainty,
+    rejection_curve
+)
+
+# run with: `python benchmarks/bench_parallel.py` from within the repository root
+
+
+def timeit(func, repeat=3):
+    """Return the best wall-clock time of `repeat` calls of `func`."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--observations", type=int, default=200_000)
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument("--classes", type=int, default=10)
+    parser.add_argument("--rejection-observations", type=int, default=5_000_000)
+    parser.add_argument("--n-jobs", type=int, nargs="+", default=None,
+                        help="numbers of threads to benchmark (default: powers of 2 up to CPUs)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    y_stack = rng.dirichlet(np.ones(args.classes), size=(args.observations, args.samples))
+    n_rej = args.rejection_observations
+    y_true_label = rng.integers(0, args.classes, size=n_rej)
+    y_pred_label = rng.integers(0, args.classes, size=n_rej)
+    unc_ary = rng.random(n_rej)
+
+    benchmarks = {
+        "compute_uncertainty": lambda n_jobs: compute_uncertainty(
+            y_stack, memory_budget=2**25, n_jobs=n_jobs),
+        "compute_all_uncertainties": lambda n_jobs: compute_all_uncertainties(
+            y_stack, n_jobs=n_jobs),
+        "rejection_curve (relative)": lambda n_jobs: rejection_curve(
+            y_true_label, y_pred_label, unc_ary, threshold=np.linspace(0, 1, 100),
+            n_jobs=n_jobs),
+        "rejection_curve (absolute)": lambda n_jobs: rejection_curve(
+            y_true_label, y_pred_label, unc_ary, threshold=np.linspace(0, 1, 100),
+            relative=False, n_jobs=n_jobs),
+    }
+    n_cpus = os.cpu_count() or 1
+    n_jobs_list = args.n_jobs or sorted({1, 2, 4, 8, 16, 32, 64, n_cpus}
+                                        & set(range(1, n_cpus + 1)))
+    print(f"CPUs: {n_cpus}")
+    for name, func in benchmarks.items():
+        time_1 = timeit(lambda: func(1))
+        for n_jobs in n_jobs_list:
+            time_n = time_1 if n_jobs == 1 else timeit(lambda: func(n_jobs))
+            print(f"{name:<28} n_jobs={n_jobs:<3} {time_n:8.3f} s  speedup {time_1 / time_n:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,30 +8,66 @@
 # Imports
 # =============================================================================
 # standard library imports
+import bisect
+import logging
+import math
+import os
+from collections import OrderedDict, deque
+from functools import cached_property
 
 # related third party imports
 import numpy as np
 from tabulate import tabulate
 from scipy.stats import entropy
+from scipy.special import entr, xlogy
 
 # local application/library specific imports
 from uncertainty_rejection.utils import (
+    get_n_workers,
+    map_ordered,
     subset_ary
 )
 
+# maximum size of intermediate arrays in fused/chunked computations
+_CHUNK_BYTES = 2**25
+# tie handling for relative rejection
+_TIES = ["random", "expected", "hash"]
+# accumulator for reductions over the sample and class axes
+_ACC_DTYPE = np.float64
+
+
+def _float_dtype(dtype):
+    """Return floating point dtype of predictions, float64 for non-float input."""
+    dtype = np.dtype(dtype)
+    return dtype if np.issubdtype(dtype, np.floating) else np.dtype(np.float64)
+
+
+def _result_dtype(dtype):
+    """Return dtype of per-observation results: the input precision, at least float32.
+
+    Dtype policy: predictions are never upcast as a whole. Elementwise entropy terms
+    are computed in this dtype on chunks of observations (float16 chunks are upcast to
+    float32, as the entropy kernels have no float16 loops), reductions over the sample
+    and class axes accumulate in `_ACC_DTYPE` and per-observation results are returned
+    in this dtype.
+    """
+    return np.result_type(_float_dtype(dtype), np.float32)
+
 
 def get_y_mean_label(y_pred_stack):
     """Compute mean predicted probabilities for all classes and predicted label.
 
     Parameters
     ----------
-    y_pred_stack : ndarray
+    y_pred_stack : ndarray or TopKPredictions
         3D array (`float` type) of shape `(observations, samples, classes)`.
 
     Returns
     -------
-    y_mean : ndarray
-        2D array (`float` type) of shape `(observations, classes)`.
+    y_mean : ndarray or TopKPredictions
+        2D array (`float` type) of shape `(observations, classes)`, accumulated in
+        float64 and returned in the input precision (at least float32). For
+        `TopKPredictions`, sparse predictions with a single sample.
     y_label : ndarray
         1D array (`float` type) of shape `(observations,)`.
 
@@ -39,13 +75,17 @@ def get_y_mean_label(y_pred_stack):
     --------
     TODO
     """
+    if isinstance(y_pred_stack, TopKPredictions):
+        y_mean = y_pred_stack.mean()
+        y_label, _ = _topk_label_conf(y_mean)
+        return y_mean, y_label
     if not y_pred_stack.ndim == 3:
         raise ValueError(
             f"`y_stack` should have 3 dimensions, has {y_pred_stack.ndim}")
     # average over samples (axis=-2)
-    y_mean = np.mean(y_pred_stack, axis=-2)
+    y_mean = np.mean(y_pred_stack, axis=-2, dtype=_ACC_DTYPE)
     y_label = np.argmax(y_mean, axis=-1)
-    return y_mean, y_label
+    return y_mean.astype(_result_dtype(y_pred_stack.dtype), copy=False), y_label
 
 
 def get_pos_neg_probs(y_pred_pos, axis=-1):
@@ -63,7 +103,8 @@ def get_pos_neg_probs(y_pred_pos, axis=-1):
     Returns
     -------
     y_pred_pos_neg : ndarray
-        3D array (`float` type) of shape `(observations, samples, classes)`.
+        3D array (`float` type) of shape `(observations, samples, classes)`, in the
+        precision of `y_pred_pos`.
 
     Examples
     --------
@@ -77,53 +118,487 @@ def get_pos_neg_probs(y_pred_pos, axis=-1):
             [0.22, 0.78],
             [0.08, 0.92]]])
     """
-    y_pred_neg = np.subtract(1., y_pred_pos)
-    # probability vector should sum to 1
-    y_pred_pos = np.subtract(1., y_pred_neg)
+    y_pred_neg, y_pred_pos = _pos_neg_probs_pair(y_pred_pos)
     y_pred_pos_neg = np.stack([y_pred_neg, y_pred_pos], axis=axis)
     return y_pred_pos_neg
 
 
-def load_predictions(preds_path):
+class Predictions:
+    """Lazy handle on predicted probabilities.
+
+    The mean predicted probabilities, predicted label and uncertainties are computed
+    on first access and cached. The stored array is not copied, such that a
+    memory-mapped array stays on disk until a derived quantity is requested.
+    Binary predictions are processed with the closed-form binary functions (e.g.
+    `compute_uncertainty_binary`) and only expanded to a 3D stack if `y_stack` is
+    accessed.
+
+    Parameters
+    ----------
+    y_pred : ndarray or TopKPredictions
+        3D array (`float` type) of shape `(observations, samples, classes)`,
+        2D array of shape `(observations, samples)` or 1D array of shape `(observations,)`
+        containing probabilities for the positive class, or sparse top-k predictions.
+
+    Examples
+    --------
+    >>> preds = open_predictions("preds.npy")
+    >>> unc_total, unc_aleatoric, unc_epistemic = preds.uncertainties
+    """
+    def __init__(self, y_pred):
+        if y_pred.ndim not in (1, 2, 3):
+            raise ValueError(
+                f"`y_pred` should have 1, 2 or 3 dimensions, has {y_pred.ndim}")
+        self.y_pred = y_pred
+
+    @property
+    def shape(self):
+        """Shape `(observations, samples, classes)` of `y_stack`."""
+        if self.y_pred.ndim == 1:
+            return (self.y_pred.shape[0], 1, 2)
+        if self.y_pred.ndim == 2:
+            return self.y_pred.shape + (2,)
+        return self.y_pred.shape
+
+    @cached_property
+    def y_stack(self):
+        """3D array (`float` type) of shape `(observations, samples, classes)`."""
+        y_stack = self.y_pred
+        if y_stack.ndim <= 2:
+            y_stack = get_pos_neg_probs(y_stack, axis=-1)
+        if y_stack.ndim <= 2:
+            y_stack = np.expand_dims(y_stack, axis=-2)
+        return y_stack
+
+    @cached_property
+    def _y_mean_label(self):
+        if self.y_pred.ndim <= 2:
+            return get_y_mean_label_binary(self.y_pred)
+        return get_y_mean_label(self.y_stack)
+
+    @property
+    def y_mean(self):
+        """2D array (`float` type) of shape `(observations, classes)`."""
+        return self._y_mean_label[0]
+
+    @property
+    def y_label(self):
+        """1D array (`float` type) of shape `(observations,)`."""
+        return self._y_mean_label[1]
+
+    @cached_property
+    def uncertainties(self):
+        """Tuple of 1D arrays (`float` type) containing TU, AU and EU, \
+            see `compute_uncertainty`."""
+        if self.y_pred.ndim <= 2:
+            return compute_uncertainty_binary(self.y_pred)
+        return compute_uncertainty(self.y_stack, memory_budget=_CHUNK_BYTES)
+
+    @cached_property
+    def conf(self):
+        """1D ndarray (`float` type) containing confidence values."""
+        if isinstance(self.y_pred, TopKPredictions):
+            return compute_confidence(self.y_pred)
+        return np.max(self.y_mean, axis=-1)
+
+
+class TopKPredictions:
+    """Sparse top-k predicted probabilities for models with many classes.
+
+    For each observation and sample, only the `k` largest probabilities and their class
+    indices are stored, together with the residual probability mass of the other
+    classes. Index -1 marks padding (with probability 0), such that the number of
+    stored classes can vary. `get_y_mean_label`, `compute_confidence` and
+    `compute_uncertainty` accept this format natively.
+
+    Point estimates assume that the residual mass of a sample is spread uniformly over
+    its `n_classes - k` other classes (exact for `to_dense`). As the uniform spread
+    maximizes entropy, the residual contribution to the entropy of a sample with
+    residual `r` is bounded by `-r log2(r) <= H_res <= -r log2(r / (n_classes - k))`,
+    see `compute_uncertainty_bounds`.
+
+    Parameters
+    ----------
+    indices : ndarray
+        3D array (`int` type) of shape `(observations, samples, k)` containing class
+        indices, -1 for padding.
+    probs : ndarray
+        3D array (`float` type) of shape `(observations, samples, k)` containing the
+        probabilities of the classes in `indices`.
+    n_classes : int
+        Total number of classes.
+    residual : ndarray, optional
+        2D array (`float` type) of shape `(observations, samples)` containing the
+        probability mass of the other classes. If None, `1 - sum(probs)` is used.
+        Default: None
+
+    Examples
+    --------
+    >>> topk = TopKPredictions.from_dense(y_pred_stack, k=5)
+    >>> unc_total, unc_aleatoric, unc_epistemic = compute_uncertainty(topk)
+    """
+    ndim = 3
+
+    def __init__(self, indices, probs, n_classes, residual=None):
+        indices, probs = np.asarray(indices), np.asarray(probs)
+        if not indices.ndim == 3 or indices.shape != probs.shape:
+            raise ValueError(
+                f"`indices` and `probs` should be 3D arrays of equal shape, "
+                f"have shapes {indices.shape} and {probs.shape}")
+        if indices.size and not -1 <= indices.min() <= indices.max() < n_classes:
+            raise ValueError(f"`indices` should be in [-1, {n_classes})")
+        if residual is None:
+            residual = np.clip(1. - np.sum(probs, axis=-1, dtype=_ACC_DTYPE), 0., None)
+        residual = np.asarray(residual)
+        if residual.shape != probs.shape[:2]:
+            raise ValueError(
+                f"`residual` should have shape {probs.shape[:2]}, has {residual.shape}")
+        self.indices = indices
+        self.probs = probs
+        self.residual = residual
+        self.n_classes = int(n_classes)
+
+    @property
+    def shape(self):
+        """Shape `(observations, samples, classes)` of the dense predictions."""
+        return self.probs.shape[:2] + (self.n_classes,)
+
+    @property
+    def n_known(self):
+        """2D array (`int` type) containing the number of stored classes per sample."""
+        return np.count_nonzero(self.indices >= 0, axis=-1)
+
+    @classmethod
+    def from_dense(cls, y_pred_stack, k):
+        """Keep the `k` largest probabilities of a dense 3D stack.
+
+        Parameters
+        ----------
+        y_pred_stack : ndarray
+            3D array (`float` type) of shape `(observations, samples, classes)`.
+        k : int
+            Number of classes to keep per sample.
+
+        Returns
+        -------
+        TopKPredictions
+            Sparse predictions, sorted by decreasing probability.
+        """
+        if not y_pred_stack.ndim == 3:
+            raise ValueError(
+                f"`y_stack` should have 3 dimensions, has {y_pred_stack.ndim}")
+        k = min(k, y_pred_stack.shape[-1])
+        indices = np.argpartition(-y_pred_stack, k - 1, axis=-1)[..., :k]
+        probs = np.take_along_axis(y_pred_stack, indices, axis=-1)
+        order = np.argsort(-probs, axis=-1, kind="stable")
+        indices = np.take_along_axis(indices, order, axis=-1)
+        probs = np.take_along_axis(probs, order, axis=-1)
+        residual = np.clip(np.sum(y_pred_stack, axis=-1, dtype=_ACC_DTYPE)
+                           - np.sum(probs, axis=-1, dtype=_ACC_DTYPE), 0., None)
+        return cls(indices, probs, y_pred_stack.shape[-1], residual=residual)
+
+    def to_dense(self):
+        """Expand to a dense 3D stack, spreading the residual mass uniformly.
+
+        Returns
+        -------
+        ndarray
+            3D array (`float` type) of shape `(observations, samples, classes)`.
+        """
+        n_other = np.maximum(self.n_classes - self.n_known, 1)
+        y_pred_stack = np.repeat((self.residual / n_other)[..., np.newaxis],
+                                 self.n_classes, axis=-1)
+        obs, samples, cols = np.nonzero(self.indices >= 0)
+        y_pred_stack[obs, samples, self.indices[obs, samples, cols]] = \
+            self.probs[obs, samples, cols]
+        return y_pred_stack
+
+    def save(self, file):
+        """Save to an `.npz` file that can be read with `load_predictions`.
+
+        Parameters
+        ----------
+        file : file-like object, string, or pathlib.Path
+            The file to write.
+        """
+        np.savez(file, indices=self.indices, probs=self.probs, residual=self.residual,
+                 n_classes=self.n_classes)
+
+    def entropy(self, residual="uniform"):
+        """Compute entropy of each sample in bits.
+
+        Parameters
+        ----------
+        residual : {'uniform', 'lower'}, optional
+            Spread the residual mass uniformly over the other classes (point estimate
+            and upper bound) or concentrate it in a single class (lower bound).
+            Default: 'uniform'
+
+        Returns
+        -------
+        ndarray
+            2D array (`float` type) of shape `(observations, samples)`.
+        """
+        residuals = ["uniform", "lower"]
+        if residual not in residuals:
+            raise ValueError("Invalid residual. Expected one of: %s" % residuals)
+        probs = self.probs.astype(_ACC_DTYPE, copy=False)
+        unc = -np.sum(xlogy(probs, probs), axis=-1)
+        res = self.residual.astype(_ACC_DTYPE, copy=False)
+        n_other = np.maximum(self.n_classes - self.n_known, 1) if residual == "uniform" else 1
+        unc -= xlogy(res, res / n_other)
+        return unc / np.log(2)
+
+    def mean(self):
+        """Average over samples.
+
+        Under the uniform residual assumption, the mean of a stored class is its mean
+        stored probability plus the mean residual share of the samples that do not store
+        it. The classes stored by no sample share the remaining mass.
+
+        Returns
+        -------
+        TopKPredictions
+            Sparse predictions with a single sample, storing the union of classes.
+        """
+        n_obs, n_samples, k = self.probs.shape
+        residual = self.residual.astype(_ACC_DTYPE, copy=False)
+        # residual share per class of each sample
+        share = residual / np.maximum(self.n_classes - self.n_known, 1)
+        share_total = np.sum(share, axis=-1)
+        valid = self.indices >= 0
+        keys = np.where(valid, self.indices, self.n_classes).reshape(n_obs, n_samples * k)
+        weights = np.where(valid, self.probs - share[..., np.newaxis], 0.)
+        weights = weights.reshape(n_obs, n_samples * k)
+        # merge duplicate classes of the samples
+        order = np.argsort(keys, axis=-1, kind="stable")
+        keys = np.take_along_axis(keys, order, axis=-1)
+        weights = np.take_along_axis(weights, order, axis=-1)
+        is_start = np.ones(keys.shape, dtype=bool)
+        is_start[:, 1:] = keys[:, 1:] != keys[:, :-1]
+        starts = np.flatnonzero(is_start)
+        sums = np.add.reduceat(weights.ravel(), starts) if starts.size else np.zeros(0)
+        # drop the segments of padding
+        is_class = keys.ravel()[starts] < self.n_classes
+        starts, sums = starts[is_class], sums[is_class]
+        is_union = np.zeros(keys.shape, dtype=bool)
+        is_union.ravel()[starts] = True
+        n_union = np.count_nonzero(is_union, axis=-1)
+        rows = starts // max(keys.shape[1], 1)
+        new_cols = (np.cumsum(is_union, axis=-1) - 1).ravel()[starts]
+
+        width = max(int(n_union.max(initial=0)), 1)
+        indices = np.full((n_obs, 1, width), -1, dtype=self.indices.dtype)
+        probs = np.zeros((n_obs, 1, width), dtype=_ACC_DTYPE)
+        indices[rows, 0, new_cols] = keys.ravel()[starts]
+        probs[rows, 0, new_cols] = (sums + share_total[rows]) / n_samples
+        mean_residual = (self.n_classes - n_union) * share_total / n_samples
+        return TopKPredictions(indices, probs, self.n_classes,
+                               residual=mean_residual[:, np.newaxis])
+
+
+def _topk_label_conf(y_mean):
+    """Compute predicted label and confidence from the mean of `TopKPredictions`.
+
+    As for dense predictions, the label is the first class with maximum probability,
+    which can be a class that is stored by no sample if the residual mass is large.
+    """
+    indices, probs = y_mean.indices[:, 0], y_mean.probs[:, 0]
+    rows = np.arange(indices.shape[0])
+    masked = np.where(indices >= 0, probs, -np.inf)
+    pos = np.argmax(masked, axis=-1)
+    y_label, conf = indices[rows, pos].astype(np.intp), masked[rows, pos]
+    n_other = y_mean.n_classes - y_mean.n_known[:, 0]
+    other = y_mean.residual[:, 0] / np.maximum(n_other, 1)
+    # smallest class index that is stored by no sample
+    stored = np.sort(np.where(indices >= 0, indices, y_mean.n_classes), axis=-1)
+    is_gap = stored > np.arange(stored.shape[1])
+    first_other = np.where(is_gap.any(axis=-1), np.argmax(is_gap, axis=-1), stored.shape[1])
+    use_other = (n_other > 0) & ((other > conf) | ((other == conf) & (first_other < y_label)))
+    y_label[use_other] = first_other[use_other]
+    conf[use_other] = other[use_other]
+    return y_label, conf
+
+
+def compute_uncertainty_bounds(y_pred_topk):
+    """Bound TU, AU and EU of top-k predictions over all spreads of the residual mass.
+
+    For each sample, the residual mass `r` contributes at least `-r log2(r)` (all mass
+    in one class) and at most `-r log2(r / (classes - k))` (uniform spread) to the
+    entropy, which bounds AU. TU is bounded from below by AU (concavity of entropy)
+    and from above by the entropy of the stored mean probabilities plus
+    `-r log2(r / classes)` for the mean residual `r` (subadditivity of `-p log p`).
+
+    Parameters
+    ----------
+    y_pred_topk : TopKPredictions
+        Sparse top-k predictions.
+
+    Returns
+    -------
+    unc_total : (ndarray, ndarray)
+        Lower and upper bound of total uncertainty.
+    unc_aleatoric : (ndarray, ndarray)
+        Lower and upper bound of aleatoric uncertainty.
+    unc_epistemic : (ndarray, ndarray)
+        Lower and upper bound of epistemic uncertainty.
+    """
+    if not isinstance(y_pred_topk, TopKPredictions):
+        raise ValueError("`y_pred_topk` should be a `TopKPredictions` instance")
+    dtype = _result_dtype(y_pred_topk.probs.dtype)
+    au_lower = np.mean(y_pred_topk.entropy(residual="lower"), axis=-1)
+    au_upper = np.mean(y_pred_topk.entropy(residual="uniform"), axis=-1)
+    # stored mass only: no residual shares
+    stored = TopKPredictions(y_pred_topk.indices, y_pred_topk.probs, y_pred_topk.n_classes,
+                             residual=np.zeros(y_pred_topk.residual.shape)).mean()
+    mean_residual = np.mean(y_pred_topk.residual, axis=-1, dtype=_ACC_DTYPE)
+    tu_upper = stored.entropy()[:, 0] - xlogy(mean_residual, mean_residual
+                                              / y_pred_topk.n_classes) / np.log(2)
+    tu_lower = au_lower
+    bounds = ((tu_lower, tu_upper), (au_lower, au_upper),
+              (np.maximum(tu_lower - au_upper, 0.), tu_upper - au_lower))
+    return tuple(tuple(bound.astype(dtype, copy=False) for bound in pair) for pair in bounds)
+
+
+def open_predictions(preds_path, mmap_mode="r"):
+    """Open array predictions as a lazy `Predictions` handle.
+
+    Parameters
+    ----------
+    preds_path : file-like object, string, or pathlib.Path
+        The file to read: an `.npy` array or an `.npz` file written by
+        `TopKPredictions.save`.
+    mmap_mode : {None, 'r+', 'r', 'w+', 'c'}, optional
+        Memory-map mode passed to `np.load` (ignored for `.npz` files).
+        Default: 'r'
+
+    Returns
+    -------
+    Predictions
+        Lazy handle on the predictions.
+    """
+    y_pred = np.load(preds_path, mmap_mode=mmap_mode)
+    if isinstance(y_pred, np.lib.npyio.NpzFile):
+        # sparse top-k predictions, see `TopKPredictions.save`
+        with y_pred:
+            y_pred = TopKPredictions(y_pred["indices"], y_pred["probs"],
+                                     int(y_pred["n_classes"]), residual=y_pred["residual"])
+    preds = Predictions(y_pred)
+    logging.info("Opened predictions with shape %s (mmap_mode=%s)", preds.shape, mmap_mode)
+    return preds
+
+
+def load_predictions(preds_path, mmap_mode=None):
     """Load array predictions and compute mean predicted probabilities for all classes \
         and predicted label.
 
     Parameters
     ----------
     preds_path : file-like object, string, or pathlib.Path
-        The file to read.
+        The file to read: an `.npy` array or an `.npz` file written by
+        `TopKPredictions.save`.
+    mmap_mode : {None, 'r+', 'r', 'w+', 'c'}, optional
+        Memory-map mode passed to `np.load`. 3D predictions are then returned as
+        memory-mapped array.
+        Default: None
 
     Returns
     -------
-    y_stack : ndarray
+    y_stack : ndarray or TopKPredictions
         3D array (`float` type) of shape `(observations, samples, classes)`.
-    y_mean : ndarray
-        2D array (`float` type) of shape `(observations, classes)`.
+    y_mean : ndarray or TopKPredictions
+        2D array (`float` type) of shape `(observations, classes)`, see `get_y_mean_label`.
     y_label : ndarray
         1D array (`float` type) of shape `(observations,)`.
     """
-    y_stack = np.load(preds_path)
-    if y_stack.ndim <= 2:
-        y_stack = get_pos_neg_probs(y_stack, axis=-1)
-    if y_stack.ndim <= 2:
-        y_stack = np.expand_dims(y_stack, axis=-2)
-
-    y_mean, y_label = get_y_mean_label(y_stack)
-    print(f"y_stack shape: \t{y_stack.shape}")
-    print(f"y_mean shape: \t{y_mean.shape}")
-    print(f"y_label shape: \t{y_label.shape}")
+    preds = open_predictions(preds_path, mmap_mode=mmap_mode)
+    y_stack, y_mean, y_label = preds.y_stack, preds.y_mean, preds.y_label
+    logging.info("y_stack shape: %s", y_stack.shape)
+    logging.info("y_mean shape: %s", y_mean.shape)
+    logging.info("y_label shape: %s", y_label.shape)
 
     return y_stack, y_mean, y_label
 
 
-def compute_uncertainty(y_pred_stack):
+def _iter_chunks(y_pred_stack, chunk_size):
+    """Yield consecutive chunks of observations.
+
+    Parameters
+    ----------
+    y_pred_stack : ndarray or iterable of ndarray
+        Array (possibly memory-mapped) to slice along the first axis, or iterable
+        that already yields chunks of observations.
+    chunk_size : int
+        Number of observations per chunk (only used for arrays).
+
+    Yields
+    ------
+    ndarray
+        Chunk of observations (not yet loaded into memory for memory-mapped arrays).
+    """
+    if hasattr(y_pred_stack, "shape"):
+        for start in range(0, y_pred_stack.shape[0], chunk_size):
+            yield y_pred_stack[start:start + chunk_size]
+    else:
+        yield from y_pred_stack
+
+
+def _chunk_size_from_budget(y_pred_stack, memory_budget, n_temporaries=4):
+    """Compute number of observations per chunk that fits a memory budget.
+
+    Parameters
+    ----------
+    y_pred_stack : ndarray
+        Array of shape `(observations, ...)`.
+    memory_budget : int
+        Memory budget in bytes.
+    n_temporaries : int, optional
+        Number of chunk-sized arrays alive at the same time.
+        Default: 4
+
+    Returns
+    -------
+    int
+        Number of observations per chunk (at least 1).
+    """
+    itemsize = _result_dtype(y_pred_stack.dtype).itemsize
+    bytes_obs = int(np.prod(y_pred_stack.shape[1:], dtype=np.int64)) * itemsize * n_temporaries
+    return max(int(memory_budget) // max(bytes_obs, 1), 1)
+
+
+def compute_uncertainty(y_pred_stack, chunk_size=None, memory_budget=None, out=None,
+                        n_jobs=None):
     """Calculate total uncertainty (TU), \
         and decompose into aleatoric uncertainty (AU) and epistemic uncertainty (EU).
 
+    If `chunk_size`, `memory_budget` or `out` is given, or `y_pred_stack` is an iterable
+    of chunks, the observations are processed in chunks. This allows memory-mapped
+    arrays (e.g. `np.load(..., mmap_mode="r")`) and generators that are larger than
+    memory. Chunks can be processed by a pool of `n_jobs` threads, as NumPy releases the
+    GIL in its kernels. The results are identical to those of the in-memory computation,
+    regardless of the chunking and number of threads.
+
     Parameters
     ----------
-    y_pred_stack : ndarray
-        3D array (`float` type) of shape `(observations, samples, classes)`.
+    y_pred_stack : ndarray, TopKPredictions or iterable of ndarray
+        3D array (`float` type) of shape `(observations, samples, classes)`, or iterable
+        yielding such arrays for consecutive chunks of observations. For
+        `TopKPredictions`, the residual mass is spread uniformly (see
+        `compute_uncertainty_bounds`).
+    chunk_size : int, optional
+        Number of observations per chunk. Ignored for iterables.
+        Default: None
+    memory_budget : int, optional
+        Approximate memory budget in bytes for the intermediate arrays of one chunk,
+        used to determine `chunk_size`. Ignored for iterables.
+        Default: None
+    out : tuple of ndarray, optional
+        Preallocated (possibly memory-mapped) 1D arrays of shape `(observations,)`
+        for `unc_total`, `unc_aleatoric` and `unc_epistemic`.
+        Default: None
+    n_jobs : int, optional
+        Number of threads used to process chunks, -1 means all CPUs.
+        Default: None
 
     Returns
     -------
@@ -134,11 +609,62 @@ def compute_uncertainty(y_pred_stack):
     unc_epistemic : ndarray
         1D ndarray (`float` type) containing epistemic uncertainty values.
     """
+    if isinstance(y_pred_stack, TopKPredictions):
+        dtype = _result_dtype(y_pred_stack.probs.dtype)
+        unc_total = y_pred_stack.mean().entropy()[:, 0].astype(dtype)
+        unc_aleatoric = np.mean(y_pred_stack.entropy(), axis=-1).astype(dtype)
+        return unc_total, unc_aleatoric, np.subtract(unc_total, unc_aleatoric)
+    is_array = hasattr(y_pred_stack, "shape")
+    n_workers = get_n_workers(n_jobs)
+    if is_array and y_pred_stack.dtype == np.float16 and chunk_size is None:
+        # float16 is upcast chunk by chunk instead of as a whole
+        memory_budget = _CHUNK_BYTES if memory_budget is None else memory_budget
+    if is_array and chunk_size is None and memory_budget is None and out is None \
+            and n_workers == 1:
+        return _compute_uncertainty_chunk(y_pred_stack)
+
+    if is_array:
+        if not y_pred_stack.ndim == 3:
+            raise ValueError(
+                f"`y_stack` should have 3 dimensions, has {y_pred_stack.ndim}")
+        if chunk_size is None:
+            budget = _CHUNK_BYTES if memory_budget is None else memory_budget
+            chunk_size = _chunk_size_from_budget(y_pred_stack, budget)
+        if out is None:
+            dtype = _result_dtype(y_pred_stack.dtype)
+            out = tuple(np.empty(y_pred_stack.shape[0], dtype=dtype) for _ in range(3))
+    if out is not None and len(out) != 3:
+        raise ValueError(f"`out` should contain 3 arrays, contains {len(out)}")
+
+    chunks_list = []
+    start = 0
+    for unc_chunk in map_ordered(_compute_uncertainty_chunk,
+                                 _iter_chunks(y_pred_stack, chunk_size), n_jobs=n_workers):
+        if out is None:
+            chunks_list.append(unc_chunk)
+        else:
+            stop = start + unc_chunk[0].shape[0]
+            for arr, unc in zip(out, unc_chunk):
+                arr[start:stop] = unc
+            start = stop
+    if out is None:
+        if not chunks_list:
+            raise ValueError("`y_pred_stack` should yield at least one chunk")
+        return tuple(np.concatenate(unc_list) for unc_list in zip(*chunks_list))
+    return tuple(out)
+
+
+def _compute_uncertainty_chunk(y_pred_stack):
+    """Calculate TU, AU and EU for an in-memory array, see `compute_uncertainty`."""
+    y_pred_stack = np.asarray(y_pred_stack)
+    dtype = _result_dtype(y_pred_stack.dtype)
+    y_pred_stack = y_pred_stack.astype(dtype, copy=False)
     # total: (observations, samples, classes) => (observations, classes) => (observations,)
-    unc_total = entropy(np.mean(y_pred_stack, axis=-2),
-                        base=2, axis=-1)
+    unc_total = entropy(np.mean(y_pred_stack, axis=-2, dtype=_ACC_DTYPE),
+                        base=2, axis=-1).astype(dtype, copy=False)
     # aleatoric: (observations, samples, classes) => (observations, samples) => (observations,)
-    unc_aleatoric = np.mean(entropy(y_pred_stack, base=2, axis=-1), axis=-1)
+    unc_aleatoric = np.mean(entropy(y_pred_stack, base=2, axis=-1), axis=-1,
+                            dtype=_ACC_DTYPE).astype(dtype, copy=False)
     # epistemic: (observations,)
     unc_epistemic = np.subtract(unc_total, unc_aleatoric)
     return unc_total, unc_aleatoric, unc_epistemic
@@ -149,7 +675,7 @@ def compute_confidence(y_pred_stack):
 
     Parameters
     ----------
-    y_pred_stack : ndarray
+    y_pred_stack : ndarray or TopKPredictions
         3D array (`float` type) of shape `(observations, samples, classes)`.
 
     Returns
@@ -157,6 +683,9 @@ def compute_confidence(y_pred_stack):
     conf : ndarray
         1D ndarray (`float` type) containing confidence values.
     """
+    if isinstance(y_pred_stack, TopKPredictions):
+        _, conf = _topk_label_conf(y_pred_stack.mean())
+        return conf.astype(_result_dtype(y_pred_stack.probs.dtype), copy=False)
     if not y_pred_stack.ndim == 3:
         raise ValueError(
             f"`y_stack` should have 3 dimensions, is rank {y_pred_stack.ndim}")
@@ -165,182 +694,771 @@ def compute_confidence(y_pred_stack):
     return conf
 
 
-def concat_get_idx(*y_true_subset):
-    """Concatenate true y labels and compute index vectors.
+def _pos_neg_probs_pair(y_pred_pos):
+    """Compute probabilities for negative and positive class, as in `get_pos_neg_probs`, \
+        without stacking them."""
+    # keep input precision (e.g. float16) instead of promoting with the Python float
+    dtype = _float_dtype(y_pred_pos.dtype)
+    y_pred_neg = np.subtract(dtype.type(1), y_pred_pos, dtype=dtype)
+    # probability vector should sum to 1
+    y_pred_pos = np.subtract(dtype.type(1), y_pred_neg, dtype=dtype)
+    return y_pred_neg, y_pred_pos
 
-    Returns
-    -------
-    y_true_all : ndarray
-        1D array (`float` type) containing all true labels.
-    id_arr : ndarray
-        1D array (`int` type) containing id numbers of each subset.
-    idx_tuple : sequence of ndarray
-        Sequence of 1D arrays (`int` type) containing indices of each subset.
+
+def _as_binary_2d(y_pred_pos):
+    """Return positive class probabilities as 2D array of shape `(observations, samples)`."""
+    if y_pred_pos.ndim == 1:
+        return y_pred_pos[:, np.newaxis]
+    if not y_pred_pos.ndim == 2:
+        raise ValueError(
+            f"`y_pred_pos` should have 1 or 2 dimensions, has {y_pred_pos.ndim}")
+    return y_pred_pos
+
+
+def _mean_samples(y_pred):
+    """Average 2D array of shape `(observations, samples)` over samples.
+
+    The samples are summed one at a time in `_ACC_DTYPE`, which is the summation order
+    of `np.mean(y_pred_stack, axis=-2)` on the 3D stack, such that results are identical.
     """
-    id_list = [[i]*len(x) for i, x in enumerate(y_true_subset)]
-    id_arr = np.concatenate(id_list)
+    n_samples = y_pred.shape[-1]
+    if n_samples == 0:
+        return np.mean(y_pred, axis=-1, dtype=_ACC_DTYPE)
+    y_sum = y_pred[:, 0].astype(_ACC_DTYPE)
+    for i in range(1, n_samples):
+        y_sum += y_pred[:, i]
+    return np.true_divide(y_sum, np.intp(n_samples), out=y_sum, casting="unsafe")
 
-    y_true_all = np.concatenate(y_true_subset, axis=0)
-    idx_list = [np.where(id_arr == i)[0] for i, x in enumerate(y_true_subset)]
-    idx_tuple = tuple(idx_list)
-    return y_true_all, id_arr, *idx_tuple
 
-# # pytest
-# y_a = np.arange(5)
-# y_b = np.arange(5)
-# y_c = np.arange(5)
-# y_true_all, idlist, idx_a, idx_b, idx_c, *_ = concat_get_idx(y_a, y_b, y_c)
-# print(y_true_all, idlist, idx_a, idx_b, idx_c)
+def _binary_entropy(y_pred_neg, y_pred_pos):
+    """Compute binary entropy in bits with the operations of `scipy.stats.entropy` \
+        on the stacked probabilities."""
+    y_sum = y_pred_neg + y_pred_pos
+    unc = entr(y_pred_neg / y_sum) + entr(y_pred_pos / y_sum)
+    unc /= math.log(2)
+    return unc
 
 
-def get_idx_correct(y_true_label, y_pred_label):
-    """Get indices of correct/incorrect predictions.
+def _binary_chunk(y_pred_pos):
+    """Compute TU and AU for a chunk of binary predictions."""
+    y_pred_neg, y_pred_pos = _pos_neg_probs_pair(np.asarray(y_pred_pos))
+    dtype = _result_dtype(y_pred_pos.dtype)
+    y_pred_neg, y_pred_pos = y_pred_neg.astype(dtype, copy=False), y_pred_pos.astype(dtype,
+                                                                                   copy=False)
+    y_mean_neg, y_mean_pos = _mean_samples(y_pred_neg), _mean_samples(y_pred_pos)
+    unc_total = _binary_entropy(y_mean_neg, y_mean_pos).astype(dtype, copy=False)
+    unc_aleatoric = np.mean(_binary_entropy(y_pred_neg, y_pred_pos), axis=-1,
+                            dtype=_ACC_DTYPE).astype(dtype, copy=False)
+    return unc_total, unc_aleatoric
+
+
+def _map_chunks(y_pred, func, n_temporaries, n_jobs=None):
+    """Apply `func` to chunks of observations and concatenate the results.
+
+    The chunk size is chosen such that `n_temporaries` chunk-sized arrays fit in
+    `_CHUNK_BYTES`.
+    """
+    chunk_size = _chunk_size_from_budget(y_pred, _CHUNK_BYTES, n_temporaries=n_temporaries)
+    results = list(map_ordered(func, _iter_chunks(y_pred, chunk_size), n_jobs=n_jobs))
+    if not results:
+        results = [func(y_pred)]
+    return tuple(np.concatenate(result) for result in zip(*results))
+
+
+def get_y_mean_label_binary(y_pred_pos, n_jobs=None):
+    """Compute mean predicted probabilities and predicted label for binary predictions.
+
+    Works directly on the probabilities for the positive class, without expanding them
+    to a 3D stack. The results are identical to those of `get_y_mean_label` on
+    `get_pos_neg_probs(y_pred_pos)`.
 
     Parameters
     ----------
-    y_true_label : ndarray
-        1D array (`float` type) containing true labels.
-    y_pred_label : ndarray
-        1D array (`float` type) containing predicted labels.
+    y_pred_pos : ndarray
+        2D array (`float` type) of shape `(observations, samples)` or 1D array of shape
+        `(observations,)` containing probabilities for the positive class.
+    n_jobs : int, optional
+        Number of threads used to process chunks of observations, -1 means all CPUs.
+        Default: None
 
     Returns
     -------
-    idx_correct : ndarray
-        1D array (`int` type) containing indices of correct predictions.
-    idx_incorrect : ndarray
-        1D array (`int` type) containing indices of incorrect predictions.
+    y_mean : ndarray
+        2D array (`float` type) of shape `(observations, 2)`.
+    y_label : ndarray
+        1D array (`float` type) of shape `(observations,)`.
     """
-    is_correct = np.equal(y_true_label, y_pred_label)
-    idx_correct = np.where(is_correct)[0]
-    idx_incorrect = np.where(~is_correct)[0]
-    return idx_correct, idx_incorrect
+    def mean_chunk(y_chunk):
+        y_pred_neg, y_pred_pos = _pos_neg_probs_pair(np.asarray(y_chunk))
+        return (np.stack([_mean_samples(y_pred_neg), _mean_samples(y_pred_pos)], axis=-1),)
+    # negative and positive probabilities
+    y_mean, = _map_chunks(_as_binary_2d(y_pred_pos), mean_chunk, n_temporaries=2,
+                          n_jobs=n_jobs)
+    y_label = np.argmax(y_mean, axis=-1)
+    return y_mean.astype(_result_dtype(y_pred_pos.dtype), copy=False), y_label
 
 
-def confusion_matrix_rej(y_true_label, y_pred_label, unc_ary, threshold, relative=True, show=False,
-                        seed=44):
-    """Compute confusion matrix with 2 axes: (i) correct/incorrect, (ii) rejected/non-rejected.
+def compute_uncertainty_binary(y_pred_pos, n_jobs=None):
+    """Calculate TU, AU and EU for binary predictions with closed-form binary entropy.
+
+    Works directly on the probabilities for the positive class, in chunks of
+    observations, without expanding them to a 3D stack. The results are identical to
+    those of `compute_uncertainty` on `get_pos_neg_probs(y_pred_pos)`.
 
     Parameters
     ----------
-    y_true_label : ndarray
-        1D array (`float` type) containing true labels.
-    y_pred_label : ndarray
-        1D array (`float` type) containing predicted labels.
-    unc_ary : ndarray
-        1D ndarray (`float` type) containing uncertainty values.
-    threshold : float
-        Rejection threshold.
-    relative : bool, optional
-        Use relative rejection, otherwise absolute rejection.
-        Default: True
-    show : bool, optional
-        Print confusion matrix to console.
-        Default: False
-    seed: int, optional
-        Seed value for random rejection.
-        Default 44
+    y_pred_pos : ndarray
+        2D array (`float` type) of shape `(observations, samples)` or 1D array of shape
+        `(observations,)` containing probabilities for the positive class.
+    n_jobs : int, optional
+        Number of threads used to process chunks of observations, -1 means all CPUs.
+        Default: None
 
     Returns
     -------
-    n_cor_rej : int
-        Number of correct observations that are rejected.
-    n_cor_nonrej : int
-        Number of correct observations that are not rejected.
-    n_incor_rej : int
-        Number of incorrect observations that are rejected.
-    n_incor_nonrej : int
-        Number of incorrect observations that are not rejected.
+    unc_total : ndarray
+        1D ndarray (`float` type) containing total uncertainty values.
+    unc_aleatoric : ndarray
+        1D ndarray (`float` type) containing aleatoric uncertainty values.
+    unc_epistemic : ndarray
+        1D ndarray (`float` type) containing epistemic uncertainty values.
     """
-    # axis 0: correct or incorrect
-    idx_correct, idx_incorrect = get_idx_correct(y_true_label, y_pred_label)
+    # negative and positive probabilities, entropies and their sum
+    unc_total, unc_aleatoric = _map_chunks(_as_binary_2d(y_pred_pos), _binary_chunk,
+                                           n_temporaries=6, n_jobs=n_jobs)
+    unc_epistemic = np.subtract(unc_total, unc_aleatoric)
+    return unc_total, unc_aleatoric, unc_epistemic
 
-    # axis 1: rejected or non-rejected
-    if relative:
-        # relative rejection
-        # get indices of lowest uncertainties
-        n_preds = y_true_label.shape[0]
-        n_preds_nonrej = int((1-threshold)*n_preds)
-        # sort by unc_ary, then by random numbers random_draws
-        # -> if values equal e.g. 1.0 -> rejected randomly
-        np.random.seed(seed=seed)
-        random_draws = np.random.random(unc_ary.size)
-        idx = np.lexsort((random_draws, unc_ary))
-        idx_nonrej = idx[:n_preds_nonrej]
-        idx_rej = idx[n_preds_nonrej:]
-    else:
-        # absolute rejection
-        y_reject = np.where(unc_ary >= threshold, 1, 0)
-        idx_rej = np.where(y_reject == 1)[0]
-        idx_nonrej = np.where(y_reject == 0)[0]
-
-    # intersections
-    idx_cor_rej = np.intersect1d(idx_correct, idx_rej)
-    idx_cor_nonrej = np.intersect1d(idx_correct, idx_nonrej)
-    idx_incor_rej = np.intersect1d(idx_incorrect, idx_rej)
-    idx_incor_nonrej = np.intersect1d(idx_incorrect, idx_nonrej)
-    n_cor_rej = idx_cor_rej.shape[0]
-    n_cor_nonrej = idx_cor_nonrej.shape[0]
-    n_incor_rej = idx_incor_rej.shape[0]
-    n_incor_nonrej = idx_incor_nonrej.shape[0]
-    if show:
-        print(tabulate([["", "Non-rejected", "Rejected"], ["Correct", n_cor_nonrej, n_cor_rej],
-                        ["Incorrect", n_incor_nonrej, n_incor_rej]],
-                       headers="firstrow"))
-    return n_cor_rej, n_cor_nonrej, n_incor_rej, n_incor_nonrej
 
+def compute_confidence_binary(y_pred_pos, n_jobs=None):
+    """Compute confidence for binary predictions.
 
-def compute_metrics_rej(threshold, y_true_label, y_pred_label, unc_ary, idx=None, relative=True,
-                        show=True, seed=44):
-    """Compute 3 rejection metrics using relative or absolute threshold:
-    - non-rejeced accuracy (NRA)
-    - classification quality (CQ)
-    - rejection quality (RQ)
+    The results are identical to those of `compute_confidence` on
+    `get_pos_neg_probs(y_pred_pos)`.
 
     Parameters
     ----------
-    threshold : float
-        Rejection threshold.
-    y_true_label : ndarray
-        1D array (`float` type) containing true labels.
-    y_pred_label : ndarray
-        1D array (`float` type) containing predicted labels.
-    unc_ary : ndarray
-        1D ndarray (`float` type) containing uncertainty values.
-    idx : ndarray, optional
-        1D array (`int` type) containing indices of test subset.
+    y_pred_pos : ndarray
+        2D array (`float` type) of shape `(observations, samples)` or 1D array of shape
+        `(observations,)` containing probabilities for the positive class.
+    n_jobs : int, optional
+        Number of threads used to process chunks of observations, -1 means all CPUs.
         Default: None
-    relative : bool, optional
-        Use relative rejection, otherwise absolute rejection.
-        Default: True
-    show : bool, optional
-        Print confusion matrix to console.
-        Default: True
-    seed: int, optional
-        Seed value for random rejection.
-        Default 44
 
     Returns
     -------
-    nonrej_acc : float
-        Non-rejeced accuracy (NRA).
-    class_quality : float
-        Classification quality (CQ).
-    rej_quality : float
-        Rejection quality (RQ).
-
-    Notes
-    -----
-    - rejection quality is undefined when `n_cor_rej=0`
-        - if any observation is rejected: RQ = positive infinite
-        - if no sample is rejected: RQ = 1
-        - see: `Condessa et al. (2017) <https://doi.org/10.1016/j.patcog.2016.10.011>`_
+    conf : ndarray
+        1D ndarray (`float` type) containing confidence values.
     """
-    if idx is not None:
-        y_true_label, y_pred_label, unc_ary, *_ = subset_ary(idx, y_true_label, y_pred_label, unc_ary)
-    n_cor_rej, n_cor_nonrej, n_incor_rej, n_incor_nonrej = confusion_matrix_rej(
-        y_true_label, y_pred_label, unc_ary, threshold=threshold, show=show, relative=relative,
-        seed=seed)
-
+    y_pred_mean, _ = get_y_mean_label_binary(y_pred_pos, n_jobs=n_jobs)
+    conf = np.max(y_pred_mean, axis=-1)
+    return conf
+
+
+def _softmax_parts(logits):
+    """Compute shifted logits `z = logits - max(logits)`, `exp(z)` and `sum(exp(z))`."""
+    logits = np.asarray(logits)
+    dtype = _result_dtype(logits.dtype)
+    shifted = np.subtract(logits, np.max(logits, axis=-1, keepdims=True), dtype=dtype)
+    exp_shifted = np.exp(shifted)
+    sum_exp = np.sum(exp_shifted, axis=-1, dtype=_ACC_DTYPE)
+    return shifted, exp_shifted, sum_exp
+
+
+def _softmax_mean(exp_shifted, sum_exp):
+    """Average softmax probabilities over samples, overwriting `exp_shifted`."""
+    np.divide(exp_shifted, sum_exp[..., np.newaxis].astype(exp_shifted.dtype),
+              out=exp_shifted)
+    return np.mean(exp_shifted, axis=-2, dtype=_ACC_DTYPE)
+
+
+def _logits_mean_chunk(logits):
+    """Compute mean probabilities for a chunk of logits."""
+    _, exp_shifted, sum_exp = _softmax_parts(logits)
+    return (_softmax_mean(exp_shifted, sum_exp).astype(exp_shifted.dtype, copy=False),)
+
+
+def _logits_chunk(logits):
+    """Compute TU and AU for a chunk of logits.
+
+    The per-sample entropy follows from the log-sum-exp of the shifted logits
+    `z = logits - max(logits)`: `H = log(sum(exp(z))) - sum(exp(z) * z) / sum(exp(z))`,
+    such that no log-probabilities are computed and underflowing probabilities
+    contribute exactly zero.
+    """
+    shifted, exp_shifted, sum_exp = _softmax_parts(logits)
+    dtype = shifted.dtype
+    # avoid -inf * 0 for masked classes (logits of -inf)
+    np.maximum(shifted, np.finfo(dtype).min, out=shifted)
+    shifted *= exp_shifted
+    unc_sample = np.log(sum_exp) - np.sum(shifted, axis=-1, dtype=_ACC_DTYPE) / sum_exp
+    # entropy is non-negative, up to rounding
+    np.maximum(unc_sample, 0., out=unc_sample)
+    y_mean = _softmax_mean(exp_shifted, sum_exp)
+    unc_total = -np.sum(xlogy(y_mean, y_mean), axis=-1) / np.log(2)
+    unc_aleatoric = np.mean(unc_sample, axis=-1) / np.log(2)
+    return unc_total.astype(dtype, copy=False), unc_aleatoric.astype(dtype, copy=False)
+
+
+def _map_logits(logits, func, n_jobs=None):
+    """Apply `func` to chunks of a 3D logit stack, with room for the shifted logits and
+    their exponentials of `_softmax_parts` per chunk."""
+    if not logits.ndim == 3:
+        raise ValueError(
+            f"`logits` should have 3 dimensions, has {logits.ndim}")
+    return _map_chunks(logits, func, n_temporaries=2, n_jobs=n_jobs)
+
+
+def get_y_mean_label_logits(logits, n_jobs=None):
+    """Compute mean predicted probabilities for all classes and predicted label from logits.
+
+    The softmax is applied chunk by chunk, such that the full probability stack is never
+    materialized.
+
+    Parameters
+    ----------
+    logits : ndarray
+        3D array (`float` type) of shape `(observations, samples, classes)` containing
+        unnormalized log-probabilities.
+    n_jobs : int, optional
+        Number of threads used to process chunks of observations, -1 means all CPUs.
+        Default: None
+
+    Returns
+    -------
+    y_mean : ndarray
+        2D array (`float` type) of shape `(observations, classes)`.
+    y_label : ndarray
+        1D array (`float` type) of shape `(observations,)`.
+    """
+    y_mean, = _map_logits(logits, _logits_mean_chunk, n_jobs=n_jobs)
+    y_label = np.argmax(y_mean, axis=-1)
+    return y_mean, y_label
+
+
+def compute_uncertainty_logits(logits, n_jobs=None):
+    """Calculate TU, AU and EU from logits with a fused log-softmax entropy.
+
+    The per-sample entropies are computed directly from the logits with a numerically
+    stable log-sum-exp, in chunks of observations. This avoids materializing the
+    probability stack and the underflow of `log(p)` for large numbers of classes.
+    The results equal those of `compute_uncertainty` on the softmax probabilities,
+    up to rounding.
+
+    Parameters
+    ----------
+    logits : ndarray
+        3D array (`float` type) of shape `(observations, samples, classes)` containing
+        unnormalized log-probabilities.
+    n_jobs : int, optional
+        Number of threads used to process chunks of observations, -1 means all CPUs.
+        Default: None
+
+    Returns
+    -------
+    unc_total : ndarray
+        1D ndarray (`float` type) containing total uncertainty values.
+    unc_aleatoric : ndarray
+        1D ndarray (`float` type) containing aleatoric uncertainty values.
+    unc_epistemic : ndarray
+        1D ndarray (`float` type) containing epistemic uncertainty values.
+    """
+    unc_total, unc_aleatoric = _map_logits(logits, _logits_chunk, n_jobs=n_jobs)
+    unc_epistemic = np.subtract(unc_total, unc_aleatoric)
+    return unc_total, unc_aleatoric, unc_epistemic
+
+
+def compute_confidence_logits(logits, n_jobs=None):
+    """Compute confidence from logits.
+
+    Parameters
+    ----------
+    logits : ndarray
+        3D array (`float` type) of shape `(observations, samples, classes)` containing
+        unnormalized log-probabilities.
+    n_jobs : int, optional
+        Number of threads used to process chunks of observations, -1 means all CPUs.
+        Default: None
+
+    Returns
+    -------
+    conf : ndarray
+        1D ndarray (`float` type) containing confidence values.
+    """
+    y_pred_mean, _ = get_y_mean_label_logits(logits, n_jobs=n_jobs)
+    conf = np.max(y_pred_mean, axis=-1)
+    return conf
+
+
+def _uncertainty_chunk(y_chunk, unc_total, unc_aleatoric, conf, y_label, buffer):
+    """Compute TU, AU, confidence and predicted label for a chunk of observations.
+
+    Results are written into the (views of the) output arrays. `buffer` has the shape
+    of `y_chunk` and holds the elementwise entropy terms.
+    """
+    y_mean = np.mean(y_chunk, axis=-2, dtype=_ACC_DTYPE)
+    # entropy in bits: -sum(p * log2(p)) with 0 * log(0) = 0
+    unc_total[...] = -np.sum(xlogy(y_mean, y_mean), axis=-1) / np.log(2)
+    # elementwise terms in the precision of `buffer`, summed in `_ACC_DTYPE`
+    xlogy(y_chunk, y_chunk, out=buffer)
+    unc_aleatoric[...] = -np.mean(np.sum(buffer, axis=-1, dtype=_ACC_DTYPE), axis=-1) / np.log(2)
+    np.max(y_mean, axis=-1, out=conf)
+    np.argmax(y_mean, axis=-1, out=y_label)
+
+
+def _all_uncertainties_range(y_pred_stack, out, start, stop, chunk_size):
+    """Compute TU, AU, confidence and predicted label for observations `start:stop`, \
+        chunk by chunk with a single entropy buffer."""
+    unc_total, unc_aleatoric, _, conf, y_label = out
+    buffer = np.empty((min(chunk_size, stop - start),) + y_pred_stack.shape[1:],
+                      dtype=unc_total.dtype)
+    for chunk_start in range(start, stop, chunk_size):
+        chunk_stop = min(chunk_start + chunk_size, stop)
+        chunk = slice(chunk_start, chunk_stop)
+        _uncertainty_chunk(y_pred_stack[chunk], unc_total[chunk], unc_aleatoric[chunk],
+                           conf[chunk], y_label[chunk], buffer[:chunk_stop - chunk_start])
+
+
+def compute_all_uncertainties(y_pred_stack, out=None, n_jobs=None):
+    """Compute total, aleatoric and epistemic uncertainty, confidence and predicted label \
+        in a single pass.
+
+    The mean over samples is computed only once and entropies are computed with `xlogy`
+    on chunks of observations, such that intermediate arrays stay small compared to
+    `y_pred_stack`. Probability vectors are assumed to sum to 1 (unlike
+    `scipy.stats.entropy`, which renormalizes them).
+
+    Parameters
+    ----------
+    y_pred_stack : ndarray
+        3D array (`float` type) of shape `(observations, samples, classes)`.
+    out : tuple of ndarray, optional
+        Preallocated 1D arrays of shape `(observations,)` for `unc_total`,
+        `unc_aleatoric`, `unc_epistemic`, `conf` and `y_label`. Entries can be None.
+        Default: None
+    n_jobs : int, optional
+        Number of threads, each processing a contiguous block of observations.
+        -1 means all CPUs.
+        Default: None
+
+    Returns
+    -------
+    unc_total : ndarray
+        1D ndarray (`float` type) containing total uncertainty values.
+    unc_aleatoric : ndarray
+        1D ndarray (`float` type) containing aleatoric uncertainty values.
+    unc_epistemic : ndarray
+        1D ndarray (`float` type) containing epistemic uncertainty values.
+    conf : ndarray
+        1D ndarray (`float` type) containing confidence values.
+    y_label : ndarray
+        1D array (`int` type) of shape `(observations,)`.
+    """
+    if not y_pred_stack.ndim == 3:
+        raise ValueError(
+            f"`y_stack` should have 3 dimensions, has {y_pred_stack.ndim}")
+    n_obs = y_pred_stack.shape[0]
+    dtype = _result_dtype(y_pred_stack.dtype)
+    if out is None:
+        out = (None,) * 5
+    if len(out) != 5:
+        raise ValueError(f"`out` should contain 5 arrays, contains {len(out)}")
+    dtypes = (dtype, dtype, dtype, dtype, np.intp)
+    out = tuple(np.empty(n_obs, dtype=dt) if arr is None else arr
+                for arr, dt in zip(out, dtypes))
+    unc_total, unc_aleatoric, unc_epistemic, conf, y_label = out
+
+    chunk_size = _chunk_size_from_budget(y_pred_stack, _CHUNK_BYTES, n_temporaries=1)
+    bounds = np.linspace(0, n_obs, get_n_workers(n_jobs) + 1).astype(int)
+    for _ in map_ordered(lambda i: _all_uncertainties_range(y_pred_stack, out, bounds[i],
+                                                            bounds[i + 1], chunk_size),
+                         range(len(bounds) - 1), n_jobs=n_jobs):
+        pass
+    np.subtract(unc_total, unc_aleatoric, out=unc_epistemic)
+    return unc_total, unc_aleatoric, unc_epistemic, conf, y_label
+
+
+def _iter_model_stacks(y_pred_models):
+    """Yield the 3D prediction stack of each model, opening files as memory-mapped arrays."""
+    for y_pred in y_pred_models:
+        if isinstance(y_pred, (str, os.PathLike)):
+            y_pred = open_predictions(y_pred, mmap_mode="r").y_stack
+        yield y_pred
+
+
+def compute_all_uncertainties_models(y_pred_models, n_jobs=None):
+    """Compute uncertainties, confidence and predicted label of many models at once.
+
+    Each model is processed with `compute_all_uncertainties`, writing directly into
+    rows of the preallocated 2D outputs. Files are memory-mapped, such that only one
+    chunk of predictions is held in memory at any time.
+
+    Parameters
+    ----------
+    y_pred_models : ndarray or sequence
+        4D array (`float` type) of shape `(models, observations, samples, classes)`,
+        or sequence of 3D arrays or paths to `.npy` files with such arrays.
+    n_jobs : int, optional
+        Number of threads used for each model, see `compute_all_uncertainties`.
+        Default: None
+
+    Returns
+    -------
+    unc_total : ndarray
+        2D ndarray (`float` type) of shape `(models, observations)`.
+    unc_aleatoric : ndarray
+        2D ndarray (`float` type) of shape `(models, observations)`.
+    unc_epistemic : ndarray
+        2D ndarray (`float` type) of shape `(models, observations)`.
+    conf : ndarray
+        2D ndarray (`float` type) of shape `(models, observations)`.
+    y_label : ndarray
+        2D array (`int` type) of shape `(models, observations)`.
+    """
+    if isinstance(y_pred_models, np.ndarray) and not y_pred_models.ndim == 4:
+        raise ValueError(
+            f"`y_pred_models` should have 4 dimensions, has {y_pred_models.ndim}")
+    n_models = len(y_pred_models)
+    out = None
+    for i, y_pred_stack in enumerate(_iter_model_stacks(y_pred_models)):
+        if out is None:
+            dtype = _result_dtype(y_pred_stack.dtype)
+            shape = (n_models, y_pred_stack.shape[0])
+            out = tuple(np.empty(shape, dtype=dt)
+                        for dt in (dtype, dtype, dtype, dtype, np.intp))
+        if y_pred_stack.shape[0] != out[0].shape[1]:
+            raise ValueError(
+                f"All models should have {out[0].shape[1]} observations, "
+                f"model {i} has {y_pred_stack.shape[0]}")
+        compute_all_uncertainties(y_pred_stack, out=tuple(arr[i] for arr in out),
+                                  n_jobs=n_jobs)
+    if out is None:
+        raise ValueError("`y_pred_models` should contain at least 1 model")
+    return out
+
+
+class UncertaintyAccumulator:
+    """Accumulate predictions one sample at a time and compute uncertainties.
+
+    Only running sums of the predicted probabilities and of the per-sample entropies
+    are kept, such that the 3D array of shape `(observations, samples, classes)` is
+    never materialized. The running sums are kept in float64, also for float16 or
+    float32 predictions. The results equal those of `get_y_mean_label`,
+    `compute_uncertainty` and `compute_confidence` on the stacked samples.
+
+    Examples
+    --------
+    >>> acc = UncertaintyAccumulator()
+    >>> for _ in range(n_samples):
+    ...     acc.update(model(x))  # shape `(observations, classes)`
+    >>> unc_total, unc_aleatoric, unc_epistemic = acc.compute_uncertainty()
+    """
+    def __init__(self):
+        self.n_samples = 0
+        self.sum_probs = None
+        self.sum_entropy = None
+        self.dtype = None
+
+    def update(self, y_pred):
+        """Add one sample (or ensemble member) of predictions.
+
+        Parameters
+        ----------
+        y_pred : ndarray
+            2D array (`float` type) of shape `(observations, classes)`, or 3D array of
+            shape `(observations, samples, classes)` containing several samples.
+        """
+        if y_pred.ndim == 2:
+            y_pred = np.expand_dims(y_pred, axis=-2)
+        if not y_pred.ndim == 3:
+            raise ValueError(
+                f"`y_pred` should have 2 or 3 dimensions, has {y_pred.ndim}")
+        if self.sum_probs is None:
+            self.sum_probs = np.zeros(y_pred.shape[:1] + y_pred.shape[2:], dtype=_ACC_DTYPE)
+            self.sum_entropy = np.zeros(y_pred.shape[0], dtype=_ACC_DTYPE)
+            self.dtype = _result_dtype(y_pred.dtype)
+        elif y_pred.shape[:1] + y_pred.shape[2:] != self.sum_probs.shape:
+            raise ValueError(
+                f"`y_pred` should have shape {self.sum_probs.shape}, has {y_pred.shape}")
+        y_pred = y_pred.astype(self.dtype, copy=False)
+        self.sum_probs += np.sum(y_pred, axis=-2, dtype=_ACC_DTYPE)
+        self.sum_entropy += np.sum(entropy(y_pred, base=2, axis=-1), axis=-1, dtype=_ACC_DTYPE)
+        self.n_samples += y_pred.shape[-2]
+
+    def _check_samples(self):
+        if self.n_samples == 0:
+            raise ValueError("No samples have been added, call `update` first.")
+
+    def get_y_mean_label(self):
+        """Compute mean predicted probabilities for all classes and predicted label.
+
+        Returns
+        -------
+        y_mean : ndarray
+            2D array (`float` type) of shape `(observations, classes)`.
+        y_label : ndarray
+            1D array (`float` type) of shape `(observations,)`.
+        """
+        self._check_samples()
+        y_mean = self.sum_probs / self.n_samples
+        y_label = np.argmax(y_mean, axis=-1)
+        return y_mean.astype(self.dtype, copy=False), y_label
+
+    def compute_uncertainty(self):
+        """Calculate total uncertainty (TU), \
+            and decompose into aleatoric uncertainty (AU) and epistemic uncertainty (EU).
+
+        Returns
+        -------
+        unc_total : ndarray
+            1D ndarray (`float` type) containing total uncertainty values.
+        unc_aleatoric : ndarray
+            1D ndarray (`float` type) containing aleatoric uncertainty values.
+        unc_epistemic : ndarray
+            1D ndarray (`float` type) containing epistemic uncertainty values.
+        """
+        self._check_samples()
+        unc_total = entropy(self.sum_probs / self.n_samples, base=2,
+                            axis=-1).astype(self.dtype, copy=False)
+        unc_aleatoric = (self.sum_entropy / self.n_samples).astype(self.dtype, copy=False)
+        unc_epistemic = np.subtract(unc_total, unc_aleatoric)
+        return unc_total, unc_aleatoric, unc_epistemic
+
+    def compute_confidence(self):
+        """Compute confidence.
+
+        Returns
+        -------
+        conf : ndarray
+            1D ndarray (`float` type) containing confidence values.
+        """
+        y_mean, _ = self.get_y_mean_label()
+        return np.max(y_mean, axis=-1)
+
+
+def concat_get_idx(*y_true_subset, as_slice=False):
+    """Concatenate true y labels and compute index vectors.
+
+    Subsets are stored contiguously, so each subset can also be described by a
+    `slice`. Indexing with a slice (e.g. in `subset_ary`) returns NumPy views
+    instead of copies, which avoids duplicating large prediction stacks.
+
+    Parameters
+    ----------
+    *y_true_subset : ndarray
+        1D arrays containing true labels of each subset.
+    as_slice : bool, optional
+        Whether to return the subsets as `slice` objects instead of index arrays.
+        Default: False
+
+    Returns
+    -------
+    y_true_all : ndarray
+        1D array (`float` type) containing all true labels.
+    id_arr : ndarray
+        1D array (`int` type) containing id numbers of each subset.
+    idx_tuple : sequence of ndarray or slice
+        Sequence of 1D arrays (`int` type) containing indices of each subset,
+        or sequence of slices if `as_slice` is True.
+    """
+    lengths = np.array([len(x) for x in y_true_subset], dtype=np.int64)
+    id_arr = np.repeat(np.arange(len(y_true_subset)), lengths)
+    bounds = np.concatenate(([0], np.cumsum(lengths)))
+
+    y_true_all = np.concatenate(y_true_subset, axis=0)
+    if as_slice:
+        idx_tuple = tuple(slice(int(start), int(stop))
+                          for start, stop in zip(bounds[:-1], bounds[1:]))
+    else:
+        idx_tuple = tuple(np.arange(start, stop) for start, stop in zip(bounds[:-1], bounds[1:]))
+    return y_true_all, id_arr, *idx_tuple
+
+# # pytest
+# y_a = np.arange(5)
+# y_b = np.arange(5)
+# y_c = np.arange(5)
+# y_true_all, idlist, idx_a, idx_b, idx_c, *_ = concat_get_idx(y_a, y_b, y_c)
+# print(y_true_all, idlist, idx_a, idx_b, idx_c)
+
+
+def get_idx_correct(y_true_label, y_pred_label):
+    """Get indices of correct/incorrect predictions.
+
+    Parameters
+    ----------
+    y_true_label : ndarray
+        1D array (`float` type) containing true labels.
+    y_pred_label : ndarray
+        1D array (`float` type) containing predicted labels.
+
+    Returns
+    -------
+    idx_correct : ndarray
+        1D array (`int` type) containing indices of correct predictions.
+    idx_incorrect : ndarray
+        1D array (`int` type) containing indices of incorrect predictions.
+    """
+    is_correct = np.equal(y_true_label, y_pred_label)
+    idx_correct = np.where(is_correct)[0]
+    idx_incorrect = np.where(~is_correct)[0]
+    return idx_correct, idx_incorrect
+
+
+def confusion_matrix_rej(y_true_label, y_pred_label, unc_ary, threshold, relative=True, show=False,
+                        seed=44, ties="random"):
+    """Compute confusion matrix with 2 axes: (i) correct/incorrect, (ii) rejected/non-rejected.
+
+    The counts are obtained from boolean masks with `np.count_nonzero`, without
+    allocating index arrays. A 1D array of thresholds is evaluated in a single call.
+
+    Parameters
+    ----------
+    y_true_label : ndarray
+        1D array (`float` type) containing true labels.
+    y_pred_label : ndarray
+        1D array (`float` type) containing predicted labels.
+    unc_ary : ndarray
+        1D ndarray (`float` type) containing uncertainty values.
+    threshold : float or ndarray
+        Rejection threshold, or 1D array (`float` type) of rejection thresholds.
+    relative : bool, optional
+        Use relative rejection, otherwise absolute rejection.
+        Default: True
+    show : bool, optional
+        Print confusion matrix to console.
+        Default: False
+    seed: int, optional
+        Seed value for random rejection.
+        Default 44
+    ties : {'random', 'expected', 'hash'}, optional
+        Handling of tied uncertainties for relative rejection: 'random' breaks ties with
+        uniform draws seeded by `seed`, 'expected' returns the expected counts over all
+        random tie-breaks (non-integer if a tie group is split), 'hash' breaks ties with
+        a deterministic hash of the observation index and `seed`.
+        Default: 'random'
+
+    Returns
+    -------
+    n_cor_rej : int or ndarray
+        Number of correct observations that are rejected.
+    n_cor_nonrej : int or ndarray
+        Number of correct observations that are not rejected.
+    n_incor_rej : int or ndarray
+        Number of incorrect observations that are rejected.
+    n_incor_nonrej : int or ndarray
+        Number of incorrect observations that are not rejected.
+    """
+    # axis 0: correct or incorrect
+    is_correct = np.equal(y_true_label, y_pred_label)
+    n_preds = is_correct.shape[0]
+    n_cor = int(np.count_nonzero(is_correct))
+    batched = np.ndim(threshold) > 0
+
+    # axis 1: rejected or non-rejected
+    if relative:
+        # relative rejection
+        # non-rejected observations are those with lowest uncertainties
+        n_nonrej = _n_nonrej_relative(threshold, n_preds)
+        is_correct_sort, unc_sort = _sort_correct(y_true_label, y_pred_label, unc_ary,
+                                                  seed=seed, ties=ties)
+        if batched or ties == "expected":
+            cum_correct = np.zeros(n_preds + 1, dtype=np.int64)
+            np.cumsum(is_correct_sort, out=cum_correct[1:])
+            if ties == "expected":
+                n_cor_nonrej = _expected_n_cor_nonrej(unc_sort, cum_correct, n_nonrej)
+            else:
+                n_cor_nonrej = cum_correct[n_nonrej]
+            if not batched:
+                n_nonrej, n_cor_nonrej = int(n_nonrej), n_cor_nonrej.item()
+        else:
+            n_nonrej = int(n_nonrej)
+            n_cor_nonrej = int(np.count_nonzero(is_correct_sort[:n_nonrej]))
+        n_cor_rej = n_cor - n_cor_nonrej
+        n_incor_nonrej = n_nonrej - n_cor_nonrej
+    else:
+        # absolute rejection
+        threshold_ary = np.atleast_1d(threshold)
+        n_rej = np.zeros(threshold_ary.shape, dtype=np.int64)
+        n_cor_rej = np.zeros(threshold_ary.shape, dtype=np.int64)
+        # reuse a single mask buffer for all thresholds
+        is_rej = np.empty(n_preds, dtype=bool)
+        for i, thr in enumerate(threshold_ary):
+            np.greater_equal(unc_ary, thr, out=is_rej)
+            n_rej[i] = np.count_nonzero(is_rej)
+            n_cor_rej[i] = np.count_nonzero(np.logical_and(is_rej, is_correct, out=is_rej))
+        if not batched:
+            n_rej, n_cor_rej = int(n_rej[0]), int(n_cor_rej[0])
+        n_cor_nonrej = n_cor - n_cor_rej
+        n_incor_nonrej = (n_preds - n_rej) - n_cor_nonrej
+    n_incor_rej = (n_preds - n_cor) - n_incor_nonrej
+
+    if show and batched:
+        print(tabulate(np.column_stack([threshold, n_cor_nonrej, n_cor_rej, n_incor_nonrej,
+                                        n_incor_rej]),
+                       headers=["Threshold", "Correct non-rejected", "Correct rejected",
+                                "Incorrect non-rejected", "Incorrect rejected"]))
+    elif show:
+        print(tabulate([["", "Non-rejected", "Rejected"], ["Correct", n_cor_nonrej, n_cor_rej],
+                        ["Incorrect", n_incor_nonrej, n_incor_rej]],
+                       headers="firstrow"))
+    return n_cor_rej, n_cor_nonrej, n_incor_rej, n_incor_nonrej
+
+
+def compute_metrics_rej(threshold, y_true_label, y_pred_label, unc_ary, idx=None, relative=True,
+                        show=True, seed=44, ties="random"):
+    """Compute 3 rejection metrics using relative or absolute threshold:
+    - non-rejeced accuracy (NRA)
+    - classification quality (CQ)
+    - rejection quality (RQ)
+
+    Parameters
+    ----------
+    threshold : float
+        Rejection threshold.
+    y_true_label : ndarray
+        1D array (`float` type) containing true labels.
+    y_pred_label : ndarray
+        1D array (`float` type) containing predicted labels.
+    unc_ary : ndarray
+        1D ndarray (`float` type) containing uncertainty values.
+    idx : ndarray, optional
+        1D array (`int` type) containing indices of test subset.
+        Default: None
+    relative : bool, optional
+        Use relative rejection, otherwise absolute rejection.
+        Default: True
+    show : bool, optional
+        Print confusion matrix to console.
+        Default: True
+    seed: int, optional
+        Seed value for random rejection.
+        Default 44
+    ties : {'random', 'expected', 'hash'}, optional
+        Handling of tied uncertainties for relative rejection, see `confusion_matrix_rej`.
+        Default: 'random'
+
+    Returns
+    -------
+    nonrej_acc : float
+        Non-rejeced accuracy (NRA).
+    class_quality : float
+        Classification quality (CQ).
+    rej_quality : float
+        Rejection quality (RQ).
+
+    Notes
+    -----
+    - rejection quality is undefined when `n_cor_rej=0`
+        - if any observation is rejected: RQ = positive infinite
+        - if no sample is rejected: RQ = 1
+        - see: `Condessa et al. (2017) <https://doi.org/10.1016/j.patcog.2016.10.011>`_
+    """
+    if idx is not None:
+        y_true_label, y_pred_label, unc_ary, *_ = subset_ary(idx, y_true_label, y_pred_label, unc_ary)
+    n_cor_rej, n_cor_nonrej, n_incor_rej, n_incor_nonrej = confusion_matrix_rej(
+        y_true_label, y_pred_label, unc_ary, threshold=threshold, show=show, relative=relative,
+        seed=seed, ties=ties)
+
     # 3 metrics
     try:
         nonrej_acc = n_cor_nonrej / (n_incor_nonrej + n_cor_nonrej)
@@ -358,28 +1476,2448 @@ def compute_metrics_rej(threshold, y_true_label, y_pred_label, unc_ary, idx=None
         if (n_incor_rej + n_cor_rej) > 0:
             rej_quality = np.inf
         else:
-            rej_quality = 1.0
-    if show:
-        data = [[nonrej_acc, class_quality, rej_quality]]
-        print("\n"+tabulate(data, headers=["Non-rejected accuracy", "Classification quality",
-                                           "Rejection quality"], floatfmt=".4f"))
-    return nonrej_acc, class_quality, rej_quality
+            rej_quality = 1.0
+    if show:
+        data = [[nonrej_acc, class_quality, rej_quality]]
+        print("\n"+tabulate(data, headers=["Non-rejected accuracy", "Classification quality",
+                                           "Rejection quality"], floatfmt=".4f"))
+    return nonrej_acc, class_quality, rej_quality
+
+
+def _argsort_rej(unc_ary, seed=44, n_jobs=None, ties="random"):
+    """Sort observations by increasing uncertainty, breaking ties as specified.
+
+    Parameters
+    ----------
+    unc_ary : ndarray
+        1D ndarray (`float` type) containing uncertainty values.
+    seed: int, optional
+        Seed value for random rejection.
+        Default 44
+    n_jobs : int, optional
+        Number of threads, see `_argsort_partitioned`.
+        Default: None
+    ties : {'random', 'expected', 'hash'}, optional
+        Tie-breaking key, see `confusion_matrix_rej`. For 'expected', the order of
+        ties is arbitrary.
+        Default: 'random'
+
+    Returns
+    -------
+    ndarray
+        1D array (`int` type) containing indices that sort `unc_ary`.
+    """
+    if ties not in _TIES:
+        raise ValueError("Invalid tie handling. Expected one of: %s" % _TIES)
+    if ties == "expected":
+        return _argsort_abs(unc_ary, n_jobs=n_jobs)
+    # sort by unc_ary, then by tie-breaking key
+    # -> if values equal e.g. 1.0 -> rejected randomly
+    if ties == "random":
+        # same draws as `np.random.seed(seed)`, without touching the global RNG state
+        tie_keys = np.random.RandomState(seed=seed).random_sample(unc_ary.size)
+    else:
+        tie_keys = _hash_index(unc_ary.size, seed=seed)
+
+    def argsort_func(idx):
+        if idx is None:
+            return np.lexsort((tie_keys, unc_ary))
+        return idx[np.lexsort((tie_keys[idx], unc_ary[idx]))]
+    return _argsort_partitioned(unc_ary, argsort_func, n_jobs=n_jobs)
+
+
+def _hash_index(n_obs, seed=44):
+    """Compute deterministic pseudo-random keys of observation indices (SplitMix64).
+
+    Parameters
+    ----------
+    n_obs : int
+        Number of observations.
+    seed: int, optional
+        Seed value.
+        Default 44
+
+    Returns
+    -------
+    ndarray
+        1D array (`uint64` type) containing a hash of every observation index.
+    """
+    golden = np.uint64(0x9E3779B97F4A7C15)
+    state = np.uint64(seed % 2**64) + (np.arange(n_obs, dtype=np.uint64) + np.uint64(1)) * golden
+    state = (state ^ (state >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    state = (state ^ (state >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return state ^ (state >> np.uint64(31))
+
+
+def _expected_n_cor_nonrej(unc_sort, cum_correct, n_nonrej):
+    """Compute expected number of correct non-rejected observations over random tie-breaks.
+
+    If the cut point splits a group of tied uncertainties, the non-rejected part of the
+    group is a uniformly random subset, such that its expected number of correct
+    observations is proportional to the fraction of the group that is non-rejected.
+
+    Parameters
+    ----------
+    unc_sort : ndarray
+        1D ndarray (`float` type) containing sorted uncertainty values.
+    cum_correct : ndarray
+        1D array (`int` type) containing the number of correct predictions among the
+        `k` least uncertain, for `k = 0, ..., observations`.
+    n_nonrej : int or ndarray
+        Number(s) of non-rejected observations.
+
+    Returns
+    -------
+    ndarray
+        Expected number(s) of correct non-rejected observations (`float` type).
+    """
+    n_nonrej = np.asarray(n_nonrej)
+    if unc_sort.shape[0] == 0:
+        return cum_correct[n_nonrej].astype(float)
+    # tie group of the last non-rejected observation
+    value = unc_sort[np.maximum(n_nonrej - 1, 0)]
+    group_start = np.searchsorted(unc_sort, value, side="left")
+    group_stop = np.searchsorted(unc_sort, value, side="right")
+    n_cor_group = cum_correct[group_stop] - cum_correct[group_start]
+    return cum_correct[group_start] + \
+        (n_nonrej - group_start) * n_cor_group / (group_stop - group_start)
+
+
+def _argsort_abs(unc_ary, n_jobs=None):
+    """Sort observations by increasing uncertainty, NaN values last.
+
+    Equal values are sorted with the unstable default `np.argsort`, their order is
+    arbitrary. Use it only where the order of ties does not matter.
+
+    Parameters
+    ----------
+    unc_ary : ndarray
+        1D ndarray (`float` type) containing uncertainty values.
+    n_jobs : int, optional
+        Number of threads, see `_argsort_partitioned`.
+        Default: None
+
+    Returns
+    -------
+    ndarray
+        1D array (`int` type) containing indices that sort `unc_ary`.
+    """
+    def argsort_func(idx):
+        if idx is None:
+            return np.argsort(unc_ary)
+        return idx[np.argsort(unc_ary[idx])]
+    return _argsort_partitioned(unc_ary, argsort_func, n_jobs=n_jobs)
+
+
+def _argsort_partitioned(unc_ary, argsort_func, n_jobs=None):
+    """Sort observations by partitioning them into ranges of uncertainty values, \
+        which are sorted in parallel.
+
+    Equal values always end up in the same partition, which keeps the original order of
+    its observations. With a stable `argsort_func` (e.g. a `np.lexsort` with tie-breaking
+    keys), the result is therefore identical to sorting all observations at once. With
+    an unstable `argsort_func`, the order of equal values is arbitrary and can depend on
+    `n_jobs`.
+
+    Parameters
+    ----------
+    unc_ary : ndarray
+        1D ndarray (`float` type) containing uncertainty values.
+    argsort_func : callable
+        Function mapping a 1D array (`int` type) of indices to those indices in sorted
+        order, or None to the indices that sort all observations.
+    n_jobs : int, optional
+        Number of threads, -1 means all CPUs.
+        Default: None
+
+    Returns
+    -------
+    ndarray
+        1D array (`int` type) containing indices that sort `unc_ary`.
+    """
+    n_workers = get_n_workers(n_jobs)
+    if n_workers == 1:
+        return argsort_func(None)
+    # pivots from a sample of the finite values, NaN values go to the last partition
+    n_parts = 4 * n_workers
+    sample = unc_ary[::max(unc_ary.size // (1000 * n_parts), 1)]
+    sample = sample[~np.isnan(sample)]
+    pivots = np.unique(np.quantile(sample, np.linspace(0, 1, n_parts + 1)[1:-1])) \
+        if sample.size > 0 else np.array([])
+    part = np.searchsorted(pivots, unc_ary, side="right").astype(np.uint16)
+    # stable sort on small integers (radix sort)
+    idx_part = np.argsort(part, kind="stable")
+    bounds = np.cumsum(np.bincount(part, minlength=pivots.size + 1))[:-1]
+    return np.concatenate(list(map_ordered(argsort_func, np.split(idx_part, bounds),
+                                           n_jobs=n_workers)))
+
+
+def _n_nonrej_relative(threshold, n_preds):
+    """Compute number of non-rejected observations for relative thresholds.
+
+    Mirrors `idx[:int((1-threshold)*n_preds)]` in `confusion_matrix_rej`,
+    including the slicing semantics for out-of-range thresholds.
+
+    Parameters
+    ----------
+    threshold : ndarray
+        1D array (`float` type) containing relative rejection thresholds.
+    n_preds : int
+        Number of observations.
+
+    Returns
+    -------
+    ndarray
+        1D array (`int` type) containing number of non-rejected observations.
+    """
+    n_stop = np.trunc(np.subtract(1., threshold) * n_preds).astype(np.int64)
+    return np.where(n_stop < 0, np.maximum(n_stop + n_preds, 0), np.minimum(n_stop, n_preds))
+
+
+def metrics_from_counts(n_cor_rej, n_cor_nonrej, n_incor_rej, n_incor_nonrej):
+    """Compute 3 rejection metrics from (arrays of) confusion matrix counts.
+
+    Vectorized counterpart of the metric computation in `compute_metrics_rej`,
+    with identical handling of the undefined cases.
+
+    Parameters
+    ----------
+    n_cor_rej : ndarray
+        Number of correct observations that are rejected.
+    n_cor_nonrej : ndarray
+        Number of correct observations that are not rejected.
+    n_incor_rej : ndarray
+        Number of incorrect observations that are rejected.
+    n_incor_nonrej : ndarray
+        Number of incorrect observations that are not rejected.
+
+    Returns
+    -------
+    nonrej_acc : ndarray
+        Non-rejeced accuracy (NRA).
+    class_quality : ndarray
+        Classification quality (CQ).
+    rej_quality : ndarray
+        Rejection quality (RQ).
+    """
+    n_cor_rej, n_cor_nonrej, n_incor_rej, n_incor_nonrej = np.broadcast_arrays(
+        n_cor_rej, n_cor_nonrej, n_incor_rej, n_incor_nonrej)
+    n_nonrej = n_cor_nonrej + n_incor_nonrej
+    n_rej = n_cor_rej + n_incor_rej
+    n_cor = n_cor_rej + n_cor_nonrej
+    n_incor = n_incor_rej + n_incor_nonrej
+    n_preds = n_rej + n_nonrej
+    shape = n_preds.shape
+
+    nonrej_acc = np.divide(n_cor_nonrej, n_nonrej, out=np.full(shape, np.inf),
+                           where=n_nonrej > 0)
+    class_quality = np.divide(n_cor_nonrej + n_incor_rej, n_preds, out=np.full(shape, np.inf),
+                              where=n_preds > 0)
+    # undefined when `n_cor_rej=0` or no incorrect observations (see `compute_metrics_rej`)
+    valid = (n_cor_rej > 0) & (n_incor > 0)
+    rej_quality = np.where(n_rej > 0, np.inf, 1.0)
+    np.divide(np.divide(n_incor_rej, n_cor_rej, where=valid, out=np.ones(shape)),
+              np.divide(n_incor, n_cor, where=valid, out=np.ones(shape)),
+              where=valid, out=rej_quality)
+    return nonrej_acc, class_quality, rej_quality
+
+
+def _sort_correct(y_true_label, y_pred_label, unc_ary, relative=True, seed=44, n_jobs=None,
+                  ties="random"):
+    """Sort correctness and uncertainty of observations by increasing uncertainty.
+
+    For relative rejection, ties are broken as in `confusion_matrix_rej`.
+    NaN values are sorted last.
+
+    Returns
+    -------
+    is_correct_sort : ndarray
+        1D array (`bool` type) indicating correct predictions, in sorted order.
+    unc_sort : ndarray
+        1D ndarray (`float` type) containing sorted uncertainty values.
+    """
+    is_correct = np.equal(y_true_label, y_pred_label)
+    if relative:
+        idx_sort = _argsort_rej(unc_ary, seed=seed, n_jobs=n_jobs, ties=ties)
+    else:
+        idx_sort = _argsort_abs(unc_ary, n_jobs=n_jobs)
+    return is_correct[idx_sort], unc_ary[idx_sort]
+
+
+def _n_lower_absolute(unc_sort, threshold):
+    """Compute number of observations below absolute thresholds in a sorted array.
+
+    Observations with `unc_ary < threshold` form a prefix of the sorted array and
+    NaN uncertainties (sorted last) are never rejected.
+
+    Returns
+    -------
+    n_lower : ndarray
+        1D array (`int` type) containing number of non-NaN observations below each threshold.
+    n_nan : int
+        Number of NaN observations.
+    """
+    n_nan = np.count_nonzero(np.isnan(unc_sort))
+    n_lower = np.searchsorted(unc_sort[:unc_sort.shape[0] - n_nan], threshold, side="left")
+    return n_lower, n_nan
+
+
+def _counts_from_sorted(is_correct_sort, unc_sort, threshold, relative=True, ties="random"):
+    """Compute confusion matrix counts for many thresholds from sorted observations.
+
+    Returns
+    -------
+    threshold : ndarray
+        1D array (`float` type) containing the evaluated thresholds.
+    counts : tuple of ndarray
+        Counts `(n_cor_rej, n_cor_nonrej, n_incor_rej, n_incor_nonrej)` for each threshold.
+    """
+    n_preds = is_correct_sort.shape[0]
+    # cum_correct[k]: number of correct predictions among the k least uncertain
+    cum_correct = np.zeros(n_preds + 1, dtype=np.int64)
+    np.cumsum(is_correct_sort, out=cum_correct[1:])
+    n_cor = cum_correct[-1]
+
+    if relative:
+        if threshold is None:
+            n_nonrej = np.arange(n_preds, -1, -1)
+            threshold = 1. - n_nonrej / max(n_preds, 1)
+        else:
+            threshold = np.atleast_1d(np.asarray(threshold, dtype=float))
+            n_nonrej = _n_nonrej_relative(threshold, n_preds)
+        if ties == "expected":
+            n_cor_nonrej = _expected_n_cor_nonrej(unc_sort, cum_correct, n_nonrej)
+        else:
+            n_cor_nonrej = cum_correct[n_nonrej]
+    else:
+        if threshold is None:
+            threshold = np.append(np.unique(unc_sort[~np.isnan(unc_sort)]), np.inf)
+        else:
+            threshold = np.atleast_1d(np.asarray(threshold, dtype=float))
+        n_lower, n_nan = _n_lower_absolute(unc_sort, threshold)
+        n_nonrej = n_lower + n_nan
+        n_cor_nonrej = cum_correct[n_lower] + (n_cor - cum_correct[n_preds - n_nan])
+
+    n_incor_nonrej = n_nonrej - n_cor_nonrej
+    n_cor_rej = n_cor - n_cor_nonrej
+    n_incor_rej = (n_preds - n_cor) - n_incor_nonrej
+    return threshold, (n_cor_rej, n_cor_nonrej, n_incor_rej, n_incor_nonrej)
+
+
+def rejection_curve(y_true_label, y_pred_label, unc_ary, threshold=None, idx=None, relative=True,
+                    seed=44, return_counts=False, n_jobs=None, ties="random"):
+    """Compute 3 rejection metrics for many relative or absolute thresholds at once:
+    - non-rejeced accuracy (NRA)
+    - classification quality (CQ)
+    - rejection quality (RQ)
+
+    The observations are sorted only once, after which the confusion matrix for each
+    threshold follows from cumulative counts of correct predictions (looked up with
+    `np.searchsorted` for absolute thresholds). The results are identical to calling
+    `compute_metrics_rej` for each threshold.
+
+    Parameters
+    ----------
+    y_true_label : ndarray
+        1D array (`float` type) containing true labels.
+    y_pred_label : ndarray
+        1D array (`float` type) containing predicted labels.
+    unc_ary : ndarray
+        1D ndarray (`float` type) containing uncertainty values.
+    threshold : float or ndarray, optional
+        Rejection threshold(s). If None, evaluate every possible cut point, i.e. the
+        relative thresholds `1 - k/observations` for `k = observations, ..., 0`, or
+        every distinct uncertainty value followed by `inf` for absolute rejection.
+        Default: None
+    idx : ndarray, optional
+        1D array (`int` type) containing indices of test subset.
+        Default: None
+    relative : bool, optional
+        Use relative rejection, otherwise absolute rejection.
+        Default: True
+    seed: int, optional
+        Seed value for random rejection.
+        Default 44
+    return_counts : bool, optional
+        Whether to also return the confusion matrix counts.
+        Default: False
+    n_jobs : int, optional
+        Number of threads used to sort the uncertainties, -1 means all CPUs.
+        The results do not depend on the number of threads.
+        Default: None
+    ties : {'random', 'expected', 'hash'}, optional
+        Handling of tied uncertainties for relative rejection, see `confusion_matrix_rej`.
+        Default: 'random'
+
+    Returns
+    -------
+    threshold : ndarray
+        1D array (`float` type) containing the evaluated thresholds.
+    nonrej_acc : ndarray
+        1D array (`float` type) containing non-rejeced accuracy (NRA).
+    class_quality : ndarray
+        1D array (`float` type) containing classification quality (CQ).
+    rej_quality : ndarray
+        1D array (`float` type) containing rejection quality (RQ).
+    counts : tuple of ndarray
+        Only returned if `return_counts` is True. 1D arrays (`int` type, `float` type for
+        `ties='expected'`) containing
+        `n_cor_rej`, `n_cor_nonrej`, `n_incor_rej` and `n_incor_nonrej`.
+
+    Examples
+    --------
+    >>> y_true_label = np.array([0., 1., 1., 0., 1.])
+    >>> y_pred_label = np.array([0., 0., 1., 0., 0.])
+    >>> unc_ary = np.array([0.2, 0.8, 0.4, 0.6, 0.5])
+    >>> rejection_curve(y_true_label, y_pred_label, unc_ary, threshold=[0.1, 0.45])
+    (array([0.1 , 0.45]), array([0.75, 1.  ]), array([0.8, 0.8]), array([inf,  3.]))
+    """
+    if idx is not None:
+        y_true_label, y_pred_label, unc_ary, *_ = subset_ary(idx, y_true_label, y_pred_label,
+                                                            unc_ary)
+    is_correct_sort, unc_sort = _sort_correct(y_true_label, y_pred_label, unc_ary,
+                                              relative=relative, seed=seed, n_jobs=n_jobs,
+                                              ties=ties)
+    threshold, (n_cor_rej, n_cor_nonrej, n_incor_rej, n_incor_nonrej) = _counts_from_sorted(
+        is_correct_sort, unc_sort, threshold, relative=relative, ties=ties)
+
+    nonrej_acc, class_quality, rej_quality = metrics_from_counts(
+        n_cor_rej, n_cor_nonrej, n_incor_rej, n_incor_nonrej)
+    if return_counts:
+        return threshold, nonrej_acc, class_quality, rej_quality, \
+            (n_cor_rej, n_cor_nonrej, n_incor_rej, n_incor_nonrej)
+    return threshold, nonrej_acc, class_quality, rej_quality
+
+
+def grouped_rejection_curve(y_true_label, y_pred_label, unc_ary, id_arr, threshold,
+                            relative=True, seed=44, combined=False, return_counts=False,
+                            n_jobs=None, ties="random"):
+    """Compute rejection metrics of every subset in a single pass over a shared sort.
+
+    The observations are sorted once, after which a stable partition on `id_arr`
+    yields the sorted order of each subset (e.g. as obtained from `concat_get_idx`).
+    For 'random' and 'hash' ties, the tie-breaking keys are assigned per subset and the
+    observations are sorted once by (subset, uncertainty, key). The results are
+    identical to calling `rejection_curve` with `idx` the increasing indices of each
+    subset, and the combined row to calling it on all observations.
+
+    Parameters
+    ----------
+    y_true_label : ndarray
+        1D array (`float` type) containing true labels.
+    y_pred_label : ndarray
+        1D array (`float` type) containing predicted labels.
+    unc_ary : ndarray
+        1D ndarray (`float` type) containing uncertainty values.
+    id_arr : ndarray
+        1D array (`int` type) containing id numbers of the subset of each observation.
+    threshold : float or array-like
+        Rejection threshold(s), shared by all subsets.
+    relative : bool, optional
+        Use relative rejection, otherwise absolute rejection.
+        Default: True
+    seed : int, optional
+        Seed value for random rejection of observations with equal uncertainty.
+        Default: 44
+    combined : bool, optional
+        Whether to append the metrics of all observations combined as last row.
+        Default: False
+    return_counts : bool, optional
+        Whether to also return the confusion matrix counts.
+        Default: False
+    n_jobs : int, optional
+        Number of threads used to sort the observations. None means 1.
+        Default: None
+    ties : str, optional
+        Strategy for ties in relative rejection (see `confusion_matrix_rej`).
+        Default: "random"
+
+    Returns
+    -------
+    groups : ndarray
+        1D array containing the unique subset ids, one for each row of the metrics.
+        If `combined` is True, the metrics have one extra (last) row.
+    threshold : ndarray
+        1D array (`float` type) containing the evaluated thresholds.
+    nonrej_acc : ndarray
+        2D array (groups x thresholds) with the non-rejeced accuracy (NRA).
+    class_quality : ndarray
+        2D array (groups x thresholds) with the classification quality (CQ).
+    rej_quality : ndarray
+        2D array (groups x thresholds) with the rejection quality (RQ).
+    counts : tuple of ndarray
+        2D arrays `(n_cor_rej, n_cor_nonrej, n_incor_rej, n_incor_nonrej)`,
+        only returned if `return_counts` is True.
+
+    Examples
+    --------
+    >>> y_true_all, id_arr, *_ = concat_get_idx(y_true_mnist, y_true_notmnist)
+    >>> groups, threshold, nra, cq, rq = grouped_rejection_curve(
+    ...     y_true_all, y_pred_label, unc_ary, id_arr, threshold=[0.1, 0.2], combined=True)
+    """
+    if threshold is None:
+        raise ValueError("Invalid threshold. Expected a float or array-like, got None.")
+    if relative and ties not in _TIES:
+        raise ValueError("Invalid tie handling. Expected one of: %s" % _TIES)
+    is_correct = np.equal(y_true_label, y_pred_label)
+    if relative and ties != "expected":
+        groups, group_of = np.unique(np.asarray(id_arr), return_inverse=True)
+        group_of = group_of.ravel()
+        n_group = np.bincount(group_of, minlength=len(groups))
+        # position of each observation within its subset, in the original order
+        order = np.argsort(group_of, kind="stable")
+        pos = np.empty(group_of.shape[0], dtype=np.int64)
+        pos[order] = np.arange(group_of.shape[0]) - np.repeat(np.cumsum(n_group) - n_group,
+                                                              n_group)
+        # same keys as `_argsort_rej` on each subset
+        n_max = int(n_group.max(initial=0))
+        if ties == "random":
+            tie_keys = np.random.RandomState(seed=seed).random_sample(n_max)[pos]
+        else:
+            tie_keys = _hash_index(n_max, seed=seed)[pos]
+        idx_group = np.lexsort((tie_keys, unc_ary, group_of))
+        bounds = np.concatenate(([0], np.cumsum(n_group)))
+        segments = [idx_group[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+        if combined:
+            segments.append(_argsort_rej(unc_ary, seed=seed, n_jobs=n_jobs, ties=ties))
+    else:
+        if relative:
+            idx_sort = _argsort_rej(unc_ary, seed=seed, n_jobs=n_jobs, ties=ties)
+        else:
+            idx_sort = _argsort_abs(unc_ary, n_jobs=n_jobs)
+        groups, group_sort = np.unique(np.asarray(id_arr)[idx_sort], return_inverse=True)
+        group_sort = group_sort.ravel()
+        # stable partition keeps each subset in increasing uncertainty order
+        order = np.argsort(group_sort, kind="stable")
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(group_sort,
+                                                            minlength=len(groups)))))
+        segments = [idx_sort[order[start:stop]] for start, stop in zip(bounds[:-1], bounds[1:])]
+        if combined:
+            segments.append(idx_sort)
+
+    counts_list = []
+    for segment in segments:
+        threshold_out, counts = _counts_from_sorted(is_correct[segment], unc_ary[segment],
+                                                    threshold, relative=relative, ties=ties)
+        counts_list.append(counts)
+    counts = tuple(np.stack(count) for count in zip(*counts_list))
+    nonrej_acc, class_quality, rej_quality = metrics_from_counts(*counts)
+    if return_counts:
+        return groups, threshold_out, nonrej_acc, class_quality, rej_quality, counts
+    return groups, threshold_out, nonrej_acc, class_quality, rej_quality
+
+
+def _argsort_rej_models(unc_models, seed=44, ties="random"):
+    """Sort the observations of each model (row) by increasing uncertainty in one batch.
+
+    The order of each row equals that of `_argsort_rej`, such that ties are broken
+    identically to evaluating each model separately.
+    """
+    if ties not in _TIES:
+        raise ValueError("Invalid tie handling. Expected one of: %s" % _TIES)
+    if ties == "expected":
+        return np.argsort(unc_models, axis=-1)
+    n_obs = unc_models.shape[-1]
+    if ties == "random":
+        tie_keys = np.random.RandomState(seed=seed).random_sample(n_obs)
+    else:
+        tie_keys = _hash_index(n_obs, seed=seed)
+    return np.lexsort((np.broadcast_to(tie_keys, unc_models.shape), unc_models), axis=-1)
+
+
+def rejection_curve_models(y_true_label, y_pred_label, unc_ary, threshold=None, idx=None,
+                           relative=True, seed=44, return_counts=False, n_jobs=None,
+                           ties="random"):
+    """Compute 3 rejection metrics of many models evaluated on the same observations.
+
+    The observations of all models are sorted in a batch along the model axis, after
+    which the metrics follow as in `rejection_curve`. The results are identical to
+    calling `rejection_curve` for each model.
+
+    Parameters
+    ----------
+    y_true_label : ndarray
+        1D array (`float` type) containing true labels, shared by all models.
+    y_pred_label : ndarray
+        2D array (`float` type) of shape `(models, observations)` containing
+        predicted labels.
+    unc_ary : ndarray
+        2D ndarray (`float` type) of shape `(models, observations)` containing
+        uncertainty values.
+    threshold : float or array-like, optional
+        Rejection threshold(s), shared by all models. If None, all cut points are
+        evaluated for relative rejection; absolute rejection requires thresholds.
+        Default: None
+    idx : ndarray or slice, optional
+        Indices of the observations to evaluate.
+        Default: None
+    relative : bool, optional
+        Use relative rejection, otherwise absolute rejection.
+        Default: True
+    seed : int, optional
+        Seed value for random rejection of observations with equal uncertainty.
+        Default: 44
+    return_counts : bool, optional
+        Whether to also return the confusion matrix counts.
+        Default: False
+    n_jobs : int, optional
+        Number of threads, each sorting a block of models. None means 1.
+        Default: None
+    ties : str, optional
+        Strategy for ties in relative rejection (see `confusion_matrix_rej`).
+        Default: "random"
+
+    Returns
+    -------
+    threshold : ndarray
+        1D array (`float` type) containing the evaluated thresholds.
+    nonrej_acc : ndarray
+        2D array (models x thresholds) with the non-rejeced accuracy (NRA).
+    class_quality : ndarray
+        2D array (models x thresholds) with the classification quality (CQ).
+    rej_quality : ndarray
+        2D array (models x thresholds) with the rejection quality (RQ).
+    counts : tuple of ndarray
+        2D arrays `(n_cor_rej, n_cor_nonrej, n_incor_rej, n_incor_nonrej)`,
+        only returned if `return_counts` is True.
+    """
+    y_pred_label = np.atleast_2d(y_pred_label)
+    unc_ary = np.atleast_2d(unc_ary)
+    if y_pred_label.shape != unc_ary.shape:
+        raise ValueError(
+            f"`y_pred_label` and `unc_ary` should have equal shapes, "
+            f"got {y_pred_label.shape} and {unc_ary.shape}")
+    if threshold is None and not relative:
+        raise ValueError("Absolute rejection requires `threshold` to be specified.")
+    if idx is not None:
+        y_true_label = y_true_label[idx]
+        y_pred_label = y_pred_label[:, idx]
+        unc_ary = unc_ary[:, idx]
+    # `y_true_label` is compared with all models at once
+    is_correct = np.equal(y_pred_label, y_true_label)
+
+    n_models = unc_ary.shape[0]
+    bounds = np.linspace(0, n_models, min(get_n_workers(n_jobs), max(n_models, 1)) + 1)
+    bounds = bounds.astype(int)
+    if relative:
+        blocks = map_ordered(lambda i: _argsort_rej_models(unc_ary[bounds[i]:bounds[i + 1]],
+                                                           seed=seed, ties=ties),
+                             range(len(bounds) - 1), n_jobs=n_jobs)
+    else:
+        blocks = map_ordered(lambda i: np.argsort(unc_ary[bounds[i]:bounds[i + 1]], axis=-1),
+                             range(len(bounds) - 1), n_jobs=n_jobs)
+    idx_sort = np.concatenate(list(blocks), axis=0)
+    is_correct_sort = np.take_along_axis(is_correct, idx_sort, axis=-1)
+    unc_sort = np.take_along_axis(unc_ary, idx_sort, axis=-1)
+
+    counts_list = []
+    for is_correct_row, unc_row in zip(is_correct_sort, unc_sort):
+        threshold_out, counts = _counts_from_sorted(is_correct_row, unc_row, threshold,
+                                                    relative=relative, ties=ties)
+        counts_list.append(counts)
+    counts = tuple(np.stack(count) for count in zip(*counts_list))
+    nonrej_acc, class_quality, rej_quality = metrics_from_counts(*counts)
+    if return_counts:
+        return threshold_out, nonrej_acc, class_quality, rej_quality, counts
+    return threshold_out, nonrej_acc, class_quality, rej_quality
+
+
+def _relative_threshold(n_nonrej, n_preds):
+    """Compute the largest relative thresholds `<= 1 - n_nonrej/n_preds` that keep exactly
+    `n_nonrej` observations in `_n_nonrej_relative`, despite floating point rounding."""
+    n_nonrej = np.asarray(n_nonrej)
+    threshold = 1. - n_nonrej / max(n_preds, 1)
+    too_high = _n_nonrej_relative(threshold, n_preds) < n_nonrej
+    while np.any(too_high):
+        threshold = np.where(too_high, np.nextafter(threshold, -np.inf), threshold)
+        too_high = _n_nonrej_relative(threshold, n_preds) < n_nonrej
+    return threshold
+
+
+def _calibrate_from_counts(threshold, counts, target, metric):
+    """Select the threshold achieving each target from all cut points of a curve.
+
+    `threshold` and `counts` are ordered by increasing number of rejected observations.
+    Returns the index of the selected cut point, -1 if the target is not achievable.
+    """
+    n_cor_rej, n_cor_nonrej, n_incor_rej, n_incor_nonrej = counts
+    n_rej = n_cor_rej + n_incor_rej
+    if metric == "rejection_rate":
+        values = n_rej / max(n_rej[-1] + n_cor_nonrej[-1] + n_incor_nonrej[-1], 1)
+    else:
+        nonrej_acc, _, rej_quality = metrics_from_counts(*counts)
+        # rejecting all observations leaves NRA undefined
+        values = np.where(n_cor_nonrej + n_incor_nonrej > 0, nonrej_acc, -np.inf) \
+            if metric == "nra" else rej_quality
+    if metric == "rq":
+        # most rejected observations with RQ >= target: search the suffix maximum
+        suffix_max = np.maximum.accumulate(values[::-1])[::-1]
+        return np.searchsorted(-suffix_max, -target, side="right") - 1
+    # fewest rejected observations with metric >= target: search the prefix maximum
+    pos = np.searchsorted(np.maximum.accumulate(values), target, side="left")
+    return np.where(pos < threshold.shape[0], pos, -1)
+
+
+def calibrate_threshold(y_true_label, y_pred_label, unc_ary, target, metric="nra", idx=None,
+                        seed=44, n_jobs=None, ties="random"):
+    """Compute the relative and absolute rejection thresholds achieving a target metric.
+
+    The observations are sorted only once. The metric at every cut point follows from
+    cumulative counts as in `rejection_curve`, after which each target is looked up
+    with a binary search on the running maximum of the metric. The selected operating
+    point is:
+    - 'nra': fewest rejected observations with non-rejected accuracy `>= target`
+    - 'rejection_rate': fewest rejected observations with rejection rate `>= target`
+    - 'rq': most rejected observations with rejection quality `>= target`
+
+    Parameters
+    ----------
+    y_true_label : ndarray
+        1D array (`float` type) containing true labels.
+    y_pred_label : ndarray
+        1D array (`float` type) containing predicted labels.
+    unc_ary : ndarray
+        1D ndarray (`float` type) containing uncertainty values.
+    target : float or array-like
+        Target value(s) of the metric.
+    metric : {'nra', 'rejection_rate', 'rq'}, optional
+        Metric to calibrate.
+        Default: 'nra'
+    idx : ndarray, optional
+        1D array (`int` type) containing indices of test subset.
+        Default: None
+    seed: int, optional
+        Seed value for random rejection.
+        Default 44
+    n_jobs : int, optional
+        Number of threads used to sort the uncertainties, -1 means all CPUs.
+        Default: None
+    ties : {'random', 'expected', 'hash'}, optional
+        Handling of tied uncertainties for relative rejection, see `confusion_matrix_rej`.
+        Default: 'random'
+
+    Returns
+    -------
+    threshold_rel : float or ndarray
+        Relative threshold(s). `compute_metrics_rej` with this threshold, `relative=True`
+        and the same `seed` and `ties` reproduces the selected operating point.
+        NaN if the target is not achievable.
+    threshold_abs : float or ndarray
+        Absolute threshold(s), i.e. the selected operating point among those reachable
+        by absolute rejection, which cannot split observations with equal uncertainty.
+        NaN if the target is not achievable.
+
+    Raises
+    ------
+    ValueError
+        If `metric` is invalid.
+
+    Examples
+    --------
+    >>> y_true_label = np.array([0., 1., 1., 0., 1.])
+    >>> y_pred_label = np.array([0., 0., 1., 0., 0.])
+    >>> unc_ary = np.array([0.2, 0.8, 0.4, 0.6, 0.5])
+    >>> calibrate_threshold(y_true_label, y_pred_label, unc_ary, target=1.)
+    (0.6, 0.5)
+    """
+    metrics = ["nra", "rejection_rate", "rq"]
+    if metric not in metrics:
+        raise ValueError("Invalid metric. Expected one of: %s" % metrics)
+    if idx is not None:
+        y_true_label, y_pred_label, unc_ary, *_ = subset_ary(idx, y_true_label, y_pred_label,
+                                                            unc_ary)
+    target_ary = np.asarray(target, dtype=float)
+    # absolute cut points do not depend on the order of ties, so one sort serves both
+    is_correct_sort, unc_sort = _sort_correct(y_true_label, y_pred_label, unc_ary,
+                                              seed=seed, n_jobs=n_jobs, ties=ties)
+    n_preds = is_correct_sort.shape[0]
+    thresholds = []
+    for relative in (True, False):
+        threshold, counts = _counts_from_sorted(is_correct_sort, unc_sort, None,
+                                                relative=relative, ties=ties)
+        if not relative:
+            # increasing absolute thresholds reject fewer observations
+            threshold, counts = threshold[::-1], tuple(count[::-1] for count in counts)
+        pos = _calibrate_from_counts(threshold, counts, target_ary, metric)
+        if relative:
+            n_nonrej = counts[1] + counts[3]
+            threshold = _relative_threshold(np.rint(n_nonrej).astype(np.int64), n_preds)
+        thresholds.append(np.where(pos >= 0, threshold[pos], np.nan))
+    if target_ary.ndim == 0:
+        return tuple(float(threshold) for threshold in thresholds)
+    return tuple(thresholds)
+
+
+def compute_auc_rej(y_true_label, y_pred_label, unc_ary, idx=None, seed=44, show=False,
+                    n_jobs=None, ties="random"):
+    """Compute areas under the rejection curves from a single sort:
+    - area under the non-rejected accuracy (NRA) vs rejection curve
+    - area under the risk-coverage curve (AURC)
+    - excess AURC (E-AURC) compared to the oracle ordering
+    - AURC of the oracle ordering, which ranks all correct predictions first
+
+    Every cut point `k = 1, ..., observations` (the `k` least uncertain observations are
+    non-rejected) has weight `1/observations`, such that the areas are exact averages
+    over all cut points. The risk is the error rate of the non-rejected observations,
+    i.e. `1 - NRA`, hence the NRA area equals `1 - AURC`. Ties are handled as in
+    `confusion_matrix_rej`.
+
+    Parameters
+    ----------
+    y_true_label : ndarray
+        1D array (`float` type) containing true labels.
+    y_pred_label : ndarray
+        1D array (`float` type) containing predicted labels.
+    unc_ary : ndarray
+        1D ndarray (`float` type) containing uncertainty values.
+    idx : ndarray, optional
+        1D array (`int` type) containing indices of test subset.
+        Default: None
+    seed: int, optional
+        Seed value for random rejection.
+        Default 44
+    show : bool, optional
+        Print areas to console.
+        Default: False
+    n_jobs : int, optional
+        Number of threads used to sort the uncertainties, -1 means all CPUs.
+        Default: None
+    ties : {'random', 'expected', 'hash'}, optional
+        Handling of tied uncertainties, see `confusion_matrix_rej`.
+        Default: 'random'
+
+    Returns
+    -------
+    auc_nra : float
+        Area under the NRA vs rejection curve (higher is better).
+    aurc : float
+        Area under the risk-coverage curve (lower is better).
+    eaurc : float
+        Excess area under the risk-coverage curve, `aurc - aurc_oracle`.
+    aurc_oracle : float
+        Area under the risk-coverage curve of the oracle ordering.
+
+    Notes
+    -----
+    - see: `Geifman et al. (2019) <https://openreview.net/forum?id=SJfb5jCqKm>`_
+    """
+    if idx is not None:
+        y_true_label, y_pred_label, unc_ary, *_ = subset_ary(idx, y_true_label, y_pred_label,
+                                                            unc_ary)
+    n_preds = y_true_label.shape[0]
+    if n_preds == 0:
+        raise ValueError("At least one observation is required to compute the areas.")
+    is_correct_sort, unc_sort = _sort_correct(y_true_label, y_pred_label, unc_ary,
+                                              relative=True, seed=seed, n_jobs=n_jobs,
+                                              ties=ties)
+    n_nonrej = np.arange(1, n_preds + 1)
+    cum_correct = np.zeros(n_preds + 1, dtype=np.int64)
+    np.cumsum(is_correct_sort, out=cum_correct[1:])
+    if ties == "expected":
+        n_cor_nonrej = _expected_n_cor_nonrej(unc_sort, cum_correct, n_nonrej)
+    else:
+        n_cor_nonrej = cum_correct[1:]
+    # risk at coverage k/observations: errors among the k least uncertain
+    n_incor_nonrej = n_nonrej - n_cor_nonrej
+    aurc = float(np.mean(n_incor_nonrej / n_nonrej))
+    # oracle: all correct predictions are non-rejected first
+    n_cor = int(cum_correct[-1])
+    n_nonrej_oracle = n_nonrej[n_cor:]
+    aurc_oracle = float(np.sum((n_nonrej_oracle - n_cor) / n_nonrej_oracle) / n_preds)
+    auc_nra = 1. - aurc
+    eaurc = aurc - aurc_oracle
+    if show:
+        data = [[auc_nra, aurc, eaurc, aurc_oracle]]
+        print("\n"+tabulate(data, headers=["AUC non-rejected accuracy", "AURC", "E-AURC",
+                                           "Oracle AURC"], floatfmt=".4f"))
+    return auc_nra, aurc, eaurc, aurc_oracle
+
+
+def _percentile(ary, q, axis=0, method="linear"):
+    """Compute percentiles, returning `inf` instead of NaN between two infinite values."""
+    with np.errstate(invalid="ignore"):
+        pct = np.percentile(ary, q, axis=axis, method=method)
+    lower = np.percentile(ary, q, axis=axis, method="lower")
+    higher = np.percentile(ary, q, axis=axis, method="higher")
+    return np.where(lower == higher, lower, pct)
+
+
+def bootstrap_rejection_curve(y_true_label, y_pred_label, unc_ary, threshold, idx=None,
+                              relative=True, seed=44, n_boot=1000, percentiles=(2.5, 50, 97.5),
+                              rng=None, return_samples=False, ties="random"):
+    """Compute bootstrap percentile bands of 3 rejection metrics for many thresholds:
+    - non-rejeced accuracy (NRA)
+    - classification quality (CQ)
+    - rejection quality (RQ)
+
+    The observations are sorted only once. Every bootstrap resample is drawn as a
+    multinomial count vector over the sorted observations, after which the confusion
+    matrices of all resamples and thresholds follow from batched cumulative sums of
+    the counts. For each resample, the metrics equal those of `rejection_curve` on the
+    resampled observations.
+
+    Parameters
+    ----------
+    y_true_label : ndarray
+        1D array (`float` type) containing true labels.
+    y_pred_label : ndarray
+        1D array (`float` type) containing predicted labels.
+    unc_ary : ndarray
+        1D ndarray (`float` type) containing uncertainty values.
+    threshold : float or ndarray
+        Rejection threshold(s).
+    idx : ndarray, optional
+        1D array (`int` type) containing indices of test subset.
+        Default: None
+    relative : bool, optional
+        Use relative rejection, otherwise absolute rejection.
+        Default: True
+    seed: int, optional
+        Seed value for random rejection.
+        Default 44
+    n_boot : int, optional
+        Number of bootstrap resamples.
+        Default: 1000
+    percentiles : sequence of float, optional
+        Percentiles (between 0 and 100) of the bootstrap distribution to return.
+        Default: (2.5, 50, 97.5)
+    rng : numpy.random.Generator or int, optional
+        Random number generator (or seed) used to draw the resamples.
+        Default: None
+    return_samples : bool, optional
+        Whether to also return the metrics of every resample.
+        Default: False
+    ties : {'random', 'hash'}, optional
+        Handling of tied uncertainties for relative rejection, see `confusion_matrix_rej`.
+        Default: 'random'
+
+    Returns
+    -------
+    threshold : ndarray
+        1D array (`float` type) containing the evaluated thresholds.
+    nonrej_acc : ndarray
+        2D array (`float` type) of shape `(percentiles, thresholds)` containing
+        percentiles of non-rejeced accuracy (NRA).
+    class_quality : ndarray
+        2D array (`float` type) of shape `(percentiles, thresholds)` containing
+        percentiles of classification quality (CQ).
+    rej_quality : ndarray
+        2D array (`float` type) of shape `(percentiles, thresholds)` containing
+        percentiles of rejection quality (RQ).
+    samples : tuple of ndarray
+        Only returned if `return_samples` is True. 2D arrays (`float` type) of shape
+        `(n_boot, thresholds)` containing NRA, CQ and RQ of every resample.
+
+    Examples
+    --------
+    >>> rng = np.random.default_rng(0)
+    >>> threshold, nra_band, _, _ = bootstrap_rejection_curve(
+    ...     y_true_label, y_pred_label, unc_ary, np.linspace(0, 0.9, 10), rng=rng)
+    >>> nra_lower, nra_median, nra_upper = nra_band
+    """
+    if idx is not None:
+        y_true_label, y_pred_label, unc_ary, *_ = subset_ary(idx, y_true_label, y_pred_label,
+                                                            unc_ary)
+    rng = np.random.default_rng(rng)
+    n_preds = y_true_label.shape[0]
+    if n_preds == 0:
+        raise ValueError("At least one observation is required for bootstrapping.")
+    if ties == "expected":
+        raise ValueError("`ties='expected'` is not supported for bootstrapping.")
+    threshold = np.atleast_1d(np.asarray(threshold, dtype=float))
+    is_correct_sort, unc_sort = _sort_correct(y_true_label, y_pred_label, unc_ary,
+                                              relative=relative, seed=seed, ties=ties)
+    if relative:
+        n_nonrej = _n_nonrej_relative(threshold, n_preds)
+    else:
+        n_lower, n_nan = _n_lower_absolute(unc_sort, threshold)
+
+    counts = np.empty((4, n_boot, threshold.shape[0]), dtype=np.int64)
+    # cumulative counts of shape (resamples, observations + 1) for a batch of resamples
+    boot_size = max(_CHUNK_BYTES // (40 * (n_preds + 1)), 1)
+    for start in range(0, n_boot, boot_size):
+        stop = min(start + boot_size, n_boot)
+        # multinomial counts of `n_preds` uniform draws, by counting the draws per row
+        draws = rng.integers(0, n_preds, size=(stop - start, n_preds))
+        draws += np.arange(stop - start)[:, None] * n_preds
+        weights = np.bincount(draws.ravel(), minlength=(stop - start) * n_preds).reshape(
+            stop - start, n_preds)
+        cum_weights = np.zeros((stop - start, n_preds + 1), dtype=np.int64)
+        np.cumsum(weights, axis=-1, out=cum_weights[:, 1:])
+        cum_correct = np.zeros_like(cum_weights)
+        np.cumsum(weights * is_correct_sort, axis=-1, out=cum_correct[:, 1:])
+        n_cor = cum_correct[:, -1:]
+        if relative:
+            # the first `n_nonrej` resampled observations contain all copies of the
+            # observations before `pos` and some copies of observation `pos`;
+            # offsetting the rows allows a single searchsorted for all resamples
+            offsets = np.arange(stop - start)[:, None] * (n_preds + 1)
+            pos = np.searchsorted((cum_weights + offsets).ravel(),
+                                  (n_nonrej[None, :] + offsets).ravel(), side="left")
+            pos = np.maximum(pos.reshape(stop - start, -1) - offsets - 1, 0)
+            rows = np.arange(stop - start)[:, None]
+            n_partial = n_nonrej[None, :] - cum_weights[rows, pos]
+            n_cor_nonrej = cum_correct[rows, pos] + n_partial * is_correct_sort[pos]
+            n_nonrej_boot = np.broadcast_to(n_nonrej, n_cor_nonrej.shape)
+        else:
+            n_finite = n_preds - n_nan
+            n_cor_nan = n_cor - cum_correct[:, n_finite:n_finite + 1]
+            n_nonrej_boot = cum_weights[:, n_lower] + \
+                (n_preds - cum_weights[:, n_finite:n_finite + 1])
+            n_cor_nonrej = cum_correct[:, n_lower] + n_cor_nan
+        n_incor_nonrej = n_nonrej_boot - n_cor_nonrej
+        counts[0, start:stop] = n_cor - n_cor_nonrej
+        counts[1, start:stop] = n_cor_nonrej
+        counts[2, start:stop] = (n_preds - n_cor) - n_incor_nonrej
+        counts[3, start:stop] = n_incor_nonrej
+
+    samples = metrics_from_counts(*counts)
+    bands = tuple(_percentile(metric, percentiles, axis=0) for metric in samples)
+    if return_samples:
+        return (threshold, *bands, samples)
+    return (threshold, *bands)
 
 
 def compute_count_unc(threshold, unc_ary):
     """Compute number of observations with uncertainty >= `threshold`.
 
+    A single threshold is counted in one pass over `unc_ary`. For an array of thresholds,
+    `unc_ary` is sorted once and all thresholds are looked up with `np.searchsorted`.
+    NaN uncertainties are never counted.
+
     Parameters
     ----------
-    threshold : float
-        Rejection threshold (absolute).
+    threshold : float or array-like or None
+        Rejection threshold(s) (absolute). If None, evaluate the exact empirical
+        survival curve at every distinct uncertainty value.
     unc_ary : ndarray
         1D ndarray (`float` type) containing uncertainty values.
 
     Returns
     -------
-    float
-        Number of observations with uncertainty >= `threshold`.
+    int or ndarray
+        Number of observations with uncertainty >= `threshold`, 1D array (`int` type)
+        for an array of thresholds. If `threshold` is None, a tuple of the sorted
+        distinct uncertainty values and their counts.
+
+    Examples
+    --------
+    >>> unc_ary = np.array([0.2, 0.8, 0.4, 0.4, 0.5])
+    >>> compute_count_unc([0.3, 0.5], unc_ary)
+    array([4, 2])
+    >>> compute_count_unc(None, unc_ary)
+    (array([0.2, 0.4, 0.5, 0.8]), array([5, 4, 2, 1]))
+    """
+    if threshold is not None and np.ndim(threshold) == 0:
+        return int(np.count_nonzero(unc_ary >= threshold))
+    # NaN values are sorted last
+    unc_sort = np.sort(unc_ary, axis=None)
+    unc_sort = unc_sort[:unc_sort.shape[0] - np.count_nonzero(np.isnan(unc_sort))]
+    n_valid = unc_sort.shape[0]
+    if threshold is None:
+        is_start = np.empty(n_valid, dtype=bool)
+        is_start[:1] = True
+        np.not_equal(unc_sort[1:], unc_sort[:-1], out=is_start[1:])
+        starts = np.flatnonzero(is_start)
+        return unc_sort[starts], n_valid - starts
+    return n_valid - np.searchsorted(unc_sort, threshold, side="left")
+
+
+class UncertaintyHistogram:
+    """Mergeable histogram of uncertainty values over fixed bin edges.
+
+    The counts are accumulated chunk by chunk with `np.bincount`, such that arrays of any
+    size (also memory-mapped) are binned with flat memory, and histograms of chunks or
+    shards with the same edges are merged with `+`. Bins follow `np.histogram`: all bins
+    are half-open except the last, which includes its right edge. NaN values are not
+    binned, but make the `mean` NaN, as with `np.mean`.
+
+    Parameters
+    ----------
+    edges : array-like
+        1D array (`float` type) of monotonically increasing bin edges.
+
+    Examples
+    --------
+    >>> hist = UncertaintyHistogram.from_array(np.load("unc.npy", mmap_mode="r"), bins=50)
+    >>> hist_unc_base(hist)  # see `uncertainty_rejection.plotting`
+    """
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=float)
+        if self.edges.ndim != 1 or self.edges.shape[0] < 2 or np.any(np.diff(self.edges) < 0):
+            raise ValueError("`edges` should be a 1D array of at least 2 increasing values")
+        n_bins = self.edges.shape[0] - 1
+        self.counts = np.zeros(n_bins, dtype=np.int64)
+        # number and sum of all non-NaN values, also outside the edges
+        self.n_obs = 0
+        self.total = 0.
+        self.n_nan = 0
+        # equal-width bins are counted with the fast path of `np.histogram`
+        self._uniform = np.array_equal(
+            self.edges, np.histogram_bin_edges(np.empty(0), bins=n_bins,
+                                               range=(self.edges[0], self.edges[-1])))
+
+    @classmethod
+    def from_array(cls, unc_ary, bins=20, value_range=None, chunk_size=2**20):
+        """Bin an array of uncertainty values chunk by chunk.
+
+        Parameters
+        ----------
+        unc_ary : ndarray
+            1D ndarray (`float` type) containing uncertainty values, can be memory-mapped.
+        bins : int or array-like, optional
+            Number of equal-width bins, or 1D array (`float` type) of bin edges.
+            Default: 20
+        value_range : (float, float), optional
+            Lower and upper edge of equal-width bins. If None, the minimum and maximum of
+            `unc_ary` (computed in an extra pass over the chunks).
+            Default: None
+        chunk_size : int, optional
+            Number of observations binned at once.
+            Default: 2**20
+
+        Returns
+        -------
+        UncertaintyHistogram
+            Histogram of the uncertainty values.
+        """
+        unc_ary = np.asarray(unc_ary)
+        chunks = [slice(start, start + chunk_size)
+                  for start in range(0, unc_ary.shape[0], chunk_size)]
+        if np.ndim(bins) == 0:
+            if value_range is None and chunks:
+                value_range = (min(np.nanmin(unc_ary[chunk]) for chunk in chunks),
+                               max(np.nanmax(unc_ary[chunk]) for chunk in chunks))
+            bins = np.histogram_bin_edges(np.empty(0), bins=bins, range=value_range)
+        hist = cls(bins)
+        for chunk in chunks:
+            hist.update(unc_ary[chunk])
+        return hist
+
+    def update(self, unc_ary):
+        """Add uncertainty values.
+
+        Parameters
+        ----------
+        unc_ary : ndarray
+            1D ndarray (`float` type) containing uncertainty values.
+        """
+        unc_ary = np.asarray(unc_ary, dtype=float).ravel()
+        is_valid = ~np.isnan(unc_ary)
+        self.n_obs += int(np.count_nonzero(is_valid))
+        self.n_nan += unc_ary.shape[0] - int(np.count_nonzero(is_valid))
+        self.total += float(np.sum(unc_ary, where=is_valid, dtype=_ACC_DTYPE))
+        n_bins = self.counts.shape[0]
+        if self._uniform:
+            self.counts += np.histogram(unc_ary, bins=n_bins,
+                                        range=(self.edges[0], self.edges[-1]))[0]
+            return
+        # NaN values are sorted past the last edge
+        bin_idx = np.searchsorted(self.edges, unc_ary, side="right") - 1
+        # the last bin includes its right edge
+        bin_idx[unc_ary == self.edges[-1]] = n_bins - 1
+        bin_idx = bin_idx[(bin_idx >= 0) & (bin_idx < n_bins)]
+        self.counts += np.bincount(bin_idx, minlength=n_bins)
+
+    def __add__(self, other):
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Cannot merge histograms with different edges")
+        merged = UncertaintyHistogram(self.edges)
+        merged.counts = self.counts + other.counts
+        merged.n_obs = self.n_obs + other.n_obs
+        merged.total = self.total + other.total
+        merged.n_nan = self.n_nan + other.n_nan
+        return merged
+
+    @property
+    def mean(self):
+        """Mean of all values, NaN if any value is NaN or if there are none."""
+        if self.n_nan or not self.n_obs:
+            return np.nan
+        return self.total / self.n_obs
+
+
+class RejectionReport:
+    """Rejection curves of several uncertainty measures with memoised results.
+
+    The predicted labels are computed once and, for each uncertainty measure, the
+    observations are sorted only once. Curves are computed lazily from the cached
+    sort and memoised per set of thresholds, such that all plots of a figure set
+    can be served from a single report (see the `report` argument of the rejection
+    plots in `uncertainty_rejection.plotting`).
+
+    Parameters
+    ----------
+    y_true_label : ndarray
+        1D array (`float` type) containing true labels.
+    y_pred_stack : ndarray
+        3D array (`float` type) of shape `(observations, samples, classes)`.
+    unc_total : ndarray, optional
+        1D ndarray (`float` type) containing total uncertainty values.
+        Default: None
+    unc_aleatoric : ndarray, optional
+        1D ndarray (`float` type) containing aleatoric uncertainty values.
+        Default: None
+    unc_epistemic : ndarray, optional
+        1D ndarray (`float` type) containing epistemic uncertainty values.
+        Default: None
+    conf : ndarray, optional
+        1D ndarray (`float` type) containing confidence values.
+        Default: None
+    y_pred_label : ndarray, optional
+        1D array containing predicted labels. Computed from `y_pred_stack` if None.
+        Default: None
+    seed : int, optional
+        Seed value for random rejection of observations with equal uncertainty.
+        Default: 44
+    ties : str, optional
+        Strategy for ties in relative rejection (see `confusion_matrix_rej`).
+        Default: "random"
+    n_jobs : int, optional
+        Number of threads used for sorting. None means 1.
+        Default: None
+
+    Notes
+    -----
+    Measures that are not provided are computed from `y_pred_stack` on first use,
+    all at once with `compute_all_uncertainties`. Confidence is rejected on
+    `1 - conf`, as in the plotting functions.
+
+    Examples
+    --------
+    >>> report = RejectionReport(y_true_label, y_pred_stack, unc_tot, unc_ale, unc_epi, conf)
+    >>> threshold, nra, cq, rq = report.curve("EU", threshold=np.linspace(0, 1, 101))
+    >>> rejection_mixmetric_plot3(None, None, None, "EU", report=report)
+    """
+    unc_types = ['TU', 'AU', 'EU', 'Conf']
+
+    def __init__(self, y_true_label, y_pred_stack, unc_total=None, unc_aleatoric=None,
+                 unc_epistemic=None, conf=None, y_pred_label=None, seed=44, ties="random",
+                 n_jobs=None):
+        if ties not in _TIES:
+            raise ValueError("Invalid tie handling. Expected one of: %s" % _TIES)
+        self.y_true_label = y_true_label
+        self.y_pred_stack = y_pred_stack
+        self.measures = dict(zip(self.unc_types,
+                                 (unc_total, unc_aleatoric, unc_epistemic, conf)))
+        if y_pred_label is not None:
+            self.y_pred_label = y_pred_label
+        self.seed = seed
+        self.ties = ties
+        self.n_jobs = n_jobs
+        self._sorted = {}
+        self._curves = {}
+        self._subsets = {}
+
+    @property
+    def n_classes(self):
+        """Number of classes of `y_pred_stack`."""
+        return self.y_pred_stack.shape[-1]
+
+    @cached_property
+    def y_pred_label(self):
+        """1D array containing predicted labels."""
+        if "_all_uncertainties" in self.__dict__:
+            return self._all_uncertainties[-1]
+        return get_y_mean_label(self.y_pred_stack)[1]
+
+    @cached_property
+    def _all_uncertainties(self):
+        return compute_all_uncertainties(self.y_pred_stack, n_jobs=self.n_jobs)
+
+    def _check_unc_type(self, unc_type):
+        if unc_type not in self.unc_types:
+            raise ValueError(
+                "Invalid uncertainty type. Expected one of: %s" % self.unc_types)
+
+    def measure(self, unc_type):
+        """Return the values of an uncertainty measure.
+
+        Parameters
+        ----------
+        unc_type : {'TU', 'AU', 'EU', 'Conf'}
+            Type of uncertainty values.
+
+        Returns
+        -------
+        ndarray
+            1D ndarray (`float` type) containing uncertainty (or confidence) values.
+        """
+        self._check_unc_type(unc_type)
+        if self.measures[unc_type] is None:
+            # unc_total, unc_aleatoric, unc_epistemic, conf
+            self.measures[unc_type] = self._all_uncertainties[self.unc_types.index(unc_type)]
+        return self.measures[unc_type]
+
+    def _sort(self, unc_type, relative):
+        key = (unc_type, relative)
+        if key not in self._sorted:
+            unc_ary = self.measure(unc_type)
+            if unc_type == 'Conf':
+                unc_ary = 1. - unc_ary
+            self._sorted[key] = _sort_correct(self.y_true_label, self.y_pred_label, unc_ary,
+                                              relative=relative, seed=self.seed,
+                                              n_jobs=self.n_jobs, ties=self.ties)
+        return self._sorted[key]
+
+    def curve(self, unc_type, threshold=None, relative=True, return_counts=False):
+        """Compute 3 rejection metrics for many thresholds, see `rejection_curve`.
+
+        Parameters
+        ----------
+        unc_type : {'TU', 'AU', 'EU', 'Conf'}
+            Type of uncertainty values.
+        threshold : float or array-like, optional
+            Rejection threshold(s). If None, all cut points are evaluated.
+            Default: None
+        relative : bool, optional
+            Use relative rejection, otherwise absolute rejection (on `1 - conf`
+            for confidence).
+            Default: True
+        return_counts : bool, optional
+            Whether to also return the confusion matrix counts.
+            Default: False
+
+        Returns
+        -------
+        tuple of ndarray
+            Thresholds, NRA, CQ and RQ (and counts), as returned by `rejection_curve`.
+        """
+        self._check_unc_type(unc_type)
+        if threshold is not None:
+            threshold = np.atleast_1d(np.asarray(threshold, dtype=float))
+        key = (unc_type, relative, None if threshold is None else threshold.tobytes())
+        if key not in self._curves:
+            is_correct_sort, unc_sort = self._sort(unc_type, relative)
+            threshold_out, counts = _counts_from_sorted(is_correct_sort, unc_sort, threshold,
+                                                        relative=relative, ties=self.ties)
+            self._curves[key] = (threshold_out, *metrics_from_counts(*counts), counts)
+        *curve, counts = self._curves[key]
+        if return_counts:
+            return (*curve, counts)
+        return tuple(curve)
+
+    def subset(self, idx):
+        """Return the (memoised) report of a subset of observations.
+
+        Parameters
+        ----------
+        idx : ndarray or slice
+            1D array (`int` type) containing indices of subset, or a slice. Slices
+            result in views instead of copies (see `concat_get_idx`).
+
+        Returns
+        -------
+        RejectionReport
+            Report of the subset, sharing the settings of this report.
+        """
+        if isinstance(idx, slice):
+            key = (idx.start, idx.stop, idx.step)
+        else:
+            idx = np.asarray(idx)
+            key = (idx.dtype.str, idx.tobytes())
+        if key not in self._subsets:
+            measures = [None if arr is None else arr[idx] for arr in self.measures.values()]
+            # reuse predicted labels if already computed
+            y_pred_label = self.__dict__.get("y_pred_label")
+            y_true_label, y_pred_stack, *_ = subset_ary(idx, self.y_true_label,
+                                                        self.y_pred_stack)
+            if y_pred_label is not None:
+                y_pred_label = y_pred_label[idx]
+            self._subsets[key] = RejectionReport(
+                y_true_label, y_pred_stack, *measures, y_pred_label=y_pred_label,
+                seed=self.seed, ties=self.ties, n_jobs=self.n_jobs)
+        return self._subsets[key]
+
+
+class _P2Quantile:
+    """P-square estimate of a single quantile in O(1) time and memory per observation.
+
+    Jain, R. and Chlamtac, I. (1985). The P2 algorithm for dynamic calculation of
+    quantiles and histograms without storing observations. Communications of the ACM.
+
+    Parameters
+    ----------
+    p : float
+        Quantile to estimate, in the open interval (0, 1).
+    """
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1., 1. + 2. * p, 1. + 4. * p, 3. + 2. * p, 5.]
+        self.increments = [0., p / 2., p, (1. + p) / 2., 1.]
+
+    def update(self, x):
+        """Add one observation."""
+        self.count += 1
+        q = self.heights
+        if self.count <= 5:
+            bisect.insort(q, x)
+            return
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = bisect.bisect_right(q, x, 1, 4) - 1
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        desired = self.desired
+        for i in range(5):
+            desired[i] += self.increments[i]
+        # adjust heights of the 3 middle markers
+        for i in range(1, 4):
+            d = desired[i] - n[i]
+            if (d >= 1. and n[i + 1] - n[i] > 1) or (d <= -1. and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                # piecewise-parabolic prediction
+                q_new = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < q_new < q[i + 1]:
+                    # linear prediction
+                    q_new = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = q_new
+                n[i] += d
+
+    @property
+    def value(self):
+        """Current estimate of the quantile, or None if no observations were added."""
+        if self.count == 0:
+            return None
+        if self.count <= 5:
+            return self.heights[min(int(self.p * self.count), self.count - 1)]
+        return self.heights[2]
+
+
+def _is_scalar(value):
+    """Check for a scalar, with a fast path for Python and NumPy scalars."""
+    return isinstance(value, (float, int, np.generic)) or np.ndim(value) == 0
+
+
+class RejectionGate:
+    """Online accept/reject decisions for a stream of uncertainty values.
+
+    With absolute rejection, an observation is rejected if its uncertainty is
+    `>= threshold`, as in `confusion_matrix_rej`. With relative rejection, the gate
+    tracks the uncertainty cutoff that rejects a fraction `threshold` of the recent
+    observations: in a batch of `n` observations sorted by uncertainty,
+    `confusion_matrix_rej` keeps the first `int((1 - threshold) * n)`, the cutoff is
+    the uncertainty of the first rejected observation and an observation is rejected
+    if its uncertainty is `>= cutoff`.
+
+    The cutoff is tracked either exactly over a sliding window of the last `window`
+    observations, or approximately over all observations with a P-square quantile
+    sketch in O(1) time and memory per observation. The window is kept sorted with
+    `bisect`: O(log window) comparisons per observation, plus a move of O(window)
+    pointers that dominates the latency for windows beyond about 10^4 observations
+    (see `benchmarks/bench_gate.py`).
+
+    Parameters
+    ----------
+    threshold : float
+        Rejection threshold, in [0, 1] for relative rejection.
+    relative : bool, optional
+        Use relative rejection, otherwise absolute rejection.
+        Default: True
+    window : int, optional
+        Number of most recent observations over which the relative cutoff is tracked
+        exactly. None means all observations, tracked with a P-square sketch.
+        Default: None
+
+    Notes
+    -----
+    A micro-batch passed to `__call__` is decided with the cutoff before the batch,
+    and is added to the window or sketch afterwards. The gate accepts everything until
+    the first observation is added. NaN uncertainties are rejected with relative
+    rejection and accepted with absolute rejection, as in `confusion_matrix_rej`, but
+    they are not added to the window or sketch. Uncertainties tied with the cutoff are
+    all rejected, whereas `confusion_matrix_rej` breaks such ties.
+
+    Examples
+    --------
+    >>> gate = RejectionGate(0.1, window=10_000)
+    >>> gate.update(unc_validation)  # warm start, optional
+    >>> for unc in stream:
+    ...     if gate(unc):
+    ...         defer_to_human()
+    """
+    def __init__(self, threshold, relative=True, window=None):
+        if relative and not 0. <= threshold <= 1.:
+            raise ValueError(
+                f"`threshold` should be in [0, 1] for relative rejection, is {threshold}")
+        if window is not None and window < 1:
+            raise ValueError(f"`window` should be a positive integer, is {window}")
+        self.threshold = threshold
+        self.relative = relative
+        self.window = window
+        self.n_seen = 0
+        # fraction of observations that is not rejected
+        self._p = 1. - threshold
+        # the cutoff is fixed for absolute rejection, and for relative thresholds 0 and 1
+        self._tracking = relative and 0. < self._p < 1.
+        self._fifo = deque()
+        self._sorted = []
+        self._sketch = _P2Quantile(self._p) if self._tracking and window is None else None
+        self._cutoff = -math.inf if relative and self._p <= 0. else math.inf
+
+    @property
+    def cutoff(self):
+        """Current absolute uncertainty cutoff, observations with uncertainty `>= cutoff`
+        are rejected."""
+        return self._cutoff
+
+    def _update_cutoff(self):
+        if self.window is None:
+            self._cutoff = self._sketch.value
+        else:
+            n_obs = len(self._sorted)
+            n_nonrej = int(self._p * n_obs)
+            self._cutoff = self._sorted[n_nonrej] if n_nonrej < n_obs else math.inf
+
+    def update(self, unc):
+        """Add observations to the window or sketch, without deciding on them.
+
+        Parameters
+        ----------
+        unc : float or ndarray
+            Uncertainty value, or 1D array (`float` type) of uncertainty values.
+        """
+        if _is_scalar(unc):
+            values = [] if math.isnan(unc) else [float(unc)]
+        else:
+            values = np.asarray(unc, dtype=np.float64)
+            values = values[~np.isnan(values)].tolist()
+        self.n_seen += len(values)
+        if not self._tracking or not values:
+            return
+        if self.window is None:
+            for x in values:
+                self._sketch.update(x)
+        else:
+            fifo, sorted_unc = self._fifo, self._sorted
+            for x in values:
+                fifo.append(x)
+                bisect.insort(sorted_unc, x)
+                if len(fifo) > self.window:
+                    del sorted_unc[bisect.bisect_left(sorted_unc, fifo.popleft())]
+        self._update_cutoff()
+
+    def reject(self, unc):
+        """Decide on observations with the current cutoff, without adding them.
+
+        Parameters
+        ----------
+        unc : float or ndarray
+            Uncertainty value, or 1D array (`float` type) of uncertainty values.
+
+        Returns
+        -------
+        bool or ndarray
+            True if the observation is rejected, or 1D array (`bool` type) for arrays.
+        """
+        cutoff = self._cutoff if self.relative else self.threshold
+        if self.relative and self._p >= 1.:
+            # relative threshold 0 rejects nothing, also not NaN
+            return False if _is_scalar(unc) else np.zeros(np.shape(unc), dtype=bool)
+        if _is_scalar(unc):
+            return bool(not unc < cutoff) if self.relative else bool(unc >= cutoff)
+        unc = np.asarray(unc)
+        if self.relative:
+            return ~(unc < cutoff)
+        return unc >= cutoff
+
+    def __call__(self, unc):
+        """Decide on observations with the current cutoff, then add them.
+
+        Parameters
+        ----------
+        unc : float or ndarray
+            Uncertainty value, or 1D array (`float` type) of uncertainty values
+            (micro-batch).
+
+        Returns
+        -------
+        bool or ndarray
+            True if the observation is rejected, or 1D array (`bool` type) for arrays.
+        """
+        is_rej = self.reject(unc)
+        self.update(unc)
+        return is_rej
+
+
+class _BlockedSortedList:
+    """Sorted list of floats in blocks, with O(log N) rank and selection queries.
+
+    The values are split in sorted blocks of at most `2 * block_size` values. The block
+    maxima locate the block of a value by bisection, and a Fenwick tree over the block
+    lengths gives the number of values before any block in O(log N). Adding or removing
+    a value moves at most `2 * block_size` pointers within its block. Splitting a full
+    block or dropping an empty one rebuilds the Fenwick tree in O(N / block_size), which
+    needs at least `block_size` updates of that block since it was created.
+
+    Parameters
+    ----------
+    block_size : int, optional
+        Minimum number of values per block after a split.
+        Default: 512
     """
-    count_unc = np.where(unc_ary >= threshold)[0].shape[0]
-    return count_unc
+    def __init__(self, block_size=512):
+        self.block_size = block_size
+        self._blocks = []
+        self._maxes = []
+        # Fenwick tree over the block lengths
+        self._tree = []
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def _rebuild(self):
+        tree = [len(block) for block in self._blocks]
+        for i in range(len(tree)):
+            parent = i | (i + 1)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _add_length(self, i, delta):
+        tree = self._tree
+        while i < len(tree):
+            tree[i] += delta
+            i |= i + 1
+
+    def _n_before(self, i):
+        # number of values in the blocks before block `i`
+        tree, total = self._tree, 0
+        while i > 0:
+            total += tree[i - 1]
+            i &= i - 1
+        return total
+
+    def add(self, value):
+        """Insert a value, after any equal values."""
+        self._len += 1
+        if not self._blocks:
+            self._blocks.append([value])
+            self._maxes.append(value)
+            self._rebuild()
+            return
+        i = min(bisect.bisect_right(self._maxes, value), len(self._blocks) - 1)
+        block = self._blocks[i]
+        bisect.insort(block, value)
+        self._maxes[i] = block[-1]
+        if len(block) > 2 * self.block_size:
+            self._blocks[i:i + 1] = [block[:self.block_size], block[self.block_size:]]
+            self._maxes[i:i + 1] = [self._blocks[i][-1], block[-1]]
+            self._rebuild()
+        else:
+            self._add_length(i, 1)
+
+    def remove(self, value):
+        """Remove one occurrence of a value that is in the list."""
+        i = bisect.bisect_left(self._maxes, value)
+        block = self._blocks[i]
+        del block[bisect.bisect_left(block, value)]
+        self._len -= 1
+        if block:
+            self._maxes[i] = block[-1]
+            self._add_length(i, -1)
+        else:
+            del self._blocks[i], self._maxes[i]
+            self._rebuild()
+
+    def bisect_left(self, value):
+        """Number of values lower than `value`."""
+        i = bisect.bisect_left(self._maxes, value)
+        if i == len(self._blocks):
+            return self._len
+        return self._n_before(i) + bisect.bisect_left(self._blocks[i], value)
+
+    def bisect_right(self, value):
+        """Number of values lower than or equal to `value`."""
+        i = bisect.bisect_right(self._maxes, value)
+        if i == len(self._blocks):
+            return self._len
+        return self._n_before(i) + bisect.bisect_right(self._blocks[i], value)
+
+    def __getitem__(self, index):
+        """Value at position `index` (0 <= index < N) in sorted order."""
+        # descend the Fenwick tree to the block containing position `index`
+        tree, i, step = self._tree, 0, 1 << (len(self._tree).bit_length() - 1)
+        while step:
+            if i + step <= len(tree) and tree[i + step - 1] <= index:
+                i += step
+                index -= tree[i - 1]
+            step >>= 1
+        return self._blocks[i][index]
+
+
+class IncrementalRejectionEvaluator:
+    """Rejection metrics of a stream of predictions with delayed labels.
+
+    The uncertainty values of the labelled observations are kept in two blocked sorted
+    lists: all labelled observations, and only the correct ones. The rank of any value in
+    both lists gives the number of (correct) observations below it, such that the counts
+    at a relative or absolute threshold are queried in O(log N), instead of sorting the
+    full history with `compute_metrics_rej` after every label. Adding a prediction is
+    O(1). Attaching its label or expiring it takes O(log N), plus a bounded move of at
+    most 1024 pointers within a block of the sorted lists.
+
+    Memory is about 200 bytes per observation: its record in an ordered dict keyed by
+    identifier, and 1 or 2 pointers in the sorted lists once labelled.
+
+    The metrics are computed over the labelled observations that have not expired. They
+    equal those of `compute_metrics_rej` on these observations, with `ties='expected'`
+    for relative rejection (a tie group split by the cut point contributes its expected
+    number of correct observations).
+
+    Parameters
+    ----------
+    threshold : float or array-like
+        Rejection threshold(s) evaluated by `counts` and `metrics`.
+    relative : bool, optional
+        Use relative rejection, otherwise absolute rejection.
+        Default: True
+    window : int, optional
+        Number of most recent predictions that are kept, older predictions expire
+        automatically. None means that predictions only expire through `expire`.
+        Default: None
+
+    Examples
+    --------
+    >>> evaluator = IncrementalRejectionEvaluator([0.1, 0.2], window=100_000)
+    >>> evaluator.add_prediction(request_id, unc, y_pred_label)
+    >>> ...  # hours later
+    >>> evaluator.add_label(request_id, y_true_label)
+    >>> nonrej_acc, class_quality, rej_quality = evaluator.metrics()
+    """
+    def __init__(self, threshold, relative=True, window=None):
+        if window is not None and window < 1:
+            raise ValueError(f"`window` should be a positive integer, is {window}")
+        self.threshold = threshold
+        self.relative = relative
+        self.window = window
+        self.n_labelled = 0
+        self.n_correct = 0
+        # obs_id -> [unc, y_pred_label, is_correct (None until labelled)]
+        self._obs = OrderedDict()
+        # sorted non-NaN uncertainties of all and of correct labelled observations
+        self._unc_sort = _BlockedSortedList()
+        self._unc_sort_cor = _BlockedSortedList()
+        # number of all and of correct labelled observations with NaN uncertainty
+        self._n_nan = [0, 0]
+
+    def __len__(self):
+        return len(self._obs)
+
+    def add_prediction(self, obs_id, unc, y_pred_label):
+        """Add a prediction, whose label is attached later with `add_label`.
+
+        Parameters
+        ----------
+        obs_id : hashable
+            Identifier of the observation.
+        unc : float
+            Uncertainty value.
+        y_pred_label : int
+            Predicted label.
+        """
+        if obs_id in self._obs:
+            raise ValueError(f"Observation {obs_id!r} has already been added")
+        self._obs[obs_id] = [float(unc), y_pred_label, None]
+        if self.window is not None and len(self._obs) > self.window:
+            self.expire(next(iter(self._obs)))
+
+    def add_label(self, obs_id, y_true_label):
+        """Attach the true label to a prediction, replacing any previous label.
+
+        Parameters
+        ----------
+        obs_id : hashable
+            Identifier of the observation.
+        y_true_label : int
+            True label.
+
+        Returns
+        -------
+        bool
+            False if the observation is unknown or expired, in which case the label is
+            ignored.
+        """
+        record = self._obs.get(obs_id)
+        if record is None:
+            return False
+        if record[2] is not None:
+            self._update(record, -1)
+        record[2] = int(y_true_label == record[1])
+        self._update(record, 1)
+        return True
+
+    def expire(self, obs_id):
+        """Remove an observation, labelled or not. Unknown identifiers are ignored.
+
+        Parameters
+        ----------
+        obs_id : hashable
+            Identifier of the observation.
+        """
+        record = self._obs.pop(obs_id, None)
+        if record is not None and record[2] is not None:
+            self._update(record, -1)
+
+    def _update(self, record, sign):
+        unc, _, is_correct = record
+        if math.isnan(unc):
+            self._n_nan[0] += sign
+            self._n_nan[1] += sign * is_correct
+        else:
+            sorted_lists = (self._unc_sort, self._unc_sort_cor) if is_correct \
+                else (self._unc_sort,)
+            for unc_sort in sorted_lists:
+                if sign > 0:
+                    unc_sort.add(unc)
+                else:
+                    unc_sort.remove(unc)
+        self.n_labelled += sign
+        self.n_correct += sign * is_correct
+
+    def _n_cor_nonrej_relative(self, n_nonrej):
+        if n_nonrej == 0:
+            return 0.
+        unc_sort, unc_sort_cor = self._unc_sort, self._unc_sort_cor
+        if n_nonrej > len(unc_sort):
+            # NaN uncertainties are sorted last and form a single tie group
+            n_below, n_cor_below = len(unc_sort), len(unc_sort_cor)
+            n_group, n_cor_group = self._n_nan
+        else:
+            # tie group of the last non-rejected observation
+            unc = unc_sort[n_nonrej - 1]
+            n_below = unc_sort.bisect_left(unc)
+            n_cor_below = unc_sort_cor.bisect_left(unc)
+            n_group = unc_sort.bisect_right(unc) - n_below
+            n_cor_group = unc_sort_cor.bisect_right(unc) - n_cor_below
+        return n_cor_below + (n_nonrej - n_below) * n_cor_group / n_group
+
+    def _n_nonrej_absolute(self, threshold):
+        if math.isnan(threshold):
+            # `unc >= nan` is always False
+            n_lower, n_cor_lower = len(self._unc_sort), len(self._unc_sort_cor)
+        else:
+            n_lower = self._unc_sort.bisect_left(threshold)
+            n_cor_lower = self._unc_sort_cor.bisect_left(threshold)
+        # NaN uncertainties are never rejected
+        return n_lower + self._n_nan[0], n_cor_lower + self._n_nan[1]
+
+    def counts(self, threshold=None):
+        """Compute the confusion matrix counts of the labelled observations.
+
+        Parameters
+        ----------
+        threshold : float or array-like, optional
+            Rejection threshold(s). If None, the thresholds of the evaluator.
+            Default: None
+
+        Returns
+        -------
+        n_cor_rej : float or ndarray
+            Number of correct observations that are rejected.
+        n_cor_nonrej : float or ndarray
+            Number of correct observations that are not rejected.
+        n_incor_rej : float or ndarray
+            Number of incorrect observations that are rejected.
+        n_incor_nonrej : float or ndarray
+            Number of incorrect observations that are not rejected.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        threshold_ary = np.atleast_1d(np.asarray(threshold, dtype=float))
+        if self.relative:
+            n_nonrej = _n_nonrej_relative(threshold_ary, self.n_labelled)
+            n_cor_nonrej = np.array([self._n_cor_nonrej_relative(int(n)) for n in n_nonrej])
+        else:
+            n_nonrej, n_cor_nonrej = np.array(
+                [self._n_nonrej_absolute(thr) for thr in threshold_ary],
+                dtype=np.int64).reshape(-1, 2).T
+        n_cor_rej = self.n_correct - n_cor_nonrej
+        n_incor_nonrej = n_nonrej - n_cor_nonrej
+        n_incor_rej = (self.n_labelled - self.n_correct) - n_incor_nonrej
+        counts = (n_cor_rej, n_cor_nonrej, n_incor_rej, n_incor_nonrej)
+        if np.ndim(threshold) == 0:
+            return tuple(count.item() for count in counts)
+        return counts
+
+    def metrics(self, threshold=None):
+        """Compute NRA, CQ and RQ of the labelled observations.
+
+        Parameters
+        ----------
+        threshold : float or array-like, optional
+            Rejection threshold(s). If None, the thresholds of the evaluator.
+            Default: None
+
+        Returns
+        -------
+        nonrej_acc : float or ndarray
+            Non-rejeced accuracy (NRA).
+        class_quality : float or ndarray
+            Classification quality (CQ).
+        rej_quality : float or ndarray
+            Rejection quality (RQ).
+        """
+        counts = self.counts(threshold)
+        metrics = metrics_from_counts(*counts)
+        if np.ndim(counts[0]) == 0:
+            return tuple(metric.item() for metric in metrics)
+        return metrics
+
+
+class RejectionSummary:
+    """Mergeable summary of (uncertainty, correct) pairs for rejection metrics.
+
+    Observations are grouped by uncertainty, with the number of correct and incorrect
+    observations per group. Without `edges`, the groups are the distinct uncertainty
+    values (exact summary). With `edges`, the groups are the bins of a fixed histogram
+    (binned summary), whose size does not depend on the number of observations. A binned
+    summary has an underflow group below the first edge and an overflow group from the
+    last edge on, before and after the half-open bins `[edges[i], edges[i + 1])`.
+    Summaries of shards combine associatively with `+` or `RejectionSummary.merge`,
+    such that each shard only ships its summary instead of its prediction arrays.
+
+    Within a group, rejected observations are taken proportionally from the correct and
+    incorrect ones, as with `ties='expected'` in `confusion_matrix_rej`. An exact summary
+    therefore yields the counts of `confusion_matrix_rej(..., ties='expected')`. For a
+    binned summary with relative rejection, the number of correct non-rejected
+    observations differs from any exact sort by at most `count_error_bound`:
+    `max(min(n_cor, n_incor))` over the groups. Absolute thresholds on bin edges are
+    exact. Other absolute thresholds between the edges interpolate linearly within their
+    bin, and absolute thresholds outside the edges reject the whole underflow or overflow
+    group, with errors bounded by `absolute_count_error_bound`.
+
+    Parameters
+    ----------
+    values : ndarray
+        1D array (`float` type) containing the sorted distinct uncertainty values (exact
+        summary), or the `bins + 1` increasing bin edges (binned summary).
+    n_cor : ndarray
+        1D array (`int` type) containing number of correct observations per group, with
+        `bins + 2` groups for a binned summary (underflow, bins, overflow).
+    n_incor : ndarray
+        1D array (`int` type) containing number of incorrect observations per group, with
+        `bins + 2` groups for a binned summary (underflow, bins, overflow).
+    n_nan : tuple of int, optional
+        Number of correct and incorrect observations with NaN uncertainty.
+        Default: (0, 0)
+    binned : bool, optional
+        Whether `values` are bin edges.
+        Default: False
+
+    Examples
+    --------
+    >>> edges = np.linspace(0, np.log2(n_classes), 1025)
+    >>> summaries = [RejectionSummary.from_arrays(y_true, y_pred, unc, edges=edges)
+    ...              for y_true, y_pred, unc in shards]
+    >>> merged = RejectionSummary.merge(summaries)
+    >>> threshold, nra, cq, rq = merged.rejection_curve(np.linspace(0, 1, 101))
+    """
+    def __init__(self, values, n_cor, n_incor, n_nan=(0, 0), binned=False):
+        self.values = np.asarray(values, dtype=float)
+        self.n_cor = np.asarray(n_cor, dtype=np.int64)
+        self.n_incor = np.asarray(n_incor, dtype=np.int64)
+        self.n_nan = tuple(int(count) for count in n_nan)
+        self.binned = binned
+        n_groups = self.values.shape[0] + 1 if binned else self.values.shape[0]
+        if not self.n_cor.shape == self.n_incor.shape == (n_groups,):
+            raise ValueError(
+                f"`n_cor` and `n_incor` should have shape ({n_groups},), "
+                f"have {self.n_cor.shape} and {self.n_incor.shape}")
+
+    @classmethod
+    def from_arrays(cls, y_true_label, y_pred_label, unc_ary, edges=None):
+        """Summarize the observations of one shard.
+
+        Parameters
+        ----------
+        y_true_label : ndarray
+            1D array (`float` type) containing true labels.
+        y_pred_label : ndarray
+            1D array (`float` type) containing predicted labels.
+        unc_ary : ndarray
+            1D ndarray (`float` type) containing uncertainty values.
+        edges : array-like, optional
+            1D array (`float` type) of increasing bin edges, shared by all shards.
+            Values outside the edges are counted in an underflow or overflow group.
+            None means an exact summary.
+            Default: None
+
+        Returns
+        -------
+        RejectionSummary
+            Summary of the observations.
+        """
+        is_correct = np.equal(y_true_label, y_pred_label)
+        is_nan = np.isnan(unc_ary)
+        n_nan_cor = int(np.count_nonzero(is_nan & is_correct))
+        n_nan = (n_nan_cor, int(np.count_nonzero(is_nan)) - n_nan_cor)
+        unc_ary, is_correct = unc_ary[~is_nan], is_correct[~is_nan]
+        if edges is None:
+            values, group = np.unique(unc_ary, return_inverse=True)
+            n_groups = values.shape[0]
+        else:
+            values = np.asarray(edges, dtype=float)
+            n_groups = values.shape[0] + 1
+            # 0 is the underflow group, n_groups - 1 the overflow group
+            group = np.searchsorted(values, unc_ary, side="right")
+        n_obs = np.bincount(group.ravel(), minlength=n_groups)
+        n_cor = np.bincount(group.ravel()[is_correct], minlength=n_groups)
+        return cls(values, n_cor, n_obs - n_cor, n_nan=n_nan, binned=edges is not None)
+
+    def __add__(self, other):
+        return RejectionSummary.merge([self, other])
+
+    @staticmethod
+    def merge(summaries):
+        """Merge summaries of several shards.
+
+        Parameters
+        ----------
+        summaries : iterable of RejectionSummary
+            Summaries, all exact or all binned with the same edges.
+
+        Returns
+        -------
+        RejectionSummary
+            Summary of all observations.
+        """
+        summaries = list(summaries)
+        if not summaries:
+            raise ValueError("`summaries` should contain at least 1 summary")
+        binned = summaries[0].binned
+        if any(summary.binned != binned for summary in summaries):
+            raise ValueError("Cannot merge exact summaries with binned summaries")
+        n_nan = tuple(sum(summary.n_nan[i] for summary in summaries) for i in range(2))
+        if binned:
+            values = summaries[0].values
+            if not all(np.array_equal(summary.values, values) for summary in summaries):
+                raise ValueError("Cannot merge binned summaries with different edges")
+            return RejectionSummary(values, sum(summary.n_cor for summary in summaries),
+                                    sum(summary.n_incor for summary in summaries),
+                                    n_nan=n_nan, binned=True)
+        values, group = np.unique(np.concatenate([summary.values for summary in summaries]),
+                                  return_inverse=True)
+        n_cor, n_incor = (np.zeros(values.shape[0], dtype=np.int64) for _ in range(2))
+        np.add.at(n_cor, group, np.concatenate([summary.n_cor for summary in summaries]))
+        np.add.at(n_incor, group, np.concatenate([summary.n_incor for summary in summaries]))
+        return RejectionSummary(values, n_cor, n_incor, n_nan=n_nan)
+
+    def save(self, file):
+        """Save to an `.npz` file that can be read with `RejectionSummary.load`.
+
+        Parameters
+        ----------
+        file : file-like object, string, or pathlib.Path
+            The file to write.
+        """
+        np.savez(file, values=self.values, n_cor=self.n_cor, n_incor=self.n_incor,
+                 n_nan=np.array(self.n_nan), binned=self.binned)
+
+    @classmethod
+    def load(cls, file):
+        """Load a summary saved with `save`.
+
+        Parameters
+        ----------
+        file : file-like object, string, or pathlib.Path
+            The file to read.
+
+        Returns
+        -------
+        RejectionSummary
+            Loaded summary.
+        """
+        with np.load(file) as data:
+            return cls(data["values"], data["n_cor"], data["n_incor"], n_nan=data["n_nan"],
+                       binned=bool(data["binned"]))
+
+    @property
+    def n_preds(self):
+        """Number of summarized observations."""
+        return int(self.n_cor.sum() + self.n_incor.sum()) + sum(self.n_nan)
+
+    @property
+    def nbytes(self):
+        """Size of the summary arrays in bytes."""
+        return self.values.nbytes + self.n_cor.nbytes + self.n_incor.nbytes
+
+    @property
+    def count_error_bound(self):
+        """Maximum error on the number of correct non-rejected observations with relative
+        rejection, compared to the exact counts (0 for an exact summary)."""
+        if not self.binned or self.n_cor.shape[0] == 0:
+            return 0
+        return int(np.max(np.minimum(self.n_cor, self.n_incor)))
+
+    def absolute_count_error_bound(self, threshold):
+        """Compute bounds on the errors of the confusion matrix counts with absolute
+        rejection.
+
+        A threshold on a bin edge is exact. A threshold inside a bin can be off by all
+        correct and incorrect observations of that bin, and a threshold outside the edges
+        by all those of the underflow or overflow group.
+
+        Parameters
+        ----------
+        threshold : float or array-like
+            Rejection threshold(s).
+
+        Returns
+        -------
+        error_cor : int or ndarray
+            Bound on the error of `n_cor_rej` and `n_cor_nonrej`.
+        error_incor : int or ndarray
+            Bound on the error of `n_incor_rej` and `n_incor_nonrej`.
+        """
+        threshold_ary = np.atleast_1d(np.asarray(threshold, dtype=float))
+        error_cor, error_incor = (np.zeros(threshold_ary.shape, dtype=np.int64)
+                                  for _ in range(2))
+        if self.binned:
+            group = np.searchsorted(self.values, threshold_ary, side="right")
+            on_edge = np.isin(threshold_ary, self.values)
+            split = ~on_edge & ~np.isnan(threshold_ary)
+            error_cor[split] = self.n_cor[group[split]]
+            error_incor[split] = self.n_incor[group[split]]
+        if np.ndim(threshold) == 0:
+            return error_cor.item(), error_incor.item()
+        return error_cor, error_incor
+
+    def counts(self, threshold, relative=True):
+        """Compute confusion matrix counts.
+
+        Parameters
+        ----------
+        threshold : float or array-like
+            Rejection threshold(s).
+        relative : bool, optional
+            Use relative rejection, otherwise absolute rejection.
+            Default: True
+
+        Returns
+        -------
+        n_cor_rej : float or ndarray
+            Number of correct observations that are rejected.
+        n_cor_nonrej : float or ndarray
+            Number of correct observations that are not rejected.
+        n_incor_rej : float or ndarray
+            Number of incorrect observations that are rejected.
+        n_incor_nonrej : float or ndarray
+            Number of incorrect observations that are not rejected.
+        """
+        threshold_ary = np.atleast_1d(np.asarray(threshold, dtype=float))
+        # groups in order of increasing uncertainty, NaN last
+        group_cor = np.append(self.n_cor, self.n_nan[0])
+        group_obs = group_cor + np.append(self.n_incor, self.n_nan[1])
+        cum_obs = np.concatenate([[0], np.cumsum(group_obs)])
+        cum_cor = np.concatenate([[0], np.cumsum(group_cor)])
+        n_preds, n_cor = int(cum_obs[-1]), int(cum_cor[-1])
+        if relative:
+            n_nonrej = _n_nonrej_relative(threshold_ary, n_preds)
+            # group of the last non-rejected observation
+            group = np.maximum(np.searchsorted(cum_obs, n_nonrej, side="left") - 1, 0)
+            n_cor_nonrej = cum_cor[group] + (n_nonrej - cum_obs[group]) * \
+                np.divide(group_cor[group], group_obs[group], out=np.zeros(group.shape),
+                          where=group_obs[group] > 0)
+        else:
+            if self.binned:
+                group = np.searchsorted(self.values, threshold_ary, side="right")
+                # a NaN threshold rejects nothing, as in the exact summary
+                group[np.isnan(threshold_ary)] = self.values.shape[0] + 1
+                # fraction of the bin below the threshold, 0 in the underflow and overflow
+                # groups such that thresholds on the outer edges stay exact
+                in_bin = (group > 0) & (group < self.values.shape[0])
+                lower = self.values[np.where(in_bin, group - 1, 0)]
+                width = self.values[np.where(in_bin, group, 0)] - lower
+                frac = np.divide(threshold_ary - lower, width, out=np.zeros(group.shape),
+                                 where=in_bin & (width > 0))
+            else:
+                group = np.searchsorted(self.values, threshold_ary, side="left")
+                frac = np.zeros(group.shape)
+            # NaN uncertainties are never rejected
+            n_nonrej = cum_obs[group] + frac * group_obs[group] + group_obs[-1]
+            n_cor_nonrej = cum_cor[group] + frac * group_cor[group] + group_cor[-1]
+            if not self.binned:
+                n_nonrej, n_cor_nonrej = n_nonrej.astype(np.int64), n_cor_nonrej.astype(np.int64)
+        n_cor_rej = n_cor - n_cor_nonrej
+        n_incor_nonrej = n_nonrej - n_cor_nonrej
+        n_incor_rej = (n_preds - n_cor) - n_incor_nonrej
+        counts = (n_cor_rej, n_cor_nonrej, n_incor_rej, n_incor_nonrej)
+        if np.ndim(threshold) == 0:
+            return tuple(count.item() for count in counts)
+        return counts
+
+    def rejection_curve(self, threshold, relative=True):
+        """Compute 3 rejection metrics for many relative or absolute thresholds at once,
+        see `rejection_curve`.
+
+        Parameters
+        ----------
+        threshold : float or array-like
+            Rejection threshold(s).
+        relative : bool, optional
+            Use relative rejection, otherwise absolute rejection.
+            Default: True
+
+        Returns
+        -------
+        threshold : ndarray
+            1D array (`float` type) containing the evaluated thresholds.
+        nonrej_acc : ndarray
+            1D array (`float` type) containing non-rejeced accuracy (NRA).
+        class_quality : ndarray
+            1D array (`float` type) containing classification quality (CQ).
+        rej_quality : ndarray
+            1D array (`float` type) containing rejection quality (RQ).
+        """
+        threshold = np.atleast_1d(np.asarray(threshold, dtype=float))
+        return (threshold, *metrics_from_counts(*self.counts(threshold, relative=relative)))
+
+
+class _CompactorSketch:
+    """Mergeable quantile sketch with a deterministic rank error bound.
+
+    Level `h` holds items of weight `2**h`. A level exceeding `k` items is sorted and
+    compacted: every other item is promoted to level `h + 1` (alternating the offset
+    between compactions), which changes the rank of any value by at most `2**h`. The sum
+    of these weights is tracked in `rank_error`, a guaranteed bound on the error of `rank`
+    that is at most `n * log2(n / k) / k`. The memory is at most `k` items per level,
+    i.e. `k * log2(n / k)` items.
+
+    Parameters
+    ----------
+    k : int
+        Maximum number of items per level.
+    """
+    def __init__(self, k):
+        self.k = k
+        self.n = 0
+        self.rank_error = 0
+        self.levels = []
+        self._offsets = []
+
+    def update(self, values):
+        """Add a 1D array (`float` type) of non-NaN values."""
+        values = np.asarray(values, dtype=float).ravel()
+        self._extend(0, values)
+        self.n += values.shape[0]
+        self._compress()
+
+    def merge(self, other):
+        """Add the items of another sketch with the same `k`."""
+        for level, items in enumerate(other.levels):
+            self._extend(level, items)
+        self.n += other.n
+        self.rank_error += other.rank_error
+        self._compress()
+
+    def _extend(self, level, items):
+        while len(self.levels) <= level:
+            self.levels.append(np.empty(0))
+            self._offsets.append(0)
+        self.levels[level] = np.concatenate([self.levels[level], items])
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if items.shape[0] > self.k:
+                items = np.sort(items)
+                # an odd item out stays at this level
+                n_even = items.shape[0] // 2 * 2
+                self._extend(level + 1, items[self._offsets[level]:n_even:2])
+                self.levels[level] = items[n_even:]
+                self._offsets[level] ^= 1
+                self.rank_error += 2**level
+            level += 1
+
+    def coreset(self):
+        """Return the items and their (`int` type) weights."""
+        values = np.concatenate(self.levels) if self.levels else np.empty(0)
+        weights = np.repeat(2**np.arange(len(self.levels), dtype=np.int64),
+                            [items.shape[0] for items in self.levels])
+        return values, weights
+
+
+class RejectionSketch:
+    """Approximate rejection metrics from quantile sketches of the uncertainty values.
+
+    The uncertainty values of correct and incorrect predictions are summarized in two
+    mergeable quantile sketches in one streaming pass, with memory that does not depend
+    on the number of observations N (up to a `log2(N / k)` factor). The sketches
+    estimate the number of values below any threshold with a guaranteed rank error of at
+    most `rank_error`, which is at most `N * log2(N / k) / k` and usually much lower.
+    The metrics follow from the weighted items of both sketches as from an exact
+    `RejectionSummary`, with errors on the confusion matrix counts bounded by
+    `count_error_bound`.
+
+    Parameters
+    ----------
+    k : int, optional
+        Maximum number of items per sketch level, trading memory for accuracy.
+        Default: 1024
+
+    Examples
+    --------
+    >>> sketch = RejectionSketch.from_arrays(y_true_label, y_pred_label, unc_ary)
+    >>> threshold, nra, cq, rq = sketch.rejection_curve(np.linspace(0, 1, 101))
+    >>> error_cor, error_incor = sketch.count_error_bound()
+    """
+    def __init__(self, k=1024):
+        if k < 2:
+            raise ValueError(f"`k` should be at least 2, is {k}")
+        self.k = k
+        self.correct = _CompactorSketch(k)
+        self.incorrect = _CompactorSketch(k)
+        self.n_nan = [0, 0]
+
+    @classmethod
+    def from_arrays(cls, y_true_label, y_pred_label, unc_ary, k=1024, chunk_size=2**20):
+        """Sketch observations in one streaming pass over chunks.
+
+        Parameters
+        ----------
+        y_true_label : ndarray
+            1D array (`float` type) containing true labels.
+        y_pred_label : ndarray
+            1D array (`float` type) containing predicted labels.
+        unc_ary : ndarray
+            1D ndarray (`float` type) containing uncertainty values, can be memory-mapped.
+        k : int, optional
+            Maximum number of items per sketch level.
+            Default: 1024
+        chunk_size : int, optional
+            Number of observations read at once.
+            Default: 2**20
+
+        Returns
+        -------
+        RejectionSketch
+            Sketch of the observations.
+        """
+        sketch = cls(k)
+        for start in range(0, unc_ary.shape[0], chunk_size):
+            stop = start + chunk_size
+            sketch.update(y_true_label[start:stop], y_pred_label[start:stop],
+                          unc_ary[start:stop])
+        return sketch
+
+    def update(self, y_true_label, y_pred_label, unc_ary):
+        """Add observations.
+
+        Parameters
+        ----------
+        y_true_label : ndarray
+            1D array (`float` type) containing true labels.
+        y_pred_label : ndarray
+            1D array (`float` type) containing predicted labels.
+        unc_ary : ndarray
+            1D ndarray (`float` type) containing uncertainty values.
+        """
+        unc_ary = np.asarray(unc_ary, dtype=float)
+        is_correct = np.equal(y_true_label, y_pred_label)
+        is_nan = np.isnan(unc_ary)
+        for i, is_class in enumerate((is_correct, ~is_correct)):
+            self.n_nan[i] += int(np.count_nonzero(is_nan & is_class))
+        self.correct.update(unc_ary[is_correct & ~is_nan])
+        self.incorrect.update(unc_ary[~is_correct & ~is_nan])
+
+    def __add__(self, other):
+        if self.k != other.k:
+            raise ValueError("Cannot merge sketches with different `k`")
+        merged = RejectionSketch(self.k)
+        for sketch in (self, other):
+            merged.correct.merge(sketch.correct)
+            merged.incorrect.merge(sketch.incorrect)
+            merged.n_nan = [merged.n_nan[i] + sketch.n_nan[i] for i in range(2)]
+        return merged
+
+    @property
+    def n_preds(self):
+        """Number of sketched observations."""
+        return self.correct.n + self.incorrect.n + sum(self.n_nan)
+
+    @property
+    def rank_error(self):
+        """Bounds on the error of the number of correct and incorrect observations below
+        any threshold."""
+        return self.correct.rank_error, self.incorrect.rank_error
+
+    def count_error_bound(self, relative=True):
+        """Compute bounds on the errors of the confusion matrix counts.
+
+        For absolute rejection, the counts of correct and incorrect observations are off
+        by at most their rank errors. For relative rejection, the estimated cut point
+        itself can be off by the sum of both rank errors.
+
+        Parameters
+        ----------
+        relative : bool, optional
+            Use relative rejection, otherwise absolute rejection.
+            Default: True
+
+        Returns
+        -------
+        error_cor : int
+            Bound on the error of `n_cor_rej` and `n_cor_nonrej`.
+        error_incor : int
+            Bound on the error of `n_incor_rej` and `n_incor_nonrej`.
+        """
+        error_cor, error_incor = self.rank_error
+        if relative:
+            return 2 * error_cor + error_incor, error_cor + 2 * error_incor
+        return error_cor, error_incor
+
+    def to_summary(self):
+        """Convert the weighted items of the sketches to an exact `RejectionSummary`.
+
+        Returns
+        -------
+        RejectionSummary
+            Summary with the sketch items as observations.
+        """
+        values_cor, weights_cor = self.correct.coreset()
+        values_incor, weights_incor = self.incorrect.coreset()
+        values, group = np.unique(np.concatenate([values_cor, values_incor]),
+                                  return_inverse=True)
+        n_cor, n_incor = (np.zeros(values.shape[0], dtype=np.int64) for _ in range(2))
+        np.add.at(n_cor, group[:values_cor.shape[0]], weights_cor)
+        np.add.at(n_incor, group[values_cor.shape[0]:], weights_incor)
+        return RejectionSummary(values, n_cor, n_incor, n_nan=self.n_nan)
+
+    def counts(self, threshold, relative=True):
+        """Estimate confusion matrix counts, see `RejectionSummary.counts`."""
+        return self.to_summary().counts(threshold, relative=relative)
+
+    def rejection_curve(self, threshold, relative=True):
+        """Estimate 3 rejection metrics for many thresholds at once, see
+        `RejectionSummary.rejection_curve`."""
+        return self.to_summary().rejection_curve(threshold, relative=relative)
+
+    def count_unc(self, threshold):
+        """Estimate number of observations with uncertainty >= `threshold`, see
+        `compute_count_unc`. The error is at most the sum of both rank errors.
+
+        Parameters
+        ----------
+        threshold : float or array-like
+            Rejection threshold(s) (absolute).
+
+        Returns
+        -------
+        int or ndarray
+            Estimated number(s) of observations with uncertainty >= `threshold`.
+        """
+        n_cor_rej, _, n_incor_rej, _ = self.counts(threshold, relative=False)
+        return n_cor_rej + n_incor_rej
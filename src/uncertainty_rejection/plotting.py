@@ -16,8 +16,10 @@ import matplotlib.pyplot as plt
 # local application/library specific imports
 from uncertainty_rejection.analysis import (
     compute_count_unc,
-    compute_metrics_rej,
     get_y_mean_label,
+    rejection_curve,
+    RejectionReport,
+    UncertaintyHistogram
 )
 
 from uncertainty_rejection.utils import (
@@ -26,14 +28,25 @@ from uncertainty_rejection.utils import (
 )
 
 
+def _check_subset_hist(*unc_arys):
+    """Raise an error if a subset is requested of a precomputed histogram."""
+    if any(isinstance(unc_ary, UncertaintyHistogram) for unc_ary in unc_arys):
+        raise ValueError("`idx` is not supported for a precomputed `UncertaintyHistogram`.")
+
+
 def hist_unc_base(unc_ary, bins=20, ax=None, xlim=None, vline=True, hist_kwargs=None,
                   axvline_kwargs=None):
     """Plot histogram of an uncertainty metric and return Axes object.
 
+    The values are binned once with `UncertaintyHistogram`, and only the counts are
+    passed to Matplotlib (as weights of one point per bin), such that the rendering time
+    and memory do not depend on the number of values.
+
     Parameters
     ----------
-    unc_ary : ndarray
-        1D ndarray (`float` type) containing uncertainty values.
+    unc_ary : ndarray or UncertaintyHistogram
+        1D ndarray (`float` type) containing uncertainty values, or a precomputed
+        histogram whose edges are used (`bins` and `xlim` are then ignored).
     bins : int, optional
         Number of bins.
         Default: 20
@@ -61,13 +74,17 @@ def hist_unc_base(unc_ary, bins=20, ax=None, xlim=None, vline=True, hist_kwargs=
     if ax is None:
         ax = plt.gca()
     hist_kwargs, axvline_kwargs, *_ = kwargs_to_dict(hist_kwargs, axvline_kwargs)
-    if xlim is not None:
-        range_x = xlim[1] - xlim[0]
-        binwidth = (xlim[1] - xlim[0]) / bins
-        bins = np.arange(xlim[0]-0.05*range_x, xlim[1] + 0.05*range_x, binwidth) #  + binwidth
-    ax.hist(unc_ary, bins=bins, **hist_kwargs)
+    if isinstance(unc_ary, UncertaintyHistogram):
+        hist = unc_ary
+    else:
+        if xlim is not None:
+            range_x = xlim[1] - xlim[0]
+            binwidth = (xlim[1] - xlim[0]) / bins
+            bins = np.arange(xlim[0]-0.05*range_x, xlim[1] + 0.05*range_x, binwidth) #  + binwidth
+        hist = UncertaintyHistogram.from_array(unc_ary, bins=bins)
+    ax.hist(hist.edges[:-1], bins=hist.edges, weights=hist.counts, **hist_kwargs)
     if vline:
-        ax.axvline(x=np.mean(unc_ary), color="red",
+        ax.axvline(x=hist.mean, color="red",
                    linestyle="--", linewidth=3, **axvline_kwargs)
     return ax
 
@@ -79,10 +96,12 @@ def hist_unc_plot1(unc_ary, unc_type, idx=None, bins=20, ax=None, num_classes=No
 
     Parameters
     ----------
-    unc_ary : ndarray
-        1D ndarray (`float` type) containing uncertainty values.
+    unc_ary : ndarray or UncertaintyHistogram
+        1D ndarray (`float` type) containing uncertainty values, or a precomputed
+        histogram (see `hist_unc_base`).
     idx : ndarray, optional
-        1D array (`int` type) containing indices of test subset.
+        1D array (`int` type) containing indices of test subset. Not supported for a
+        precomputed histogram.
         Default: None
     bins : int, optional
         Number of bins.
@@ -118,6 +137,7 @@ def hist_unc_plot1(unc_ary, unc_type, idx=None, bins=20, ax=None, num_classes=No
         raise ValueError("`num_classes` argument is required for entropy-based uncertainties.")
 
     if idx is not None:
+        _check_subset_hist(unc_ary)
         unc_ary, *_ = subset_ary(idx, unc_ary)
     hist_kwargs, axvline_kwargs, savefig_kwargs, *_ = kwargs_to_dict(hist_kwargs, axvline_kwargs,
                                                                      savefig_kwargs)
@@ -153,14 +173,18 @@ def hist_unc_plot3(unc_tot, unc_ale, unc_epi, num_classes, idx=None, bins=20, ba
 
     Parameters
     ----------
-    unc_tot : ndarray
-        1D ndarray (`float` type) containing total uncertainty values.
-    unc_ale : ndarray
-        1D ndarray (`float` type) containing aleatoric uncertainty values.
-    unc_epi : ndarray
-        1D ndarray (`float` type) containing epistemic uncertainty values.
+    unc_tot : ndarray or UncertaintyHistogram
+        1D ndarray (`float` type) containing total uncertainty values, or a precomputed
+        histogram (see `hist_unc_base`).
+    unc_ale : ndarray or UncertaintyHistogram
+        1D ndarray (`float` type) containing aleatoric uncertainty values, or a
+        precomputed histogram.
+    unc_epi : ndarray or UncertaintyHistogram
+        1D ndarray (`float` type) containing epistemic uncertainty values, or a
+        precomputed histogram.
     idx : ndarray, optional
-        1D array (`int` type) containing indices of test subset.
+        1D array (`int` type) containing indices of test subset. Not supported for
+        precomputed histograms.
         Default: None
     bins : int, optional
         Number of bins.
@@ -184,6 +208,7 @@ def hist_unc_plot3(unc_tot, unc_ale, unc_epi, num_classes, idx=None, bins=20, ba
         Default: None
     """
     if idx is not None:
+        _check_subset_hist(unc_tot, unc_ale, unc_epi)
         unc_tot, unc_ale, unc_epi, *_ = subset_ary(idx, unc_tot, unc_ale, unc_epi)
     if isinstance(num_classes, int) and (num_classes <= 0):
         raise ValueError("`num_classes` should be an integer > 0.")
@@ -236,9 +261,7 @@ def count_unc_base(unc_ary, space_bins=20, ax=None, **plt_kwargs):
         Matplotlib Axes object.
     """
     threshold_ary = np.linspace(start=0, stop=np.max(unc_ary), num=space_bins)
-    compute_count_unc_v = np.vectorize(
-        compute_count_unc, excluded=["unc_ary"])
-    count_unc = compute_count_unc_v(threshold_ary, unc_ary=unc_ary)
+    count_unc = compute_count_unc(threshold_ary, unc_ary)
 
     # plot on existing axis or new axis
     if ax is None:
@@ -295,8 +318,25 @@ def count_unc_plot1(unc_ary, unc_type, idx=None, space_bins=20, save=False, plt_
     return out_ax
 
 
+def _get_report(report, y_true_label, y_pred_stack, measures, idx=None, seed=44):
+    """Return `report` (or a new report of the given measures), subsetted to `idx`."""
+    if report is None:
+        keywords = {"TU": "unc_total", "AU": "unc_aleatoric", "EU": "unc_epistemic",
+                    "Conf": "conf"}
+        if idx is not None:
+            y_true_label, y_pred_stack, *measure_arys = subset_ary(
+                idx, y_true_label, y_pred_stack, *measures.values())
+            measures = dict(zip(measures, measure_arys))
+        return RejectionReport(y_true_label, y_pred_stack, seed=seed,
+                               **{keywords[key]: ary for key, ary in measures.items()})
+    if idx is not None:
+        report = report.subset(idx)
+    return report
+
+
 def rejection_base(y_true_label, y_pred_stack, unc_ary, metric, unc_type, relative=True, seed=44,
-                   space_start=0.001, space_stop=0.99, space_bins=100, ax=None, **plt_kwargs):
+                   space_start=0.001, space_stop=0.99, space_bins=100, ax=None, report=None,
+                   **plt_kwargs):
     """Plot 3 metrics for varying rejection percentage and return axis.
 
     Parameters
@@ -329,6 +369,10 @@ def rejection_base(y_true_label, y_pred_stack, unc_ary, metric, unc_type, relati
     ax : Axes, optional
         Matplotlib Axes object.
         Default: None
+    report : RejectionReport, optional
+        Report serving the metrics from its cache. The measure is selected with
+        `unc_type` and `y_true_label`, `y_pred_stack`, `unc_ary` and `seed` are ignored.
+        Default: None
 
     Returns
     -------
@@ -344,7 +388,7 @@ def rejection_base(y_true_label, y_pred_stack, unc_ary, metric, unc_type, relati
     if unc_type not in unc_types:
         raise ValueError(
             "Invalid uncertainty type. Expected one of: %s" % unc_types)
-    _, y_pred_label = get_y_mean_label(y_pred_stack)
+    n_classes = y_pred_stack.shape[-1] if report is None else report.n_classes
     if relative:
         treshold_ary = np.linspace(start=space_start, stop=space_stop, num=space_bins)
         reject_ary = treshold_ary
@@ -354,17 +398,19 @@ def rejection_base(y_true_label, y_pred_stack, unc_ary, metric, unc_type, relati
         reject_ary = treshold_ary
         plot_ary = np.flip(treshold_ary, 0)
     elif not relative and unc_type in ['TU', 'AU', 'EU']:
-        max_entropy = np.log2(y_pred_stack.shape[-1])  # equal to range
+        max_entropy = np.log2(n_classes)  # equal to range
         treshold_ary = np.linspace(start=(1-space_start)*max_entropy, stop=(1-space_stop)*max_entropy, num=space_bins)
         reject_ary = treshold_ary
         plot_ary = treshold_ary
 
-    compute_metrics_rej_v = np.vectorize(compute_metrics_rej, excluded=["y_true_label",
-                                                                        "y_pred_label", "unc_ary",
-                                                                        "show", "relative", "seed"])
-    nonrej_acc, class_quality, rej_quality = compute_metrics_rej_v(
-        reject_ary, y_true_label=y_true_label, y_pred_label=y_pred_label, unc_ary=unc_ary,
-        show=False, relative=relative, seed=seed)
+    if report is None:
+        _, y_pred_label = get_y_mean_label(y_pred_stack)
+        _, nonrej_acc, class_quality, rej_quality = rejection_curve(
+            y_true_label, y_pred_label, unc_ary, threshold=reject_ary, relative=relative,
+            seed=seed)
+    else:
+        _, nonrej_acc, class_quality, rej_quality = report.curve(
+            unc_type, threshold=reject_ary, relative=relative)
 
     # plot on existing axis or new axis
     if ax is None:
@@ -383,7 +429,8 @@ def rejection_base(y_true_label, y_pred_stack, unc_ary, metric, unc_type, relati
 
 def rejection_setmetric_plot1(y_true_label, y_pred_stack, unc_ary, metric, unc_type, idx=None,
                               relative=True, seed=44, space_start=0.001, space_stop=0.99,
-                              space_bins=100, save=False, savefig_kwargs=None, plt_kwargs=None):
+                              space_bins=100, save=False, savefig_kwargs=None, plt_kwargs=None,
+                              report=None):
     """Plot 1 metric based on 1 uncertainties for varying rejection percentage and return 1 plot.
 
     Parameters
@@ -425,6 +472,10 @@ def rejection_setmetric_plot1(y_true_label, y_pred_stack, unc_ary, metric, unc_t
     savefig_kwargs : dict, optional
         Figure saving properties.
         Default: None
+    report : RejectionReport, optional
+        Report serving the metrics from its cache, see `RejectionReport`. The data
+        arguments and `seed` are then ignored and `idx` selects a subset of the report.
+        Default: None
 
     Raises
     ------
@@ -434,13 +485,10 @@ def rejection_setmetric_plot1(y_true_label, y_pred_stack, unc_ary, metric, unc_t
     unc_types = ['TU', 'AU', 'EU', 'Conf']
     if unc_type not in unc_types:
         raise ValueError("Invalid uncertainty type. Expected one of: %s" % unc_types)
-    if unc_type == 'Conf':
-        unc_ary = (1. - unc_ary)
-    if idx is not None:
-        y_true_label, y_pred_stack, unc_ary, *_ = subset_ary(idx, y_true_label, y_pred_stack, unc_ary)
+    report = _get_report(report, y_true_label, y_pred_stack, {unc_type: unc_ary}, idx, seed)
     plt_kwargs, savefig_kwargs, *_ = kwargs_to_dict(plt_kwargs, savefig_kwargs)
-    out_ax = rejection_base(y_true_label, y_pred_stack, unc_ary, metric, unc_type, relative,
-                            seed, space_start, space_stop, space_bins, **plt_kwargs)
+    out_ax = rejection_base(None, None, None, metric, unc_type, relative, seed, space_start,
+                            space_stop, space_bins, report=report, **plt_kwargs)
     out_ax.grid(linestyle="dashed")
     if relative:
         out_ax.set(xlabel='Relative threshold', ylabel='Metric')
@@ -454,7 +502,7 @@ def rejection_setmetric_plot1(y_true_label, y_pred_stack, unc_ary, metric, unc_t
 def rejection_setmetric_plot3(y_true_label, y_pred_stack, unc_tot, unc_ale, unc_epi,
                               metric, idx=None, relative=True, seed=44, space_start=0.001,
                               space_stop=0.99, space_bins=100, save=False, savefig_kwargs=None,
-                              plt_kwargs=None):
+                              plt_kwargs=None, report=None):
     """Plot 1 metric based on 3 uncertainties for varying rejection percentage and return 3 plots.
 
     Parameters
@@ -498,6 +546,10 @@ def rejection_setmetric_plot3(y_true_label, y_pred_stack, unc_tot, unc_ale, unc_
     savefig_kwargs : dict, optional
         Figure saving properties.
         Default: None
+    report : RejectionReport, optional
+        Report serving the metrics from its cache, see `RejectionReport`. The data
+        arguments and `seed` are then ignored and `idx` selects a subset of the report.
+        Default: None
 
     Raises
     ------
@@ -507,19 +559,13 @@ def rejection_setmetric_plot3(y_true_label, y_pred_stack, unc_tot, unc_ale, unc_
     metrics = ["nra", "cq", "rq"]
     if metric not in metrics:
         raise ValueError("Invalid metric. Expected one of: %s" % metrics)
-    if idx is not None:
-        y_true_label, y_pred_stack, unc_tot, unc_ale, unc_epi, *_ = subset_ary(idx, y_true_label,
-                                                                            y_pred_stack, unc_tot,
-                                                                            unc_ale, unc_epi)
-    unc_type = "TU"
+    report = _get_report(report, y_true_label, y_pred_stack,
+                         {"TU": unc_tot, "AU": unc_ale, "EU": unc_epi}, idx, seed)
     plt_kwargs, savefig_kwargs, *_ = kwargs_to_dict(plt_kwargs, savefig_kwargs)
     _, axes = plt.subplots(ncols=3, figsize=(20, 4))
-    rejection_base(y_true_label, y_pred_stack, unc_tot, metric, unc_type, relative, seed, space_start,
-    space_stop, space_bins, ax=axes[0], **plt_kwargs)
-    rejection_base(y_true_label, y_pred_stack, unc_ale, metric, unc_type, relative, seed, space_start,
-    space_stop, space_bins, ax=axes[1], **plt_kwargs)
-    rejection_base(y_true_label, y_pred_stack, unc_epi, metric, unc_type, relative, seed, space_start,
-    space_stop, space_bins, ax=axes[2], **plt_kwargs)
+    for ax, unc_type in zip(axes, ["TU", "AU", "EU"]):
+        rejection_base(None, None, None, metric, unc_type, relative, seed, space_start,
+                       space_stop, space_bins, ax=ax, report=report, **plt_kwargs)
     titles = ["Total uncertainty",
               "Aleatoric uncertainty", "Epistemic uncertainty"]
     for i, ax in enumerate(axes):
@@ -538,7 +584,7 @@ def rejection_setmetric_plot3(y_true_label, y_pred_stack, unc_tot, unc_ale, unc_
 
 def rejection_mixmetric_plot3(y_true_label, y_pred_stack, unc_ary, unc_type, idx=None,
                               relative=True, seed=44, space_start=0.001, space_stop=0.99, space_bins=100,
-                              save=False, savefig_kwargs=None, plt_kwargs=None):
+                              save=False, savefig_kwargs=None, plt_kwargs=None, report=None):
     """Plot 3 metrics for varying rejection percentage and return 3 plots.
 
     Parameters
@@ -578,6 +624,10 @@ def rejection_mixmetric_plot3(y_true_label, y_pred_stack, unc_ary, unc_type, idx
     savefig_kwargs : dict, optional
         Figure saving properties.
         Default: None
+    report : RejectionReport, optional
+        Report serving the metrics from its cache, see `RejectionReport`. The data
+        arguments and `seed` are then ignored and `idx` selects a subset of the report.
+        Default: None
 
     Raises
     ------
@@ -588,20 +638,15 @@ def rejection_mixmetric_plot3(y_true_label, y_pred_stack, unc_ary, unc_type, idx
     if unc_type not in unc_types:
         raise ValueError(
             "Invalid uncertainty type. Expected one of: %s" % unc_types)
-    if unc_type == 'Conf':
-        unc_ary = (1. - unc_ary)
-    if idx is not None:
-        y_true_label, y_pred_stack, unc_ary, *_ = subset_ary(idx, y_true_label, y_pred_stack, unc_ary)
+    report = _get_report(report, y_true_label, y_pred_stack, {unc_type: unc_ary}, idx, seed)
     plt_kwargs, savefig_kwargs, *_ = kwargs_to_dict(plt_kwargs, savefig_kwargs)
     label_dict = {"nra": "Non-rejected accuracy",
                   "cq": "Classification quality", "rq": "Rejection quality"}
     _, axes = plt.subplots(ncols=3, figsize=(20, 4))
-    rejection_base(y_true_label, y_pred_stack, unc_ary, list(label_dict.keys())[0], unc_type,
-                   relative, seed, space_start, space_stop, space_bins, ax=axes[0], **plt_kwargs)
-    rejection_base(y_true_label, y_pred_stack, unc_ary, list(label_dict.keys())[1], unc_type,
-                   relative, seed, space_start, space_stop, space_bins, ax=axes[1], **plt_kwargs)
-    rejection_base(y_true_label, y_pred_stack, unc_ary, list(label_dict.keys())[2], unc_type,
-                   relative, seed, space_start, space_stop, space_bins, ax=axes[2], **plt_kwargs)
+    # the 3 metrics are served from a single (cached) rejection curve
+    for ax, metric in zip(axes, label_dict):
+        rejection_base(None, None, None, metric, unc_type, relative, seed, space_start,
+                       space_stop, space_bins, ax=ax, report=report, **plt_kwargs)
     titles = list(label_dict.values())
     for i, ax in enumerate(axes):
         ax.set(xlabel='Rejection', ylabel='Metric', title=titles[i])
@@ -8,6 +8,9 @@
 # Imports
 # =============================================================================
 # standard library imports
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 # related third party imports
 
@@ -37,15 +40,81 @@ def subset_ary(idx, *arrs):
 
     Parameters
     ----------
-    idx : ndarray
-        1D array (`int` type) containing indices of subset.
+    idx : ndarray or slice
+        1D array (`int` type) containing indices of subset, or a slice. A slice
+        returns views of the arrays instead of copies.
 
     Returns
     -------
     sequence
-        Sequence of subsetted 1D arrays.
+        Sequence of subsetted arrays.
     """
     arrs_list = [None] * len(arrs)
     for i, arr in enumerate(arrs):
         arrs_list[i] = arr[idx]
     return tuple(arrs_list)
+
+
+def get_n_workers(n_jobs=None):
+    """Convert `n_jobs` argument to number of workers.
+
+    Parameters
+    ----------
+    n_jobs : int, optional
+        Number of parallel jobs. None means 1, negative values count back from the
+        number of CPUs (-1 means all CPUs).
+        Default: None
+
+    Returns
+    -------
+    int
+        Number of workers (at least 1).
+
+    Raises
+    ------
+    ValueError
+        If `n_jobs` is 0.
+    """
+    if n_jobs is None:
+        return 1
+    if n_jobs == 0:
+        raise ValueError("`n_jobs` should be a non-zero integer.")
+    if n_jobs < 0:
+        return max((os.cpu_count() or 1) + 1 + n_jobs, 1)
+    return n_jobs
+
+
+def map_ordered(func, iterable, n_jobs=None):
+    """Apply function to every item and yield results in order, possibly in a thread pool.
+
+    At most twice the number of workers items are in flight, such that chunks from a
+    generator are not all loaded at once.
+
+    Parameters
+    ----------
+    func : callable
+        Function to apply to every item.
+    iterable : iterable
+        Items to process.
+    n_jobs : int, optional
+        Number of threads, see `get_n_workers`.
+        Default: None
+
+    Yields
+    ------
+    object
+        Result of `func` for each item, in the order of `iterable`.
+    """
+    n_workers = get_n_workers(n_jobs)
+    if n_workers == 1:
+        for item in iterable:
+            yield func(item)
+        return
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        futures = deque()
+        for item in iterable:
+            futures.append(executor.submit(func, item))
+            if len(futures) >= 2 * n_workers:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
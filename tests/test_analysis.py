@@ -8,21 +8,50 @@
 # Imports
 # =============================================================================
 # standard library imports
+import tracemalloc
 # related third party imports
 import numpy as np
 import pytest
+from scipy.special import softmax
 # local application/library specific imports
+from uncertainty_rejection import analysis
 from uncertainty_rejection.analysis import (
     get_pos_neg_probs,
     get_y_mean_label,
     load_predictions,
+    open_predictions,
+    Predictions,
     compute_uncertainty,
     compute_confidence,
+    compute_all_uncertainties,
+    compute_all_uncertainties_models,
+    get_y_mean_label_binary,
+    compute_uncertainty_binary,
+    compute_confidence_binary,
+    get_y_mean_label_logits,
+    compute_uncertainty_logits,
+    compute_confidence_logits,
+    TopKPredictions,
+    compute_uncertainty_bounds,
+    UncertaintyAccumulator,
     concat_get_idx,
     get_idx_correct,
     confusion_matrix_rej,
     compute_metrics_rej,
-    compute_count_unc
+    metrics_from_counts,
+    rejection_curve,
+    grouped_rejection_curve,
+    rejection_curve_models,
+    calibrate_threshold,
+    bootstrap_rejection_curve,
+    compute_auc_rej,
+    compute_count_unc,
+    RejectionReport,
+    RejectionGate,
+    IncrementalRejectionEvaluator,
+    RejectionSummary,
+    RejectionSketch,
+    UncertaintyHistogram
 )
 
 # run with: `python3 -m pytest -v` from within src folder
@@ -142,6 +171,257 @@ class TestLoadPredictions:
             2,), f"y_label should have shape `(2,)`, is shape {y_label.shape}"
 
 
+    def test_no_print(self, capsys):
+        load_predictions("tests/preds_mulsamples.npy")
+        assert capsys.readouterr().out == ""
+
+    def test_mmap(self, tmp_path, y_stack):
+        np.save(tmp_path / "preds.npy", y_stack)
+        actual, _, _ = load_predictions(tmp_path / "preds.npy", mmap_mode="r")
+        assert isinstance(actual, np.memmap)
+        np.testing.assert_array_equal(actual, y_stack)
+
+
+class TestOpenPredictions:
+    def test_lazy(self, tmp_path, y_stack):
+        np.save(tmp_path / "preds.npy", y_stack)
+        preds = open_predictions(tmp_path / "preds.npy")
+        assert isinstance(preds.y_pred, np.memmap)
+        assert "_y_mean_label" not in vars(preds)
+        assert preds.shape == (2, 3, 2)
+        expected_y_mean, expected_y_label = get_y_mean_label(y_stack)
+        np.testing.assert_allclose(preds.y_mean, expected_y_mean)
+        np.testing.assert_array_equal(preds.y_label, expected_y_label)
+        assert preds.y_mean is preds.y_mean
+        np.testing.assert_allclose(preds.conf, compute_confidence(y_stack))
+        for act, exp in zip(preds.uncertainties, compute_uncertainty(y_stack)):
+            np.testing.assert_allclose(act, exp)
+
+    @pytest.mark.parametrize(
+        "preds_path, shape",
+        [
+            ("tests/preds_mulsamples.npy", (2, 3, 2)),
+            ("tests/preds_onesample.npy", (2, 1, 2))
+        ]
+    )
+    def test_shape(self, preds_path, shape):
+        preds = open_predictions(preds_path)
+        assert preds.shape == shape
+        assert preds.y_stack.shape == shape
+
+    def test_binary(self, pos_probs):
+        preds = Predictions(pos_probs)
+        _ = preds.uncertainties, preds.conf
+        assert "y_stack" not in vars(preds)
+        y_stack = get_pos_neg_probs(pos_probs)
+        for act, exp in zip(preds.uncertainties, compute_uncertainty(y_stack)):
+            np.testing.assert_array_equal(act, exp)
+        np.testing.assert_array_equal(preds.conf, compute_confidence(y_stack))
+
+    def test_error(self):
+        with pytest.raises(ValueError):
+            Predictions(np.zeros((2, 2, 2, 2)))
+
+
+class TestDtypePolicy:
+    @pytest.fixture
+    def y_stack_64(self):
+        rng = np.random.default_rng(0)
+        return rng.dirichlet(np.full(10, 0.3), size=(2000, 15))
+
+    @pytest.mark.parametrize("dtype", [np.float16, np.float32])
+    def test_dtype(self, y_stack_64, dtype):
+        y_stack = y_stack_64.astype(dtype)
+        results = [*compute_uncertainty(y_stack), *compute_uncertainty(y_stack, chunk_size=7),
+                   *compute_all_uncertainties(y_stack)[:4], get_y_mean_label(y_stack)[0],
+                   compute_confidence(y_stack), *compute_uncertainty_binary(y_stack[..., 0])]
+        for result in results:
+            assert result.dtype == np.float32
+        assert get_pos_neg_probs(y_stack[..., 0]).dtype == dtype
+
+    @pytest.mark.parametrize("dtype", [np.float16, np.float32])
+    def test_error_bound(self, y_stack_64, dtype):
+        y_stack = y_stack_64.astype(dtype)
+        # reference on the same (rounded) probabilities, computed in float64
+        y_stack_ref = y_stack.astype(np.float64)
+        acc = UncertaintyAccumulator()
+        acc.update(y_stack)
+        for actual, expected in [(compute_uncertainty(y_stack), compute_uncertainty(y_stack_ref)),
+                                 (compute_all_uncertainties(y_stack)[:4],
+                                  compute_all_uncertainties(y_stack_ref)[:4]),
+                                 (acc.compute_uncertainty(), compute_uncertainty(y_stack_ref))]:
+            for act, exp in zip(actual, expected):
+                # a few float32 ulps of log2(10)
+                np.testing.assert_allclose(act, exp, rtol=0, atol=1e-6)
+        np.testing.assert_allclose(get_y_mean_label(y_stack)[0],
+                                   get_y_mean_label(y_stack_ref)[0], rtol=0, atol=1e-7)
+
+    def test_no_upcast(self, y_stack_64, monkeypatch):
+        y_stack = y_stack_64.astype(np.float32)
+        monkeypatch.setattr(analysis, "_CHUNK_BYTES", y_stack.nbytes // 8)
+        tracemalloc.start()
+        compute_all_uncertainties(y_stack)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        # a float64 copy of the predictions would take 2 * nbytes
+        assert peak < y_stack.nbytes
+
+
+class TestLogits:
+    @pytest.fixture
+    def logits(self):
+        rng = np.random.default_rng(0)
+        logits = rng.normal(0, 5, size=(200, 6, 50))
+        # masked classes and very confident predictions
+        logits[:5, :, 25:] = -np.inf
+        logits[5:10] *= 1000
+        return logits
+
+    def test_equal_softmax(self, logits):
+        y_stack = softmax(logits, axis=-1)
+        for act, exp in zip(compute_uncertainty_logits(logits), compute_uncertainty(y_stack)):
+            np.testing.assert_allclose(act, exp, rtol=0, atol=1e-12)
+        y_mean, y_label = get_y_mean_label_logits(logits)
+        np.testing.assert_allclose(y_mean, get_y_mean_label(y_stack)[0], rtol=0, atol=1e-15)
+        np.testing.assert_array_equal(y_label, get_y_mean_label(y_stack)[1])
+        np.testing.assert_allclose(compute_confidence_logits(logits),
+                                   compute_confidence(y_stack), rtol=0, atol=1e-15)
+
+    def test_shift_invariant(self, logits):
+        for act, exp in zip(compute_uncertainty_logits(logits + 1e4),
+                            compute_uncertainty_logits(logits)):
+            assert np.all(np.isfinite(act))
+            np.testing.assert_allclose(act, exp, rtol=0, atol=1e-9)
+
+    def test_dtype(self, logits):
+        for unc in compute_uncertainty_logits(logits.astype(np.float16)):
+            assert unc.dtype == np.float32
+
+    def test_error(self, pos_probs):
+        with pytest.raises(ValueError):
+            compute_uncertainty_logits(pos_probs)
+        with pytest.raises(ValueError):
+            get_y_mean_label_logits(pos_probs)
+
+
+class TestTopKPredictions:
+    @pytest.fixture
+    def y_stack_dense(self):
+        rng = np.random.default_rng(0)
+        return rng.dirichlet(np.full(40, 0.3), size=(300, 5))
+
+    @pytest.mark.parametrize("k", [1, 4, 40])
+    def test_equal_dense(self, y_stack_dense, k):
+        topk = TopKPredictions.from_dense(y_stack_dense, k)
+        # point estimates are exact for the uniform spread of `to_dense`
+        y_stack = topk.to_dense()
+        for act, exp in zip(compute_uncertainty(topk), compute_uncertainty(y_stack)):
+            np.testing.assert_allclose(act, exp, rtol=0, atol=1e-12)
+        np.testing.assert_array_equal(get_y_mean_label(topk)[1], get_y_mean_label(y_stack)[1])
+        np.testing.assert_allclose(compute_confidence(topk), compute_confidence(y_stack),
+                                   rtol=0, atol=1e-15)
+        np.testing.assert_allclose(get_y_mean_label(topk)[0].to_dense()[:, 0],
+                                   get_y_mean_label(y_stack)[0], rtol=0, atol=1e-15)
+        if k == 40:
+            np.testing.assert_allclose(y_stack, y_stack_dense, rtol=0, atol=1e-15)
+
+    @pytest.mark.parametrize("k", [1, 4])
+    def test_bounds(self, y_stack_dense, k):
+        topk = TopKPredictions.from_dense(y_stack_dense, k)
+        bounds = compute_uncertainty_bounds(topk)
+        for (lower, upper), unc, unc_uniform in zip(bounds, compute_uncertainty(y_stack_dense),
+                                                    compute_uncertainty(topk)):
+            assert np.all(lower <= unc + 1e-12) and np.all(unc <= upper + 1e-12)
+            assert np.all(lower <= unc_uniform + 1e-12)
+            assert np.all(unc_uniform <= upper + 1e-12)
+
+    @pytest.mark.parametrize(
+        "indices, probs, n_classes, expected_label",
+        [
+            ([[[3], [3]]], [[[0.01], [0.01]]], 5, 0),
+            ([[[0, -1], [1, 2]]], [[[0.2, 0.], [0.2, 0.1]]], 4, 3),
+            ([[[2, 1], [1, 2]]], [[[0.4, 0.4], [0.4, 0.4]]], 5, 1)
+        ]
+    )
+    def test_label_residual(self, indices, probs, n_classes, expected_label):
+        topk = TopKPredictions(np.array(indices), np.array(probs), n_classes)
+        y_stack = topk.to_dense()
+        np.testing.assert_array_equal(get_y_mean_label(topk)[1], [expected_label])
+        np.testing.assert_array_equal(get_y_mean_label(y_stack)[1], [expected_label])
+        np.testing.assert_allclose(compute_confidence(topk), compute_confidence(y_stack))
+
+    def test_save_load(self, y_stack_dense, tmp_path):
+        topk = TopKPredictions.from_dense(y_stack_dense, 3)
+        topk.save(tmp_path / "preds.npz")
+        y_stack, y_mean, y_label = load_predictions(tmp_path / "preds.npz")
+        assert isinstance(y_stack, TopKPredictions)
+        assert y_stack.shape == (300, 5, 40)
+        np.testing.assert_array_equal(y_label, get_y_mean_label(topk)[1])
+        preds = open_predictions(tmp_path / "preds.npz")
+        np.testing.assert_array_equal(preds.conf, compute_confidence(topk))
+        for act, exp in zip(preds.uncertainties, compute_uncertainty(topk)):
+            np.testing.assert_array_equal(act, exp)
+
+    def test_error(self, y_stack_dense):
+        topk = TopKPredictions.from_dense(y_stack_dense, 3)
+        with pytest.raises(ValueError):
+            TopKPredictions(topk.indices, topk.probs[..., :2], 40)
+        with pytest.raises(ValueError):
+            TopKPredictions(topk.indices, topk.probs, 10)
+        with pytest.raises(ValueError):
+            TopKPredictions(topk.indices, topk.probs, 40, residual=np.zeros(3))
+        with pytest.raises(ValueError):
+            topk.entropy(residual="test")
+        with pytest.raises(ValueError):
+            compute_uncertainty_bounds(y_stack_dense)
+
+
+class TestBinary:
+    @pytest.mark.parametrize(
+        "shape, dtype",
+        [
+            ((500, 20), np.float64),
+            ((500, 1), np.float64),
+            ((500,), np.float64),
+            ((500, 7), np.float32),
+            ((500, 7), np.float16),
+            ((0, 3), np.float64)
+        ]
+    )
+    def test_equal_stack(self, shape, dtype):
+        rng = np.random.default_rng(0)
+        y_pred_pos = rng.random(shape).astype(dtype)
+        y_pred_pos[:5] = 0.
+        y_pred_pos[5:10] = 1.
+        y_stack = get_pos_neg_probs(y_pred_pos)
+        if y_pred_pos.ndim == 1:
+            y_stack = y_stack[:, np.newaxis, :]
+        # identical, not only close
+        for act, exp in zip(compute_uncertainty_binary(y_pred_pos),
+                            compute_uncertainty(y_stack)):
+            assert act.dtype == exp.dtype
+            np.testing.assert_array_equal(act, exp)
+        for act, exp in zip(get_y_mean_label_binary(y_pred_pos), get_y_mean_label(y_stack)):
+            np.testing.assert_array_equal(act, exp)
+        np.testing.assert_array_equal(compute_confidence_binary(y_pred_pos),
+                                      compute_confidence(y_stack))
+
+    def test_n_jobs(self):
+        rng = np.random.default_rng(0)
+        y_pred_pos = rng.random((1000, 5))
+        for act, exp in zip(compute_uncertainty_binary(y_pred_pos, n_jobs=3),
+                            compute_uncertainty_binary(y_pred_pos)):
+            np.testing.assert_array_equal(act, exp)
+
+    def test_error(self, y_stack):
+        with pytest.raises(ValueError):
+            compute_uncertainty_binary(y_stack)
+        with pytest.raises(ValueError):
+            get_y_mean_label_binary(y_stack)
+        with pytest.raises(ValueError):
+            compute_confidence_binary(y_stack)
+
+
 @pytest.mark.parametrize(
     "y_stack, unc_tuple",
     [
@@ -170,6 +450,54 @@ def test_decompose_uncertainty(y_stack, unc_tuple):
         f"Epistemic uncertainty should be {float(unc_tuple[2][0])}, is {float(actual_unc_epistemic[0])}."
 
 
+class TestComputeUncertaintyChunked:
+    @pytest.fixture
+    def y_stack_large(self):
+        rng = np.random.default_rng(0)
+        return rng.dirichlet(np.full(5, 0.5), size=(103, 4))
+
+    @pytest.mark.parametrize("chunk_size, memory_budget", [(10, None), (None, 1000), (1, None)])
+    def test_equal_in_memory(self, y_stack_large, chunk_size, memory_budget):
+        actual = compute_uncertainty(y_stack_large, chunk_size=chunk_size,
+                                     memory_budget=memory_budget)
+        expected = compute_uncertainty(y_stack_large)
+        for act, exp in zip(actual, expected):
+            np.testing.assert_array_equal(act, exp)
+
+    def test_memmap(self, y_stack_large, tmp_path):
+        np.save(tmp_path / "preds.npy", y_stack_large)
+        y_mmap = np.load(tmp_path / "preds.npy", mmap_mode="r")
+        out = tuple(np.lib.format.open_memmap(tmp_path / f"unc_{i}.npy", mode="w+",
+                                              shape=(y_mmap.shape[0],)) for i in range(3))
+        actual = compute_uncertainty(y_mmap, chunk_size=16, out=out)
+        expected = compute_uncertainty(y_stack_large)
+        for act, arr, exp in zip(actual, out, expected):
+            assert act is arr
+            np.testing.assert_array_equal(act, exp)
+
+    def test_generator(self, y_stack_large):
+        chunks = (y_stack_large[i:i + 25] for i in range(0, y_stack_large.shape[0], 25))
+        actual = compute_uncertainty(chunks)
+        expected = compute_uncertainty(y_stack_large)
+        for act, exp in zip(actual, expected):
+            np.testing.assert_array_equal(act, exp)
+
+    @pytest.mark.parametrize("n_jobs", [2, -1])
+    def test_n_jobs(self, y_stack_large, n_jobs):
+        actual = compute_uncertainty(y_stack_large, chunk_size=7, n_jobs=n_jobs)
+        expected = compute_uncertainty(y_stack_large)
+        for act, exp in zip(actual, expected):
+            np.testing.assert_array_equal(act, exp)
+
+    def test_error(self, y_stack, pos_probs):
+        with pytest.raises(ValueError):
+            compute_uncertainty(y_stack, out=(np.empty(2),))
+        with pytest.raises(ValueError):
+            compute_uncertainty(pos_probs, chunk_size=1)
+        with pytest.raises(ValueError):
+            compute_uncertainty(iter([]))
+
+
 class TestComputeConfidence:
     def test_unit(self, y_stack):
         actual = compute_confidence(y_stack)
@@ -184,6 +512,104 @@ class TestComputeConfidence:
             compute_confidence(pos_probs)
 
 
+class TestComputeAllUncertainties:
+    @pytest.mark.parametrize("shape", [(50, 4, 3), (7, 1, 10), (0, 3, 2)])
+    def test_equal_reference(self, shape):
+        rng = np.random.default_rng(0)
+        y_stack = rng.dirichlet(np.full(shape[-1], 0.5), size=shape[:-1])
+        actual = compute_all_uncertainties(y_stack)
+        y_mean, y_label = get_y_mean_label(y_stack)
+        expected = (*compute_uncertainty(y_stack), compute_confidence(y_stack), y_label)
+        for act, exp in zip(actual, expected):
+            np.testing.assert_allclose(act, exp, atol=1e-12)
+
+    def test_zero_probs(self):
+        y_stack = np.array([[[0.0, 1.0], [1.0, 0.0], [0.0, 1.0], [1.0, 0.0]]])
+        unc_total, unc_aleatoric, unc_epistemic, conf, y_label = \
+            compute_all_uncertainties(y_stack)
+        np.testing.assert_allclose([unc_total, unc_aleatoric, unc_epistemic, conf],
+                                   [[1.], [0.], [1.], [0.5]])
+        np.testing.assert_array_equal(y_label, [0])
+
+    def test_n_jobs(self):
+        rng = np.random.default_rng(0)
+        y_stack = rng.dirichlet(np.full(3, 0.5), size=(51, 4))
+        actual = compute_all_uncertainties(y_stack, n_jobs=4)
+        expected = compute_all_uncertainties(y_stack)
+        for act, exp in zip(actual, expected):
+            np.testing.assert_array_equal(act, exp)
+
+    def test_out(self, y_stack):
+        out = (np.empty(2), None, np.empty(2), None, None)
+        actual = compute_all_uncertainties(y_stack, out=out)
+        assert actual[0] is out[0]
+        assert actual[2] is out[2]
+
+    def test_error(self, pos_probs, y_stack):
+        with pytest.raises(ValueError):
+            compute_all_uncertainties(pos_probs)
+        with pytest.raises(ValueError):
+            compute_all_uncertainties(y_stack, out=(None,))
+
+
+class TestComputeAllUncertaintiesModels:
+    @pytest.fixture
+    def y_models(self):
+        rng = np.random.default_rng(0)
+        return rng.dirichlet(np.full(3, 0.5), size=(3, 20, 4))
+
+    def test_unit(self, y_models):
+        actual = compute_all_uncertainties_models(y_models)
+        for i, y_stack in enumerate(y_models):
+            for act, exp in zip(actual, compute_all_uncertainties(y_stack)):
+                np.testing.assert_array_equal(act[i], exp)
+
+    def test_files(self, y_models, tmp_path):
+        paths = []
+        for i, y_stack in enumerate(y_models):
+            paths.append(tmp_path / f"model_{i}.npy")
+            np.save(paths[-1], y_stack)
+        actual = compute_all_uncertainties_models(paths)
+        expected = compute_all_uncertainties_models(y_models)
+        for act, exp in zip(actual, expected):
+            np.testing.assert_array_equal(act, exp)
+
+    def test_error(self, y_models, y_stack):
+        with pytest.raises(ValueError):
+            compute_all_uncertainties_models(y_models[0])
+        with pytest.raises(ValueError):
+            compute_all_uncertainties_models([y_models[0], y_models[1, :10]])
+        with pytest.raises(ValueError):
+            compute_all_uncertainties_models([])
+
+
+class TestUncertaintyAccumulator:
+    @pytest.mark.parametrize("step", [1, 3])
+    def test_equal_stack(self, step):
+        rng = np.random.default_rng(0)
+        y_stack = rng.dirichlet(np.full(4, 0.5), size=(20, 9))
+        acc = UncertaintyAccumulator()
+        for i in range(0, y_stack.shape[1], step):
+            y_pred = y_stack[:, i] if step == 1 else y_stack[:, i:i + step]
+            acc.update(y_pred)
+        assert acc.n_samples == 9
+        for act, exp in zip(acc.get_y_mean_label(), get_y_mean_label(y_stack)):
+            np.testing.assert_allclose(act, exp)
+        for act, exp in zip(acc.compute_uncertainty(), compute_uncertainty(y_stack)):
+            np.testing.assert_allclose(act, exp, atol=1e-12)
+        np.testing.assert_allclose(acc.compute_confidence(), compute_confidence(y_stack))
+
+    def test_error(self, y_stack):
+        acc = UncertaintyAccumulator()
+        with pytest.raises(ValueError):
+            acc.compute_uncertainty()
+        with pytest.raises(ValueError):
+            acc.update(np.zeros(3))
+        acc.update(y_stack)
+        with pytest.raises(ValueError):
+            acc.update(np.zeros((3, 2)))
+
+
 def test_concat_get_idx():
     y_a = np.full((3,), 10)
     y_b = np.full((3,), 20)
@@ -202,6 +628,17 @@ def test_concat_get_idx():
         idx_c, np.array([6, 7, 8]), err_msg='idx_c computed incorrectly!')
 
 
+def test_concat_get_idx_slice():
+    y_a = np.full((3,), 10)
+    y_b = np.full((2,), 20)
+    y_true_all, id_arr, idx_a, idx_b = concat_get_idx(y_a, y_b, as_slice=True)
+    assert (idx_a, idx_b) == (slice(0, 3), slice(3, 5))
+    np.testing.assert_array_equal(id_arr, [0, 0, 0, 1, 1])
+    subset = y_true_all[idx_b]
+    np.testing.assert_array_equal(subset, y_b)
+    assert np.shares_memory(subset, y_true_all)
+
+
 def test_get_idx_correct(y_true_label, y_pred_label):
     actual = get_idx_correct(y_true_label, y_pred_label)
     expected_idx_correct, expected_idx_incorrect = np.array(
@@ -238,6 +675,55 @@ class TestConfMatrixRej:
         assert actual_n_incor_nonrej == expected_n_incor_nonrej, \
             f"`n_incor_nonrej` should be {expected_n_incor_nonrej}, is {actual_n_incor_nonrej}."
 
+    @pytest.mark.parametrize("relative", [True, False])
+    def test_batched(self, y_true_label, y_pred_label, unc_ary, relative):
+        threshold = np.array([0.45, 0.1, 0.9])
+        actual = confusion_matrix_rej(y_true_label, y_pred_label, unc_ary, threshold,
+                                      relative=relative)
+        for i, thr in enumerate(threshold):
+            expected = confusion_matrix_rej(y_true_label, y_pred_label, unc_ary, thr,
+                                            relative=relative)
+            assert tuple(count[i] for count in actual) == expected
+
+
+class TestConfMatrixRejTies:
+    @pytest.fixture
+    def tied(self):
+        y_true_label = np.array([1, 1, 1, 1, 1])
+        y_pred_label = np.array([1, 1, 0, 0, 1])
+        unc_ary = np.array([0.1, 0.5, 0.5, 0.5, 0.9])
+        return y_true_label, y_pred_label, unc_ary
+
+    def test_expected(self, tied):
+        actual = confusion_matrix_rej(*tied, 0.6, ties="expected")
+        np.testing.assert_allclose(actual, (3 - 4/3, 1 + 1/3, 2 - 2/3, 2/3))
+
+    def test_expected_mean_random(self, tied):
+        threshold = np.linspace(0, 1, 11)
+        expected = confusion_matrix_rej(*tied, threshold, ties="expected")
+        random_counts = np.mean([confusion_matrix_rej(*tied, threshold, seed=seed)
+                                 for seed in range(3000)], axis=0)
+        np.testing.assert_allclose(random_counts, expected, atol=0.05)
+
+    def test_hash(self, tied):
+        threshold = np.linspace(0, 1, 11)
+        actual = confusion_matrix_rej(*tied, threshold, ties="hash")
+        np.testing.assert_array_equal(actual, confusion_matrix_rej(*tied, threshold, ties="hash"))
+        _, _, _, _, counts = rejection_curve(*tied, threshold, ties="hash", return_counts=True,
+                                             n_jobs=2)
+        np.testing.assert_array_equal(actual, counts)
+
+    def test_global_rng_untouched(self, tied):
+        np.random.seed(0)
+        expected = np.random.random()
+        np.random.seed(0)
+        confusion_matrix_rej(*tied, 0.6)
+        assert np.random.random() == expected
+
+    def test_error(self, tied):
+        with pytest.raises(ValueError):
+            confusion_matrix_rej(*tied, 0.6, ties="test")
+
 
 class TestComputeMetricsRej:
     @pytest.mark.parametrize(
@@ -309,6 +795,743 @@ class TestComputeMetricsRej:
         assert rq == 1.0, f"RQ should be 1.0 if `n_cor_rej` = 0 and no samples are rejected, is {rq}."
 
 
+class TestRejectionCurve:
+    @pytest.mark.parametrize(
+        "threshold, metrics_rej",
+        [
+            (0.45, (1.0, 0.8, 3.0)),
+            (0.1, (0.75, 0.8, np.inf)),
+            (0.9, (np.inf, 0.4, 1.0))
+        ]
+    )
+    def test_unit(self, y_true_label, y_pred_label, unc_ary, threshold, metrics_rej):
+        _, *actual = rejection_curve(y_true_label, y_pred_label, unc_ary, threshold=threshold)
+        np.testing.assert_allclose(np.concatenate(actual), metrics_rej)
+
+    def test_counts(self, y_true_label, y_pred_label, unc_ary):
+        *_, counts = rejection_curve(y_true_label, y_pred_label, unc_ary,
+                                     threshold=[0.45, 0.1, 0.9], return_counts=True)
+        np.testing.assert_array_equal(np.stack(counts, axis=-1),
+                                      [(1, 2, 2, 0), (0, 3, 1, 1), (3, 0, 2, 0)])
+
+    def test_all_cut_points(self, y_true_label, y_pred_label, unc_ary):
+        threshold, nonrej_acc, _, _ = rejection_curve(y_true_label, y_pred_label, unc_ary)
+        np.testing.assert_allclose(threshold, [0., 0.2, 0.4, 0.6, 0.8, 1.])
+        np.testing.assert_allclose(nonrej_acc, [0.6, 0.75, 2/3, 1., 1., np.inf])
+
+    @pytest.mark.parametrize(
+        "threshold, metrics_rej",
+        [
+            (0.45, (1.0, 0.8, 3.0)),
+            (0.1, (np.inf, 0.4, 1.0)),
+            (0.9, (0.6, 0.6, 1.0))
+        ]
+    )
+    def test_unit_absolute(self, y_true_label, y_pred_label, unc_ary, threshold, metrics_rej):
+        _, *actual = rejection_curve(y_true_label, y_pred_label, unc_ary, threshold=threshold,
+                                     relative=False)
+        np.testing.assert_allclose(np.concatenate(actual), metrics_rej)
+
+    def test_all_cut_points_absolute(self, y_true_label, y_pred_label, unc_ary):
+        threshold, nonrej_acc, _, _ = rejection_curve(y_true_label, y_pred_label, unc_ary,
+                                                      relative=False)
+        np.testing.assert_allclose(threshold, [0.2, 0.4, 0.5, 0.6, 0.8, np.inf])
+        np.testing.assert_allclose(nonrej_acc, [np.inf, 1., 1., 2/3, 0.75, 0.6])
+
+    @pytest.mark.parametrize(
+        "relative, ties",
+        [
+            (True, "random"),
+            (False, "random"),
+            (True, "expected"),
+            (True, "hash")
+        ]
+    )
+    def test_equal_compute_metrics_rej(self, relative, ties):
+        rng = np.random.default_rng(0)
+        y_true_label = rng.integers(0, 3, size=500)
+        y_pred_label = rng.integers(0, 3, size=500)
+        # many ties to exercise random tie-breaking
+        unc_ary = np.round(rng.random(500), 1)
+        unc_ary[:5] = np.nan
+        threshold = np.linspace(-0.5, 1.5, 101)
+        _, *actual = rejection_curve(y_true_label, y_pred_label, unc_ary, threshold=threshold,
+                                     relative=relative, ties=ties)
+        for i, thr in enumerate(threshold):
+            expected = compute_metrics_rej(thr, y_true_label, y_pred_label, unc_ary,
+                                           relative=relative, show=False, ties=ties)
+            np.testing.assert_array_equal([metric[i] for metric in actual], expected)
+
+
+    @pytest.mark.parametrize("relative", [True, False])
+    def test_n_jobs(self, relative):
+        rng = np.random.default_rng(0)
+        y_true_label = rng.integers(0, 3, size=5000)
+        y_pred_label = rng.integers(0, 3, size=5000)
+        unc_ary = np.round(rng.random(5000), 2)
+        unc_ary[:50] = np.nan
+        expected = rejection_curve(y_true_label, y_pred_label, unc_ary, relative=relative,
+                                   return_counts=True)
+        actual = rejection_curve(y_true_label, y_pred_label, unc_ary, relative=relative,
+                                 return_counts=True, n_jobs=3)
+        for act, exp in zip(actual[:4], expected[:4]):
+            np.testing.assert_array_equal(act, exp)
+        np.testing.assert_array_equal(actual[4], expected[4])
+
+
+class TestGroupedRejectionCurve:
+    @pytest.fixture
+    def grouped_data(self):
+        rng = np.random.default_rng(0)
+        y_true_label = rng.integers(0, 3, size=600)
+        y_pred_label = rng.integers(0, 3, size=600)
+        unc_ary = np.round(rng.random(600), 1)
+        unc_ary[::50] = np.nan
+        id_arr = rng.integers(0, 3, size=600)
+        return y_true_label, y_pred_label, unc_ary, id_arr
+
+    @pytest.mark.parametrize("relative, ties", [(True, "expected"), (False, "random")])
+    def test_unit(self, grouped_data, relative, ties):
+        y_true_label, y_pred_label, unc_ary, id_arr = grouped_data
+        threshold = np.linspace(0, 1, 21)
+        groups, _, *actual, counts = grouped_rejection_curve(
+            y_true_label, y_pred_label, unc_ary, id_arr, threshold, relative=relative,
+            ties=ties, combined=True, return_counts=True)
+        np.testing.assert_array_equal(groups, [0, 1, 2])
+        assert actual[0].shape == (4, 21)
+        idx_list = [np.where(id_arr == group)[0] for group in groups] + [slice(None)]
+        for i, idx in enumerate(idx_list):
+            *expected, expected_counts = rejection_curve(
+                y_true_label, y_pred_label, unc_ary, threshold, idx=idx, relative=relative,
+                ties=ties, return_counts=True)[1:]
+            for act, exp in zip(actual, expected):
+                np.testing.assert_allclose(act[i], exp)
+            for act, exp in zip(counts, expected_counts):
+                np.testing.assert_allclose(act[i], exp)
+
+    @pytest.mark.parametrize("ties", ["random", "hash"])
+    def test_random_ties(self, grouped_data, ties):
+        y_true_label, y_pred_label, unc_ary, id_arr = grouped_data
+        threshold = [0.3, 0.5, 0.6]
+        groups, _, *actual = grouped_rejection_curve(
+            y_true_label, y_pred_label, unc_ary, id_arr, threshold, ties=ties, combined=True)
+        idx_list = [np.flatnonzero(id_arr == group) for group in groups] + [slice(None)]
+        for i, idx in enumerate(idx_list):
+            expected = rejection_curve(y_true_label, y_pred_label, unc_ary, threshold, idx=idx,
+                                       ties=ties)[1:]
+            for act, exp in zip(actual, expected):
+                np.testing.assert_array_equal(act[i], exp)
+
+    def test_error(self, grouped_data):
+        with pytest.raises(ValueError):
+            grouped_rejection_curve(*grouped_data, threshold=None)
+
+
+class TestRejectionCurveModels:
+    @pytest.fixture
+    def model_data(self):
+        rng = np.random.default_rng(0)
+        y_true_label = rng.integers(0, 3, size=300)
+        y_pred_label = rng.integers(0, 3, size=(4, 300))
+        unc_ary = np.round(rng.random((4, 300)), 1)
+        unc_ary[:, ::40] = np.nan
+        return y_true_label, y_pred_label, unc_ary
+
+    @pytest.mark.parametrize(
+        "relative, ties, threshold",
+        [
+            (True, "random", None),
+            (True, "hash", np.linspace(0, 1, 11)),
+            (True, "expected", np.linspace(0, 1, 11)),
+            (False, "random", np.linspace(-0.1, 1.1, 13))
+        ]
+    )
+    def test_unit(self, model_data, relative, ties, threshold):
+        y_true_label, y_pred_label, unc_ary = model_data
+        idx = slice(10, 250)
+        actual = rejection_curve_models(y_true_label, y_pred_label, unc_ary,
+                                        threshold=threshold, idx=idx, relative=relative,
+                                        ties=ties, return_counts=True, n_jobs=3)
+        for i in range(unc_ary.shape[0]):
+            expected = rejection_curve(y_true_label, y_pred_label[i], unc_ary[i],
+                                       threshold=threshold, idx=idx, relative=relative,
+                                       ties=ties, return_counts=True)
+            np.testing.assert_array_equal(actual[0], expected[0])
+            for act, exp in zip(actual[1:4], expected[1:4]):
+                np.testing.assert_array_equal(act[i], exp)
+            for act, exp in zip(actual[4], expected[4]):
+                np.testing.assert_array_equal(act[i], exp)
+
+    def test_error(self, model_data):
+        y_true_label, y_pred_label, unc_ary = model_data
+        with pytest.raises(ValueError):
+            rejection_curve_models(y_true_label, y_pred_label, unc_ary, relative=False)
+        with pytest.raises(ValueError):
+            rejection_curve_models(y_true_label, y_pred_label[:2], unc_ary)
+        with pytest.raises(ValueError):
+            rejection_curve_models(y_true_label, y_pred_label, unc_ary, threshold=0.5,
+                                   ties="foo")
+
+
+class TestRejectionReport:
+    @pytest.fixture
+    def report_data(self):
+        rng = np.random.default_rng(0)
+        y_stack = rng.dirichlet(np.full(3, 0.5), size=(200, 4))
+        y_true_label = rng.integers(0, 3, size=200)
+        return y_true_label, y_stack
+
+    @pytest.mark.parametrize("relative", [True, False])
+    def test_unit(self, report_data, relative):
+        y_true_label, y_stack = report_data
+        unc_total, unc_aleatoric, unc_epistemic, conf, y_label = \
+            compute_all_uncertainties(y_stack)
+        report = RejectionReport(y_true_label, y_stack)
+        threshold = np.linspace(0, 1, 11)
+        measures = {"TU": unc_total, "AU": unc_aleatoric, "EU": unc_epistemic,
+                    "Conf": 1. - conf}
+        for unc_type, unc_ary in measures.items():
+            actual = report.curve(unc_type, threshold, relative=relative)
+            expected = rejection_curve(y_true_label, y_label, unc_ary, threshold,
+                                       relative=relative)
+            for act, exp in zip(actual, expected):
+                np.testing.assert_array_equal(act, exp)
+
+    def test_cache(self, report_data, monkeypatch):
+        y_true_label, y_stack = report_data
+        report = RejectionReport(y_true_label, y_stack)
+        calls = []
+        sort_correct = analysis._sort_correct
+        monkeypatch.setattr(analysis, "_sort_correct",
+                            lambda *args, **kwargs: calls.append(1) or sort_correct(*args,
+                                                                                    **kwargs))
+        first = report.curve("TU", [0.1, 0.5])
+        assert report.curve("TU", np.array([0.1, 0.5]))[1] is first[1]
+        report.curve("TU", None)
+        report.curve("TU", 0.3, return_counts=True)
+        assert len(calls) == 1
+        report.curve("EU", 0.3)
+        assert len(calls) == 2
+
+    def test_subset(self, report_data):
+        y_true_label, y_stack = report_data
+        report = RejectionReport(y_true_label, y_stack)
+        idx = np.arange(50, 150)
+        assert report.subset(idx) is report.subset(idx.copy())
+        assert report.subset(slice(50, 150)).y_pred_stack.base is not None
+        actual = report.subset(slice(50, 150)).curve("AU", [0.2, 0.4])
+        expected = rejection_curve(y_true_label, report.y_pred_label,
+                                   report.measure("AU"), [0.2, 0.4], idx=idx)
+        for act, exp in zip(actual, expected):
+            np.testing.assert_array_equal(act, exp)
+
+    def test_error(self, report_data):
+        y_true_label, y_stack = report_data
+        with pytest.raises(ValueError):
+            RejectionReport(y_true_label, y_stack).curve("test")
+        with pytest.raises(ValueError):
+            RejectionReport(y_true_label, y_stack, ties="test")
+
+
+class TestRejectionGate:
+    @pytest.fixture
+    def stream(self):
+        rng = np.random.default_rng(0)
+        return rng.random(2000), rng.integers(0, 3, size=2000), rng.integers(0, 3, size=2000)
+
+    @pytest.mark.parametrize("threshold", [0., 0.1, 0.37, 1.])
+    def test_unit(self, stream, threshold):
+        unc_ary, y_true_label, y_pred_label = stream
+        gate = RejectionGate(threshold, window=unc_ary.shape[0])
+        gate.update(unc_ary)
+        is_rej = gate.reject(unc_ary)
+        is_correct = y_true_label == y_pred_label
+        actual = (np.count_nonzero(is_rej & is_correct), np.count_nonzero(~is_rej & is_correct),
+                  np.count_nonzero(is_rej & ~is_correct), np.count_nonzero(~is_rej & ~is_correct))
+        expected = confusion_matrix_rej(y_true_label, y_pred_label, unc_ary, threshold)
+        assert actual == expected, f"Counts should be {expected}, are {actual}."
+
+    def test_absolute(self, stream):
+        unc_ary, y_true_label, y_pred_label = stream
+        unc_ary = np.append(unc_ary, np.nan)
+        y_true_label, y_pred_label = np.append(y_true_label, 0), np.append(y_pred_label, 0)
+        gate = RejectionGate(0.6, relative=False)
+        is_rej = gate(unc_ary)
+        n_rej = np.count_nonzero(is_rej)
+        n_cor_rej, _, n_incor_rej, _ = confusion_matrix_rej(y_true_label, y_pred_label, unc_ary,
+                                                            0.6, relative=False)
+        assert n_rej == n_cor_rej + n_incor_rej
+        assert gate(0.6) and not gate(np.nan)
+
+    def test_threshold_zero(self):
+        unc_ary = np.array([0.1, 0.9, np.nan])
+        for gate in (RejectionGate(0.), RejectionGate(0., window=10)):
+            gate.update(unc_ary)
+            np.testing.assert_array_equal(gate.reject(unc_ary), [False, False, False])
+            assert gate(np.nan) is False
+        n_cor_rej, _, n_incor_rej, _ = confusion_matrix_rej(
+            np.zeros(3), np.array([0., 1., 0.]), unc_ary, 0.)
+        assert n_cor_rej + n_incor_rej == 0
+
+    def test_window(self):
+        gate = RejectionGate(0.5, window=4)
+        assert not gate(1.)
+        for unc in [2., 3., 4., 0.1, 0.2, 0.3]:
+            gate(unc)
+        # window is [4., 0.1, 0.2, 0.3]
+        assert gate.cutoff == 0.3
+        assert gate.reject(0.25) is False
+        np.testing.assert_array_equal(gate.reject(np.array([0.25, 0.3, np.nan])),
+                                      [False, True, True])
+
+    @pytest.mark.parametrize("threshold", [0.05, 0.5, 0.9])
+    def test_sketch(self, threshold):
+        unc_ary = np.random.default_rng(1).beta(2, 5, size=20_000)
+        gate = RejectionGate(threshold)
+        for unc in unc_ary[:-1000]:
+            gate(unc)
+        rej_rate = np.mean(gate(unc_ary[-1000:]))
+        assert gate.cutoff == pytest.approx(np.quantile(unc_ary, 1 - threshold), abs=1e-2)
+        assert rej_rate == pytest.approx(threshold, abs=0.05)
+
+    def test_error(self):
+        with pytest.raises(ValueError):
+            RejectionGate(1.5)
+        with pytest.raises(ValueError):
+            RejectionGate(0.5, window=0)
+
+
+class TestCalibrateThreshold:
+    @pytest.fixture
+    def labels_unc(self):
+        rng = np.random.default_rng(0)
+        unc_ary = np.round(rng.random(300), 2)
+        y_true_label = rng.integers(0, 3, size=300)
+        y_pred_label = np.where(rng.random(300) < unc_ary, rng.integers(0, 3, size=300),
+                                y_true_label)
+        return y_true_label, y_pred_label, unc_ary
+
+    def test_unit(self):
+        y_true_label = np.array([0., 1., 1., 0., 1.])
+        y_pred_label = np.array([0., 0., 1., 0., 0.])
+        unc_ary = np.array([0.2, 0.8, 0.4, 0.6, 0.5])
+        actual = calibrate_threshold(y_true_label, y_pred_label, unc_ary, target=1.)
+        assert actual == (0.6, 0.5), f"Thresholds should be (0.6, 0.5), are {actual}."
+
+    @pytest.mark.parametrize("metric, target", [
+        ("nra", [0.8, 0.9, 1.]),
+        ("rejection_rate", [0., 0.1, 1 / 3]),
+        ("rq", [1.5, 2., 3.])
+    ])
+    @pytest.mark.parametrize("ties", ["random", "expected"])
+    def test_brute_force(self, labels_unc, metric, target, ties):
+        y_true_label, y_pred_label, unc_ary = labels_unc
+        n_preds = unc_ary.shape[0]
+        actual = calibrate_threshold(y_true_label, y_pred_label, unc_ary, target, metric=metric,
+                                     ties=ties)
+        for relative, threshold_ary in zip((True, False), actual):
+            threshold, nonrej_acc, _, rej_quality, counts = rejection_curve(
+                y_true_label, y_pred_label, unc_ary, relative=relative, return_counts=True,
+                ties=ties)
+            n_rej = counts[0] + counts[2]
+            values = {"nra": np.where(n_rej < n_preds, nonrej_acc, -np.inf),
+                      "rejection_rate": n_rej / n_preds, "rq": rej_quality}[metric]
+            for tgt, thr in zip(target, threshold_ary):
+                valid = values >= tgt
+                n_rej_exp = n_rej[valid].max() if metric == "rq" else n_rej[valid].min()
+                counts_act = confusion_matrix_rej(y_true_label, y_pred_label, unc_ary, thr,
+                                                  relative=relative, ties=ties)
+                assert counts_act[0] + counts_act[2] == pytest.approx(n_rej_exp)
+
+    def test_unachievable(self, labels_unc):
+        actual = calibrate_threshold(*labels_unc, target=[1.1], metric="nra")
+        np.testing.assert_array_equal(actual, ([np.nan], [np.nan]))
+
+    def test_error(self, labels_unc):
+        with pytest.raises(ValueError):
+            calibrate_threshold(*labels_unc, target=0.9, metric="test")
+
+
+class TestIncrementalRejectionEvaluator:
+    @pytest.mark.parametrize("relative, threshold", [
+        (True, [0., 0.1, 0.33, 0.5, 1.]),
+        (False, [-1., 0., 0.3, np.inf])
+    ])
+    def test_unit(self, relative, threshold):
+        rng = np.random.default_rng(0)
+        n_obs = 600
+        # ties, NaN and signed zeros
+        unc_ary = np.round(rng.normal(size=n_obs), 1)
+        unc_ary[rng.random(n_obs) < 0.05] = np.nan
+        unc_ary[::37] = -0.
+        y_pred_label = rng.integers(0, 3, size=n_obs)
+        y_true_label = rng.integers(0, 3, size=n_obs)
+        evaluator = IncrementalRejectionEvaluator(threshold, relative=relative, window=200)
+        labelled = set()
+        for i in range(n_obs):
+            evaluator.add_prediction(i, unc_ary[i], y_pred_label[i])
+            # delayed label of a random earlier prediction, possibly expired
+            j = int(rng.integers(max(0, i - 300), i + 1))
+            if evaluator.add_label(j, y_true_label[j]):
+                labelled.add(j)
+            if i % 100 == 99:
+                idx = np.array(sorted(labelled & set(range(i - 199, i + 1))))
+                actual = evaluator.counts()
+                expected = confusion_matrix_rej(y_true_label[idx], y_pred_label[idx],
+                                                unc_ary[idx], threshold, relative=relative,
+                                                ties="expected")
+                for act, exp in zip(actual, expected):
+                    np.testing.assert_allclose(act, exp)
+        assert len(evaluator) == 200
+
+    def test_metrics(self, y_true_label, y_pred_label, unc_ary):
+        evaluator = IncrementalRejectionEvaluator(0.4)
+        for i, (unc, y_pred) in enumerate(zip(unc_ary, y_pred_label)):
+            evaluator.add_prediction(i, unc, y_pred)
+        assert not evaluator.add_label(len(unc_ary), 0)
+        for i, y_true in enumerate(y_true_label):
+            evaluator.add_label(i, y_true)
+        expected = compute_metrics_rej(0.4, y_true_label, y_pred_label, unc_ary, show=False,
+                                       ties="expected")
+        np.testing.assert_allclose(evaluator.metrics(), expected)
+        evaluator.expire(0)
+        expected = compute_metrics_rej(0.4, y_true_label[1:], y_pred_label[1:], unc_ary[1:],
+                                       show=False, ties="expected")
+        np.testing.assert_allclose(evaluator.metrics(), expected)
+
+    @pytest.mark.parametrize("block_size", [1, 3, 64])
+    def test_blocked_sorted_list(self, block_size):
+        rng = np.random.default_rng(0)
+        sorted_list = analysis._BlockedSortedList(block_size)
+        expected = []
+        for _ in range(3000):
+            if expected and rng.random() < 0.45:
+                value = expected[int(rng.integers(len(expected)))]
+                expected.remove(value)
+                sorted_list.remove(value)
+            else:
+                value = float(rng.integers(100))
+                expected.append(value)
+                expected.sort()
+                sorted_list.add(value)
+            assert len(sorted_list) == len(expected)
+            query = rng.integers(-1, 101) + 0.5 * rng.integers(2)
+            assert sorted_list.bisect_left(query) == np.searchsorted(expected, query, "left")
+            assert sorted_list.bisect_right(query) == np.searchsorted(expected, query, "right")
+            if expected:
+                index = int(rng.integers(len(expected)))
+                assert sorted_list[index] == expected[index]
+
+    def test_error(self):
+        evaluator = IncrementalRejectionEvaluator(0.1)
+        evaluator.add_prediction("a", 0.5, 1)
+        with pytest.raises(ValueError):
+            evaluator.add_prediction("a", 0.2, 1)
+        with pytest.raises(ValueError):
+            IncrementalRejectionEvaluator(0.1, window=0)
+
+
+class TestRejectionSummary:
+    @pytest.fixture
+    def shards(self):
+        rng = np.random.default_rng(0)
+        unc_ary = np.round(rng.random(1000), 2)
+        unc_ary[rng.random(1000) < 0.02] = np.nan
+        y_true_label = rng.integers(0, 3, size=1000)
+        y_pred_label = np.where(rng.random(1000) < 0.3, rng.integers(0, 3, size=1000),
+                                y_true_label)
+        return y_true_label, y_pred_label, unc_ary, np.array_split(np.arange(1000), 5)
+
+    @pytest.mark.parametrize("relative, threshold", [
+        (True, np.linspace(0, 1, 21)),
+        (False, [-1., 0., 0.005, 0.3, 1., np.inf])
+    ])
+    def test_unit(self, shards, relative, threshold):
+        y_true_label, y_pred_label, unc_ary, idx_shards = shards
+        summaries = [RejectionSummary.from_arrays(y_true_label[idx], y_pred_label[idx],
+                                                  unc_ary[idx]) for idx in idx_shards]
+        expected = confusion_matrix_rej(y_true_label, y_pred_label, unc_ary, threshold,
+                                        relative=relative, ties="expected")
+        # associative: merging all at once or pairwise
+        left = summaries[0]
+        for summary in summaries[1:]:
+            left = left + summary
+        for merged in (RejectionSummary.merge(summaries), left):
+            for act, exp in zip(merged.counts(threshold, relative=relative), expected):
+                np.testing.assert_allclose(act, exp)
+
+    def test_binned(self, shards):
+        y_true_label, y_pred_label, _, idx_shards = shards
+        unc_ary = np.random.default_rng(1).random(1000)
+        edges = np.linspace(0, 1, 33)
+        merged = RejectionSummary.merge(
+            RejectionSummary.from_arrays(y_true_label[idx], y_pred_label[idx], unc_ary[idx],
+                                         edges=edges) for idx in idx_shards)
+        assert merged.n_preds == 1000
+        threshold = np.linspace(0, 1, 21)
+        actual = merged.counts(threshold)
+        expected = confusion_matrix_rej(y_true_label, y_pred_label, unc_ary, threshold)
+        assert np.max(np.abs(actual[1] - expected[1])) <= merged.count_error_bound
+        # absolute thresholds on bin edges are exact
+        actual = merged.counts(edges, relative=False)
+        expected = confusion_matrix_rej(y_true_label, y_pred_label, unc_ary, edges,
+                                        relative=False)
+        for act, exp in zip(actual, expected):
+            np.testing.assert_allclose(act, exp)
+
+    def test_out_of_range(self, shards):
+        y_true_label, y_pred_label, _, _ = shards
+        unc_ary = np.random.default_rng(2).uniform(-0.2, 1.3, 1000)
+        edges = np.linspace(0, 1, 11)
+        summary = RejectionSummary.from_arrays(y_true_label, y_pred_label, unc_ary,
+                                               edges=edges)
+        assert summary.n_preds == 1000
+        # absolute thresholds on bin edges are exact, including the outer edges
+        actual = summary.counts(edges, relative=False)
+        expected = confusion_matrix_rej(y_true_label, y_pred_label, unc_ary, edges,
+                                        relative=False)
+        for act, exp in zip(actual, expected):
+            np.testing.assert_allclose(act, exp)
+        assert summary.absolute_count_error_bound(edges[3]) == (0, 0)
+        # absolute thresholds between and outside the edges
+        threshold = np.linspace(-0.3, 1.4, 69)
+        actual = summary.counts(threshold, relative=False)
+        expected = confusion_matrix_rej(y_true_label, y_pred_label, unc_ary, threshold,
+                                        relative=False)
+        error_cor, error_incor = summary.absolute_count_error_bound(threshold)
+        for act, exp, error in zip(actual, expected,
+                                   [error_cor, error_cor, error_incor, error_incor]):
+            assert np.all(np.abs(act - exp) <= error)
+        threshold = np.linspace(0, 1, 21)
+        actual = summary.counts(threshold)
+        expected = confusion_matrix_rej(y_true_label, y_pred_label, unc_ary, threshold)
+        assert np.max(np.abs(actual[1] - expected[1])) <= summary.count_error_bound
+
+    def test_absolute_within_bin(self):
+        unc_ary = np.array([.01, .02, .03, .04, .5])
+        y_pred_label = np.array([1, 1, 1, 1, 0])
+        summary = RejectionSummary.from_arrays(np.ones(5), y_pred_label, unc_ary,
+                                               edges=[0., .5, 1.])
+        assert confusion_matrix_rej(np.ones(5), y_pred_label, unc_ary, .25,
+                                    relative=False) == (0, 4, 1, 0)
+        assert summary.counts(.25, relative=False) == (2, 2, 1, 0)
+        assert summary.count_error_bound == 0
+        assert summary.absolute_count_error_bound(.25) == (4, 0)
+
+    def test_save_load(self, shards, tmp_path):
+        y_true_label, y_pred_label, unc_ary, _ = shards
+        summary = RejectionSummary.from_arrays(y_true_label, y_pred_label, unc_ary)
+        summary.save(tmp_path / "summary.npz")
+        loaded = RejectionSummary.load(tmp_path / "summary.npz")
+        for act, exp in zip(loaded.rejection_curve([0.1, 0.5]),
+                            summary.rejection_curve([0.1, 0.5])):
+            np.testing.assert_array_equal(act, exp)
+
+    def test_error(self, shards):
+        y_true_label, y_pred_label, unc_ary, _ = shards
+        exact = RejectionSummary.from_arrays(y_true_label, y_pred_label, unc_ary)
+        binned = RejectionSummary.from_arrays(y_true_label, y_pred_label, unc_ary,
+                                              edges=np.linspace(0, 1, 11))
+        with pytest.raises(ValueError):
+            _ = exact + binned
+        with pytest.raises(ValueError):
+            _ = binned + RejectionSummary.from_arrays(y_true_label, y_pred_label, unc_ary,
+                                                      edges=np.linspace(0, 1, 5))
+        with pytest.raises(ValueError):
+            RejectionSummary([0., 1.], [1], [1, 2])
+
+
+class TestRejectionSketch:
+    @pytest.fixture
+    def labels_unc(self):
+        rng = np.random.default_rng(0)
+        unc_ary = rng.beta(2, 5, size=50_000)
+        unc_ary[:100] = np.nan
+        y_true_label = rng.integers(0, 3, size=50_000)
+        y_pred_label = np.where(rng.random(50_000) < unc_ary, rng.integers(0, 3, size=50_000),
+                                y_true_label)
+        return y_true_label, y_pred_label, unc_ary
+
+    @pytest.mark.parametrize("relative", [True, False])
+    def test_unit(self, labels_unc, relative):
+        sketch = RejectionSketch.from_arrays(*labels_unc, k=64, chunk_size=4096)
+        assert sketch.n_preds == 50_000
+        assert sum(items.shape[0] for items in sketch.correct.levels) < 64 * 12
+        threshold = np.linspace(0, 1, 21)
+        actual = sketch.counts(threshold, relative=relative)
+        expected = confusion_matrix_rej(*labels_unc, threshold, relative=relative)
+        error_cor, error_incor = sketch.count_error_bound(relative=relative)
+        assert 0 < error_cor < 5000
+        assert np.all(np.abs(actual[1] - expected[1]) <= error_cor)
+        assert np.all(np.abs(actual[3] - expected[3]) <= error_incor)
+
+    def test_exact(self, y_true_label, y_pred_label, unc_ary):
+        # sketches that did not compact are exact
+        sketch = RejectionSketch.from_arrays(y_true_label, y_pred_label, unc_ary)
+        assert sketch.count_error_bound() == (0, 0)
+        expected = compute_metrics_rej(0.4, y_true_label, y_pred_label, unc_ary, show=False,
+                                       ties="expected")
+        np.testing.assert_allclose(sketch.rejection_curve(0.4)[1:],
+                                   np.array(expected)[:, None])
+
+    def test_merge(self, labels_unc):
+        y_true_label, y_pred_label, unc_ary = labels_unc
+        sketch = RejectionSketch(k=64)
+        for idx in np.array_split(np.arange(50_000), 7):
+            sketch = sketch + RejectionSketch.from_arrays(y_true_label[idx], y_pred_label[idx],
+                                                          unc_ary[idx], k=64)
+        threshold = np.linspace(0, 1, 21)
+        expected = np.array([compute_count_unc(thr, unc_ary) for thr in threshold])
+        assert np.all(np.abs(sketch.count_unc(threshold) - expected) <= sum(sketch.rank_error))
+
+    def test_error(self):
+        with pytest.raises(ValueError):
+            RejectionSketch(k=1)
+        with pytest.raises(ValueError):
+            _ = RejectionSketch(k=64) + RejectionSketch(k=32)
+
+
+class TestUncertaintyHistogram:
+    @pytest.mark.parametrize("bins", [20, np.array([-0.1, 0., 0.25, 0.3, 1., 1.5])])
+    def test_unit(self, bins):
+        unc_ary = np.random.default_rng(0).random(10_001) * 1.2
+        unc_ary[[3, 7]] = [np.nan, 1.]
+        actual = UncertaintyHistogram.from_array(unc_ary, bins=bins, chunk_size=1000)
+        expected_counts, expected_edges = np.histogram(unc_ary[~np.isnan(unc_ary)], bins=bins)
+        np.testing.assert_array_equal(actual.counts, expected_counts)
+        np.testing.assert_array_equal(actual.edges, expected_edges)
+        # NaN propagates to the mean, as with `np.mean`
+        assert np.isnan(actual.mean)
+        unc_valid = unc_ary[~np.isnan(unc_ary)]
+        actual = UncertaintyHistogram.from_array(unc_valid, bins=bins, chunk_size=1000)
+        assert actual.mean == pytest.approx(np.mean(unc_valid))
+
+    def test_merge(self):
+        unc_ary = np.random.default_rng(0).random(1000)
+        edges = np.linspace(0, 1, 11)
+        merged = UncertaintyHistogram.from_array(unc_ary[:300], bins=edges) + \
+            UncertaintyHistogram.from_array(unc_ary[300:], bins=edges)
+        expected = UncertaintyHistogram.from_array(unc_ary, bins=edges)
+        np.testing.assert_array_equal(merged.counts, expected.counts)
+        assert merged.n_obs == 1000
+        assert merged.mean == pytest.approx(np.mean(unc_ary))
+        merged += UncertaintyHistogram.from_array([np.nan], bins=edges)
+        assert np.isnan(merged.mean)
+        with pytest.raises(ValueError):
+            _ = merged + UncertaintyHistogram(np.linspace(0, 1, 5))
+
+    def test_error(self):
+        with pytest.raises(ValueError):
+            UncertaintyHistogram([1., 0.])
+
+
+class TestBootstrapRejectionCurve:
+    @pytest.fixture
+    def data(self):
+        rng = np.random.default_rng(0)
+        y_true_label = rng.integers(0, 3, size=60)
+        y_pred_label = rng.integers(0, 3, size=60)
+        unc_ary = np.round(rng.random(60), 1)
+        return y_true_label, y_pred_label, unc_ary
+
+    @pytest.mark.parametrize("relative", [True, False])
+    def test_equal_resampled(self, data, relative):
+        y_true_label, y_pred_label, unc_ary = data
+        threshold = np.linspace(-0.2, 1.2, 15)
+        *_, samples = bootstrap_rejection_curve(y_true_label, y_pred_label, unc_ary, threshold,
+                                                relative=relative, n_boot=20, rng=1,
+                                                return_samples=True)
+        # resamples are drawn over the observations in sorted order
+        draws = np.random.default_rng(1).integers(0, 60, size=(20, 60))
+        weights = np.stack([np.bincount(row, minlength=60) for row in draws])
+        if relative:
+            idx_sort = np.lexsort((np.random.RandomState(44).random_sample(60), unc_ary))
+            # strictly increasing uncertainty keeps the tie-breaking order of the originals
+            unc_sort = np.arange(60, dtype=float)
+        else:
+            idx_sort = np.argsort(unc_ary)
+            unc_sort = unc_ary[idx_sort]
+        for i in range(20):
+            expected = rejection_curve(np.repeat(y_true_label[idx_sort], weights[i]),
+                                       np.repeat(y_pred_label[idx_sort], weights[i]),
+                                       np.repeat(unc_sort, weights[i]), threshold,
+                                       relative=relative)[1:]
+            for exp, sample in zip(expected, samples):
+                np.testing.assert_array_equal(sample[i], exp)
+
+    def test_bands(self, data):
+        threshold = np.linspace(0, 0.9, 10)
+        actual = bootstrap_rejection_curve(*data, threshold, n_boot=200, rng=0)
+        np.testing.assert_array_equal(actual[0], threshold)
+        for band in actual[1:]:
+            assert band.shape == (3, 10)
+            assert np.all(band[0] <= band[1]) and np.all(band[1] <= band[2])
+        repeated = bootstrap_rejection_curve(*data, threshold, n_boot=200,
+                                             rng=np.random.default_rng(0))
+        for act, rep in zip(actual, repeated):
+            np.testing.assert_array_equal(act, rep)
+
+    def test_error(self):
+        with pytest.raises(ValueError):
+            bootstrap_rejection_curve(np.array([]), np.array([]), np.array([]), 0.5)
+
+
+class TestComputeAucRej:
+    def test_unit(self, y_true_label, y_pred_label, unc_ary):
+        # sorted correctness: [1, 1, 0, 1, 0]
+        auc_nra, aurc, eaurc, aurc_oracle = compute_auc_rej(y_true_label, y_pred_label, unc_ary)
+        expected_aurc = (0/1 + 0/2 + 1/3 + 1/4 + 2/5) / 5
+        expected_aurc_oracle = (1/4 + 2/5) / 5
+        assert aurc == pytest.approx(expected_aurc)
+        assert auc_nra == pytest.approx(1 - expected_aurc)
+        assert aurc_oracle == pytest.approx(expected_aurc_oracle)
+        assert eaurc == pytest.approx(expected_aurc - expected_aurc_oracle)
+
+    def test_equal_rejection_curve(self):
+        rng = np.random.default_rng(0)
+        y_true_label = rng.integers(0, 3, size=300)
+        y_pred_label = rng.integers(0, 3, size=300)
+        unc_ary = np.round(rng.random(300), 1)
+        _, nonrej_acc, _, _ = rejection_curve(y_true_label, y_pred_label, unc_ary)
+        auc_nra, aurc, _, _ = compute_auc_rej(y_true_label, y_pred_label, unc_ary)
+        # cut points without the empty non-rejected set
+        assert auc_nra == pytest.approx(np.mean(nonrej_acc[:-1]))
+        assert aurc == pytest.approx(np.mean(1 - nonrej_acc[:-1]))
+
+    def test_expected_ties(self):
+        y_true_label = np.array([1, 1, 1, 1])
+        y_pred_label = np.array([1, 0, 1, 0])
+        unc_ary = np.zeros(4)
+        _, aurc, _, _ = compute_auc_rej(y_true_label, y_pred_label, unc_ary, ties="expected")
+        assert aurc == pytest.approx(0.5)
+
+    def test_oracle(self):
+        y_true_label = np.array([0, 1, 1, 0, 1])
+        y_pred_label = np.array([0, 1, 0, 0, 1])
+        unc_ary = np.array([0.1, 0.2, 0.9, 0.3, 0.4])
+        _, _, eaurc, _ = compute_auc_rej(y_true_label, y_pred_label, unc_ary)
+        assert eaurc == pytest.approx(0.)
+
+    def test_error(self):
+        with pytest.raises(ValueError):
+            compute_auc_rej(np.array([]), np.array([]), np.array([]))
+
+
+@pytest.mark.parametrize(
+    "counts, metrics_rej",
+    [
+        ((1, 2, 2, 0), (1.0, 0.8, 3.0)),
+        ((0, 0, 0, 0), (np.inf, np.inf, 1.0)),
+        ((0, 4, 0, 0), (1.0, 1.0, 1.0)),
+        ((0, 2, 2, 0), (1.0, 1.0, np.inf)),
+        ((2, 2, 0, 0), (1.0, 0.5, np.inf))
+    ]
+)
+def test_metrics_from_counts(counts, metrics_rej):
+    actual = metrics_from_counts(*counts)
+    np.testing.assert_allclose(actual, metrics_rej)
+
+
 @pytest.mark.parametrize(
     "threshold, count_unc",
     [
@@ -321,3 +1544,17 @@ def test_compute_count_unc(unc_ary, threshold, count_unc):
     actual = compute_count_unc(threshold, unc_ary)
     expected = count_unc
     assert actual == actual, f"`count_unc` should be {expected}, is {actual}."
+
+
+def test_compute_count_unc_batched(unc_ary):
+    threshold = np.array([0.45, 0.1, 0.9, 0.2])
+    actual = compute_count_unc(threshold, unc_ary)
+    expected = np.array([compute_count_unc(thr, unc_ary) for thr in threshold])
+    np.testing.assert_array_equal(actual, expected)
+
+
+def test_compute_count_unc_survival():
+    unc_ary = np.array([0.2, 0.8, 0.4, 0.4, np.nan, 0.5])
+    threshold, count_unc = compute_count_unc(None, unc_ary)
+    np.testing.assert_array_equal(threshold, [0.2, 0.4, 0.5, 0.8])
+    np.testing.assert_array_equal(count_unc, [5, 4, 2, 1])
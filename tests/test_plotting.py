@@ -34,7 +34,9 @@ from uncertainty_rejection.plotting import (
 from uncertainty_rejection.analysis import (
     compute_uncertainty,
     compute_confidence,
-    concat_get_idx
+    concat_get_idx,
+    RejectionReport,
+    UncertaintyHistogram
 )
 
 # pylint: disable=missing-function-docstring, missing-class-docstring, redefined-outer-name
@@ -104,6 +106,11 @@ class TestHistUncBase:
         ax = hist_unc_base(unc_tot)
         assert isinstance(ax, matplotlib.axes.SubplotBase)
 
+    def test_precomputed(self, unc_tot):
+        ax = hist_unc_base(UncertaintyHistogram.from_array(unc_tot, bins=20))
+        heights = [patch.get_height() for patch in ax.patches]
+        np.testing.assert_array_equal(heights, np.histogram(unc_tot, bins=20)[0])
+
 
 class TestHistUncPlot1:
     def test_integration1(self, unc_tot):
@@ -140,6 +147,15 @@ class TestHistUncPlot3:
         for ax in axes:
             assert isinstance(ax, matplotlib.axes.SubplotBase)
 
+    def test_precomputed(self, unc_tot, unc_ale, unc_epi):
+        hists = [UncertaintyHistogram.from_array(unc, bins=20)
+                 for unc in (unc_tot, unc_ale, unc_epi)]
+        axes = hist_unc_plot3(*hists, num_classes=10)
+        for ax in axes:
+            assert isinstance(ax, matplotlib.axes.SubplotBase)
+        with pytest.raises(ValueError):
+            hist_unc_plot3(*hists, num_classes=10, idx=np.arange(unc_tot.shape[0]))
+
     def test_error1(self, unc_tot):
         with pytest.raises(ValueError):
             hist_unc_plot3(unc_tot, unc_ale, unc_epi, num_classes=-1)
@@ -244,3 +260,16 @@ class TestRejectionMixmetricPlot3:
         with pytest.raises(ValueError):
             rejection_mixmetric_plot3(
             y_true_all, y_stack, unc_tot, unc_type="test")
+
+
+class TestRejectionReportPlots:
+    def test_integration(self, y_true_all, y_stack, unc_tot, unc_ale, unc_epi, conf):
+        report = RejectionReport(y_true_all, y_stack, unc_tot, unc_ale, unc_epi, conf)
+        idx = np.arange(unc_tot.shape[0])
+        axes = rejection_mixmetric_plot3(None, None, None, unc_type="Conf", report=report)
+        axes = [*axes, *rejection_setmetric_plot3(None, None, None, None, None, metric="rq",
+                                                  idx=idx, report=report)]
+        axes.append(rejection_setmetric_plot1(None, None, None, metric="cq", unc_type="EU",
+                                              relative=False, report=report))
+        for ax in axes:
+            assert isinstance(ax, matplotlib.axes.SubplotBase)
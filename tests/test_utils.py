@@ -14,7 +14,9 @@ import pytest
 # local application/library specific imports
 from uncertainty_rejection.utils import (
     subset_ary,
-    kwargs_to_dict
+    kwargs_to_dict,
+    get_n_workers,
+    map_ordered
 )
 
 # pylint: disable=missing-function-docstring, missing-class-docstring, redefined-outer-name
@@ -43,3 +45,36 @@ def test_subset_ary(inputs, expected):
     actuals = subset_ary(*inputs)
     for actual, expect in zip(actuals, expected): # cannot directly assert tuple of arrays
         assert actual == pytest.approx(expect)
+
+
+@pytest.mark.parametrize(
+    "n_jobs, expected",
+    [
+        (None, 1),
+        (1, 1),
+        (4, 4),
+        (-1000, 1)
+    ]
+)
+def test_get_n_workers(n_jobs, expected):
+    assert get_n_workers(n_jobs) == expected
+
+
+def test_get_n_workers_error():
+    with pytest.raises(ValueError):
+        get_n_workers(0)
+
+
+@pytest.mark.parametrize("n_jobs", [None, 3])
+def test_map_ordered(n_jobs):
+    actual = list(map_ordered(lambda x: x**2, iter(range(20)), n_jobs=n_jobs))
+    assert actual == [x**2 for x in range(20)]
+
+
+def test_subset_ary_slice():
+    arr = np.arange(10)
+    arr_2d = np.arange(20).reshape(10, 2)
+    actual, actual_2d = subset_ary(slice(2, 5), arr, arr_2d)
+    np.testing.assert_array_equal(actual, [2, 3, 4])
+    np.testing.assert_array_equal(actual_2d, arr_2d[2:5])
+    assert np.shares_memory(actual, arr) and np.shares_memory(actual_2d, arr_2d)